@@ -1,47 +1,420 @@
+import asyncio
 import discord
+import time
 from datetime import datetime
-from typing import Dict, Optional, List
-from ..models.config import Settings, FilterConfig
-from ..services.pushover import send_pushover_notification
+from typing import Any, Dict, Iterable, Optional, List, Tuple
+from ..models.config import Settings, FilterConfig, NotificationConfig, RoutingRule
+from ..services.config_store import ConfigStore
+from ..services.pushover import PushoverNotifier
+from ..services.image_cache import ImageCache
+from ..services.images import ImageProcessor
+from ..services.dedup import DuplicateIndex, image_key
+from ..services.dispatch import DispatchItem, NotificationDispatcher
+from ..services.events import EventBroadcaster
+from ..services import metrics
+from ..services.metrics import SamplingProfiler
+from ..services.outbox import NotificationOutbox, RetryPolicy
+from ..services.scheduler import DeliveryScheduler
+from ..services.store import MessageStore
+from .backfill import Backfill
+from .routing import Route, RoutingSnapshot, build_routing
+from .history import HistoryRecord, MessageHistory
+from .tracking import MessageTracker, TrackedMessage, attachments_of, embeds_of
+
+def gateway_options(settings: Settings) -> Dict:
+    """``discord.Client`` options for the configured gateway mode.
+
+    Lean mode subscribes only to guild and guild message events (plus
+    message content), skips member chunking and member caching, and keeps
+    the message cache to ``discord_message_cache_size``. The monitor only
+    looks at new messages in known channels, so the rest of the guild state
+    discord.py would otherwise track is never used.
+    """
+    if not settings.lean_gateway:
+        intents = discord.Intents.default()
+        intents.message_content = True
+        return {"intents": intents}
+
+    intents = discord.Intents.none()
+    intents.guilds = True  # Channel lookups need the guild cache
+    intents.guild_messages = True
+    intents.message_content = True
+    return {
+        "intents": intents,
+        "chunk_guilds_at_startup": False,
+        "member_cache_flags": discord.MemberCacheFlags.none(),
+        # discord.py treats 0 as "use the default", so None disables the cache
+        "max_messages": settings.discord_message_cache_size or None
+    }
+
+def _patch_ids(current: List[int], add: Iterable[int],
+               remove: Iterable[int]) -> Tuple[List[int], List[int], List[int]]:
+    """Apply an add/remove patch to a list of IDs, keeping its order.
+
+    Returns the new list and the IDs it gained and lost. An ID both added
+    and removed is kept, so a patch never drops what it also asks for.
+    """
+    add = list(dict.fromkeys(add))
+    drop = set(remove).difference(add)
+    present = set(current)
+    removed = [i for i in current if i in drop]
+    added = [i for i in add if i not in present]
+    if removed:
+        current = [i for i in current if i not in drop]
+    return current + added, added, removed
 
 class DiscordMonitor(discord.Client):
     """Discord client for monitoring specific channels and users with configurable filters."""
     
-    def __init__(self, settings: Settings):
-        """Initialize the message monitor with settings."""
-        super().__init__()
+    def __init__(self, settings: Settings, **options):
+        """Initialize the message monitor with settings.
+
+        Extra keyword arguments are passed through to ``discord.Client`` and
+        override the options derived from the gateway settings.
+        """
+        self._client_options = {**gateway_options(settings), **options}
+        super().__init__(**self._client_options)
         self.settings = settings
         self.target_channels: Dict[int, discord.TextChannel] = {}
         self.connected = False
-        self._message_history: List[Dict] = []  # Store recent messages for dashboard
+        self.history = MessageHistory(settings.history_size)  # Recent messages for dashboard
+        self.tracker = MessageTracker(settings.edit_tracking_size)  # Recent messages, for edits
+        self.backfill = Backfill(settings.backfill_concurrency, settings.backfill_max_messages)
+        self._backfill_task: Optional[asyncio.Task] = None
+        self.events = EventBroadcaster(settings.stream_queue_size)  # Live feed for dashboards
+        self.supervisor = None  # Set by MonitorSupervisor when run in the background
+        self.config_version = 0  # Bumped whenever the API changes the configuration
+        self._services_started = False
+        self.config_store = ConfigStore(
+            settings.config_path, delay=settings.config_save_delay
+        ) if settings.config_path else None
+        if self.config_store:
+            self._apply_saved_config(self.config_store.load())
+        self.store = MessageStore(
+            settings.message_store_path,
+            batch_size=settings.message_store_batch_size,
+            flush_interval=settings.message_store_flush_interval
+        ) if settings.message_store_path else None
+        # Channels are only added once they resolve after connecting
+        self.routing: RoutingSnapshot = build_routing((), settings.target_user_ids, settings.filters,
+                                                     settings.rules, settings.notifications)
+        self.image_cache = ImageCache(
+            max_bytes=settings.image_cache_max_bytes,
+            ttl=settings.image_cache_ttl,
+            spill_dir=settings.image_cache_dir,
+            spill_max_bytes=settings.image_cache_dir_max_bytes
+        ) if settings.image_cache_max_bytes > 0 else None
+        self.image_processor = ImageProcessor(
+            max_bytes=settings.image_target_bytes,
+            max_dimension=settings.image_max_dimension,
+            min_bytes=settings.image_process_min_bytes,
+            workers=settings.image_processing_workers
+        ) if settings.image_processing_workers > 0 else None
+        self.notifier = PushoverNotifier(
+            user_key=settings.pushover_user_key,
+            api_token=settings.pushover_api_token,
+            connection_limit=settings.http_connection_limit,
+            connection_limit_per_host=settings.http_connection_limit_per_host,
+            dns_cache_ttl=settings.http_dns_cache_ttl,
+            keepalive_timeout=settings.http_keepalive_timeout,
+            max_concurrent_images=settings.image_concurrency,
+            image_cache=self.image_cache,
+            image_processor=self.image_processor
+        )
+        self.dispatcher = NotificationDispatcher(
+            self._deliver_notification,
+            maxsize=settings.dispatch_queue_size,
+            workers=settings.dispatch_workers,
+            overflow_policy=settings.dispatch_overflow_policy,
+            on_discard=lambda item: self.outbox.discard(item),
+            on_merge=lambda item: self.outbox.update(item)
+        )
+        self.outbox = NotificationOutbox(
+            self.dispatcher.submit,
+            path=settings.notification_outbox_path,
+            policy=RetryPolicy(
+                max_attempts=settings.notification_retry_attempts,
+                base_delay=settings.notification_retry_base_delay,
+                max_delay=settings.notification_retry_max_delay
+            ),
+            rate_limit=self.notifier.rate_limit
+        )
+        self.scheduler = DeliveryScheduler(
+            self._enqueue_notification,
+            window=settings.notification_digest_window,
+            max_window=settings.notification_digest_max_window,
+            rate_limit=self.notifier.rate_limit,
+            quota_reserve=settings.pushover_quota_reserve,
+            hold=self.outbox.add,
+            release=self.outbox.discard
+        )
+        self.dedup = DuplicateIndex(
+            window=settings.dedup_window,
+            max_entries=settings.dedup_max_entries,
+            similarity=settings.dedup_similarity
+        ) if settings.dedup_window > 0 else None
+        self.profiler = SamplingProfiler(settings.profile_sample_rate)
+        metrics.CONNECTED.set_function(lambda: self.connected)
+        metrics.DISPATCH_QUEUE_DEPTH.set_function(lambda: self.dispatcher.depth)
+        metrics.OUTBOX_PENDING.set_function(lambda: self.outbox.stats()["pending"])
+        metrics.STREAM_SUBSCRIBERS.set_function(lambda: self.events.subscriber_count)
+        metrics.DEDUP_SUPPRESSION_RATIO.set_function(
+            lambda: self.dedup.suppression_rate if self.dedup is not None else 0.0)
 
     @property
     def message_history(self) -> List[Dict]:
         """Get recent message history for the dashboard."""
-        return self._message_history[-100:]  # Keep last 100 messages
+        return [record.to_dict() for record in self.history.query()]
+
+    def status(self) -> Dict:
+        """Connection status, monitored channels and delivery statistics."""
+        return {
+            "connected": self.connected,
+            "readiness": self.supervisor.readiness() if self.supervisor else None,
+            "channels": [
+                {
+                    "id": channel_id,
+                    "name": f"{channel.guild.name} - #{channel.name}"
+                }
+                for channel_id, channel in self.target_channels.items()
+            ],
+            "routing": self.routing.describe(),
+            "dispatch": self.dispatcher.stats(),
+            "scheduler": self.scheduler.stats(),
+            "outbox": self.outbox.stats(),
+            "dedup": self.dedup.stats() if self.dedup is not None else None,
+            "image_cache": self.image_cache.stats() if self.image_cache else None,
+            "image_processing": self.image_processor.stats() if self.image_processor else None,
+            "config_store": self.config_store.stats() if self.config_store else None,
+            "backfill": self.backfill.stats(),
+            "store": self.store.stats() if self.store else None
+        }
+
+    def publish_status(self):
+        """Push the current status to live-feed subscribers."""
+        self.events.publish("status", self.status())
+
+    def record_message(self, **fields) -> HistoryRecord:
+        """Add a matched message to history, the store and the live feed."""
+        start = time.perf_counter()
+        record = self.history.append(**fields)
+        if self.store:
+            self.store.append(record)
+        self.events.publish("message", record.to_dict(), record.seq)
+        metrics.HISTORY_SECONDS.observe(time.perf_counter() - start)
+        return record
 
-    def _add_to_history(self, message_data: Dict):
-        """Add a message to history with size limit."""
-        self._message_history.append(message_data)
-        if len(self._message_history) > 100:
-            self._message_history.pop(0)
+    def update_record(self, message_id: int, **fields) -> Optional[HistoryRecord]:
+        """Apply an edit or delete to a message's history entry, if it has one."""
+        record = self.history.find_message(message_id)
+        if record is None:
+            return None
+        self.history.update(record, **fields)
+        if self.store:
+            self.store.update(record)
+        # Not a new message, so no event id to resume from
+        self.events.publish("message_update", record.to_dict())
+        return record
+
+    def _apply_saved_config(self, saved: Dict[str, Any]):
+        """Override the settings with the configuration last saved by the API."""
+        try:
+            if "channel_ids" in saved:
+                self.settings.channel_ids = [int(c) for c in saved["channel_ids"]]
+            if "target_user_ids" in saved:
+                self.settings.target_user_ids = [int(u) for u in saved["target_user_ids"]]
+            if "filters" in saved:
+                self.settings.filters = FilterConfig(**saved["filters"])
+            if "notifications" in saved:
+                self.settings.notifications = NotificationConfig(**saved["notifications"])
+            if "rules" in saved:
+                self.settings.rules = [RoutingRule(**rule) for rule in saved["rules"]]
+        except (TypeError, ValueError) as e:
+            print(f"Error applying saved configuration, using the rest as loaded: {e}")
+
+    def _saved_config(self) -> Dict[str, Any]:
+        return {
+            "channel_ids": self.settings.channel_ids,
+            "target_user_ids": self.settings.target_user_ids,
+            "filters": self.settings.filters.model_dump(mode="json"),
+            "notifications": self.settings.notifications.model_dump(mode="json"),
+            "rules": [rule.model_dump(mode="json") for rule in self.settings.rules]
+        }
+
+    def _config_changed(self):
+        """Bump the config version and schedule saving the new configuration."""
+        self.config_version += 1
+        if self.config_store:
+            self.config_store.schedule(self._saved_config)
+
+    def update_filters(self, filters: FilterConfig):
+        """Replace the filter configuration and recompile its matcher."""
+        self.settings.filters = filters
+        self._config_changed()
+        self.routing = self.routing.replace(filters=filters)
+
+    def update_notifications(self, notifications: NotificationConfig):
+        """Replace the notification configuration and recompile its message template.
+
+        Raises:
+            ValueError: The message template is invalid; nothing is changed
+        """
+        routing = self.routing.replace(notifications=notifications)
+        self.settings.notifications = notifications
+        self._config_changed()
+        self.routing = routing
+
+    def update_rules(self, rules: List[RoutingRule]):
+        """Replace the routing rules and recompile the routing index.
+
+        Raises:
+            ValueError: A rule's message template is invalid; nothing is changed
+        """
+        routing = self.routing.replace(rules=rules)
+        self.settings.rules = rules
+        self._config_changed()
+        self.routing = routing
+
+    def update_channels(self, channel_ids: List[int]):
+        """Replace the monitored channels, resolving only those not already resolved."""
+        wanted = set(channel_ids)
+        self._set_channels(channel_ids,
+                           added=[c for c in channel_ids if c not in self.target_channels],
+                           removed=[c for c in self.target_channels if c not in wanted])
+
+    def patch_channels(self, add: Iterable[int], remove: Iterable[int]) -> Tuple[List[int], List[int]]:
+        """Add and remove monitored channels, resolving only the added ones.
+
+        Returns the channels actually added and removed; IDs already in the
+        requested state are left alone.
+        """
+        channel_ids, added, removed = _patch_ids(self.settings.channel_ids, add, remove)
+        if added or removed:
+            self._set_channels(channel_ids, added, removed)
+        return added, removed
+
+    def _set_channels(self, channel_ids: List[int], added: List[int], removed: List[int]):
+        self.settings.channel_ids = channel_ids
+        self._config_changed()
+        channels = dict(self.target_channels)
+        for channel_id in removed:
+            channels.pop(channel_id, None)
+        missing = []
+        for channel_id in added:
+            channel = self.get_channel(channel_id)
+            if channel:
+                channels[channel_id] = channel
+            else:
+                missing.append(channel_id)
+        if missing:
+            shown = ", ".join(map(str, missing[:10]))
+            more = f" and {len(missing) - 10} more" if len(missing) > 10 else ""
+            print(f"Warning: Could not find channels with IDs {shown}{more}")
+        # Swap rather than mutate so readers never see a half-built mapping
+        self.target_channels = channels
+        self.routing = self.routing.replace(channel_ids=channels)
+        self.publish_status()
+
+    def update_users(self, user_ids: List[int]):
+        """Replace the monitored user IDs."""
+        self.settings.target_user_ids = user_ids
+        self._config_changed()
+        self.routing = self.routing.replace(user_ids=user_ids)
+
+    def patch_users(self, add: Iterable[int], remove: Iterable[int]) -> Tuple[List[int], List[int]]:
+        """Add and remove monitored user IDs; returns those actually added and removed."""
+        user_ids, added, removed = _patch_ids(self.settings.target_user_ids, add, remove)
+        if added or removed:
+            self.settings.target_user_ids = user_ids
+            self._config_changed()
+            self.routing = self.routing.replace(user_ids=user_ids)
+        return added, removed
+
+    def _resolve_channels(self):
+        """Look up every configured channel in the client's cache and route to those found."""
+        channels: Dict[int, discord.TextChannel] = {}
+        for channel_id in self.settings.channel_ids:
+            channel = self.get_channel(channel_id)
+            if channel:
+                channels[channel_id] = channel
+            else:
+                print(f"Warning: Could not find channel with ID {channel_id}")
+        # Swap rather than mutate so readers never see a half-built mapping
+        self.target_channels = channels
+        self.routing = self.routing.replace(channel_ids=channels)
+
+    async def start_services(self):
+        """Start the notification, cache and storage services."""
+        if self._services_started:
+            return
+        self._services_started = True
+        if self.store:
+            await self.store.start()
+            # Reload the newest stored messages and continue their numbering
+            last_id = await self.store.last_id()
+            recent = await self.store.query(limit=self.history.capacity)
+            self.history.restore(recent, last_id + 1)
+        await self.notifier.start()
+        self.dispatcher.start()
+        # Resend anything a previous run left undelivered
+        await self.outbox.start()
+
+    async def stop_services(self):
+        """Drain pending notifications and shut the services down."""
+        if not self._services_started:
+            return
+        self._services_started = False
+        await self.scheduler.stop()
+        await self.dispatcher.stop()
+        await self.outbox.stop()
+        await self.notifier.close()
+        if self.image_cache:
+            self.image_cache.clear()
+        if self.config_store:
+            await self.config_store.flush()
+        if self.store:
+            await self.store.stop()
+
+    async def run_gateway(self):
+        """Connect to Discord and process events until the connection closes."""
+        await super().start(self.settings.discord_token)
+
+    async def close_gateway(self):
+        """Close the Discord connection without stopping the services."""
+        self.connected = False
+        if self._backfill_task is not None:
+            self._backfill_task.cancel()
+            self._backfill_task = None
+        await super().close()
+
+    def reset_gateway(self):
+        """Replace the closed Discord client state with a fresh one, ready to log in again.
+
+        A closed ``discord.Client`` can't be reused: closing also closes its
+        HTTP session and connector. This builds a new HTTP client, connection
+        state and ready event with the original options, while the monitor's
+        own history, services and configuration carry over.
+        """
+        discord.Client.__init__(self, **self._client_options)
 
     async def start(self):
         """Start the Discord client."""
-        await super().start(self.settings.discord_token)
+        await self.start_services()
+        await self.run_gateway()
+
+    async def close(self):
+        """Close the Discord connection, drain pending notifications and close the session."""
+        await self.close_gateway()
+        await self.stop_services()
 
     async def on_ready(self):
         """Handler for when the client successfully connects to Discord."""
         print(f'Connected as {self.user} (ID: {self.user.id})')
         
         # Initialize monitoring for all configured channels
-        for channel_id in self.settings.channel_ids:
-            channel = self.get_channel(channel_id)
-            if channel:
-                self.target_channels[channel_id] = channel
-                print(f"Monitoring channel: {channel.guild.name} - #{channel.name}")
-            else:
-                print(f"Warning: Could not find channel with ID {channel_id}")
+        self._resolve_channels()
+        for channel in self.target_channels.values():
+            print(f"Monitoring channel: {channel.guild.name} - #{channel.name}")
 
         if not self.target_channels:
             print("Error: Could not find any of the specified channels")
@@ -51,6 +424,7 @@ class DiscordMonitor(discord.Client):
         print(f"Filtering messages from user IDs: {', '.join(map(str, self.settings.target_user_ids))}")
         print("Waiting for messages...")
         self.connected = True
+        self.publish_status()
 
         # Send startup notification
         channels_str = ", ".join(f"{channel.guild.name} - #{channel.name}" 
@@ -59,117 +433,323 @@ class DiscordMonitor(discord.Client):
             f"Discord monitor started successfully!\nMonitoring channels: {channels_str}",
             title="Discord Monitor"
         )
+        self._start_backfill()
 
-    def _check_filters(self, message: discord.Message) -> bool:
-        """Check if message matches current filter configuration."""
-        filters = self.settings.filters
-        
-        if not filters.enabled:
-            return True
-            
-        # Check keywords
-        if filters.keywords and any(keyword.lower() in message.content.lower() 
-                                  for keyword in filters.keywords):
-            return True
-            
-        # Check link patterns
-        if filters.link_patterns and any(pattern in word 
-                                       for pattern in filters.link_patterns 
-                                       for word in message.content.split()):
-            return True
-            
-        # Check attachments
-        if message.attachments and filters.image_types:
-            if any(any(attachment.filename.lower().endswith(f".{ext}") 
-                      for ext in filters.image_types)
-                  for attachment in message.attachments):
-                return True
-                
-        # Check embeds
-        if message.embeds and (filters.link_patterns or filters.image_types):
-            return True
-            
-        return False
+    def _start_backfill(self):
+        """Fetch what was missed while disconnected, in the background."""
+        if not self.backfill.enabled:
+            return
+        # A newer connection supersedes a backfill still running; the next one covers its gap
+        if self._backfill_task is not None:
+            self._backfill_task.cancel()
+        self._backfill_task = asyncio.create_task(self._run_backfill(), name="discord-backfill")
+
+    async def _run_backfill(self):
+        """Run missed messages through the normal pipeline, oldest first."""
+        try:
+            messages = await self.backfill.fetch(list(self.target_channels.values()))
+            for message in messages:
+                # Keyed by message ID: skip anything that also arrived live
+                if self.tracker.get(message.id) is None:
+                    await self._process_message(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error backfilling missed messages: {e}")
+
+    def _check_filters(self, message: discord.Message, route: Route) -> bool:
+        """Check if message matches the filters of its route."""
+        start = time.perf_counter()
+        matched = route.filters.matches(
+            message.content,
+            [a.filename for a in message.attachments],
+            bool(message.embeds)
+        )
+        metrics.FILTER_SECONDS.observe(time.perf_counter() - start)
+        if matched:
+            metrics.MESSAGES_MATCHED.inc()
+        else:
+            metrics.MESSAGES_FILTERED.inc()
+        return matched
 
     async def _send_notification(self, message: str, title: Optional[str] = None, 
-                               image_urls: Optional[List[str]] = None):
-        """Send notification using current notification configuration."""
-        config = self.settings.notifications
-        await send_pushover_notification(
+                               image_urls: Optional[List[str]] = None,
+                               notifications: Optional[NotificationConfig] = None):
+        """Queue a notification using the given or else the global notification configuration."""
+        config = notifications or self.settings.notifications
+        await self.scheduler.submit(DispatchItem(
             message=message,
             title=title,
             priority=config.priority,
             sound=config.sound,
-            image_urls=image_urls,
-            user_key=self.settings.pushover_user_key,
-            api_token=self.settings.pushover_api_token
-        )
+            retry=config.retry,
+            expire=config.expire,
+            image_urls=image_urls
+        ))
+
+    async def _enqueue_notification(self, item: DispatchItem):
+        """Record a notification in the outbox and queue it for delivery."""
+        await self.outbox.add(item)
+        await self.dispatcher.submit(item)
+
+    async def _deliver_notification(self, item: DispatchItem):
+        """Deliver a queued notification through Pushover, scheduling a retry on failure."""
+        try:
+            await self.notifier.send(
+                message=item.message,
+                title=item.title,
+                priority=item.priority,
+                sound=item.sound,
+                image_urls=item.image_urls,
+                retry=item.retry,
+                expire=item.expire
+            )
+        except Exception as e:
+            self.outbox.failed(item, e)
+            raise
+        self.outbox.delivered(item)
 
     async def on_message(self, message: discord.Message):
         """Handler for new messages in any visible channel."""
+        if self.profiler.enabled and self.profiler.start():
+            try:
+                await self._process_message(message)
+            finally:
+                self.profiler.stop()
+        else:
+            await self._process_message(message)
+
+    async def _process_message(self, message: discord.Message):
+        """Record and notify about a message if it is monitored and passes the filters."""
+        # Read the routing state once; config updates swap in a new snapshot
+        routing = self.routing
         try:
-            # Verify message is from monitored channel and user
-            if (message.channel.id in self.target_channels and 
-                message.author.id in self.settings.target_user_ids):
+            channel_id = message.channel.id
+            if channel_id in routing.channel_ids:
+                self.backfill.seen(channel_id, message.id)
+
+            # Verify message is from monitored channel and user, and find its rule
+            route = routing.route(channel_id, message.author.id)
+            if route is not None:
+                metrics.MESSAGES_RECEIVED.inc()
                 
                 # Apply filters
-                if not self._check_filters(message):
-                    return
-                
-                # Process message
-                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                user_identifier = f"{message.author.display_name} (@{message.author.name})"
-                channel_identifier = f"{message.guild.name} - #{message.channel.name}"
-                
-                # Store message in history
-                message_data = {
-                    "timestamp": timestamp,
-                    "channel": channel_identifier,
-                    "author": user_identifier,
-                    "content": message.content,
-                    "attachments": [a.url for a in message.attachments],
-                    "embeds": [{"title": e.title, "description": e.description} 
-                              for e in message.embeds]
-                }
-                self._add_to_history(message_data)
-                
-                # Build notification
-                push_msg = f"{user_identifier}: {message.content}"
-                image_urls = []
-                
-                # Process attachments
-                for attachment in message.attachments:
-                    if any(attachment.filename.lower().endswith(ext) 
-                          for ext in self.settings.filters.image_types):
-                        image_urls.append(attachment.url)
-                    else:
-                        push_msg += f"\n📎 {attachment.url}"
-                
-                # Process embeds
-                for embed in message.embeds:
-                    if embed.title:
-                        embed_text = f"\n📌 {embed.title}"
-                        if embed.description:
-                            embed_text += f": {embed.description}"
-                        push_msg += embed_text
-                        
-                    if embed.image:
-                        image_urls.append(embed.image.url)
-                
-                # Send notification
-                await self._send_notification(
-                    push_msg,
-                    title=f"Discord: {channel_identifier}",
-                    image_urls=image_urls if image_urls else None
+                matched = self._check_filters(message, route)
+
+                # Remember the message, matched or not, so a later edit can be checked
+                entry = TrackedMessage(
+                    message.id,
+                    message.channel.id,
+                    message.author.id,
+                    channel=f"{message.guild.name} - #{message.channel.name}",
+                    author=f"{message.author.display_name} (@{message.author.name})",
+                    content=message.content,
+                    attachments=attachments_of(message),
+                    embeds=embeds_of(message),
+                    matched=matched
                 )
+                self.tracker.track(entry)
+                if matched:
+                    await self._notify_tracked(entry, route)
         
         except Exception as e:
+            metrics.MESSAGES_FAILED.inc()
             print(f"Error processing message: {e}")
             await self._send_notification(
                 f"Error processing message: {e}",
                 title="Discord Monitor Error"
             )
 
+    @staticmethod
+    def _record_fields(entry: TrackedMessage) -> Dict:
+        """The history fields that an edit can change."""
+        return {
+            "content": entry.content,
+            "attachments": [url for _, url, _ in entry.attachments],
+            "embeds": [{"title": title, "description": description}
+                       for title, description, _ in entry.embeds]
+        }
+
+    async def _notify_tracked(self, entry: TrackedMessage, route: Route):
+        """Record a matched message and send its notification."""
+        image_urls = []
+        image_keys = []
+        files = []
+
+        # Process attachments
+        for filename, url, _ in entry.attachments:
+            image_keys.append(image_key(url))
+            if route.filters.is_image(filename):
+                image_urls.append(url)
+            else:
+                files.append(url)
+
+        # Process embeds
+        for _, _, image_url in entry.embeds:
+            if image_url:
+                image_urls.append(image_url)
+                image_keys.append(image_key(image_url))
+
+        await self._handle_match(
+            record={
+                "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "channel_id": entry.channel_id,
+                "channel": entry.channel,
+                "author_id": entry.author_id,
+                "author": entry.author,
+                "message_id": entry.message_id,
+                **self._record_fields(entry)
+            },
+            message=route.template.message(entry.author, entry.channel, entry.content,
+                                           files, entry.embeds),
+            title=route.template.title(entry.author, entry.channel, entry.content),
+            image_urls=image_urls if image_urls else None,
+            notifications=route.notifications,
+            image_keys=image_keys
+        )
+
+    async def _handle_match(self, record: Dict, message: str, title: str,
+                            image_urls: Optional[List[str]], notifications: Optional[NotificationConfig],
+                            image_keys: List[str]):
+        """Record a matched message and notify about it, unless it duplicates a recent one.
+
+        A duplicate is still recorded in history, marked as merged into the
+        message it repeats, but sends no notification.
+        """
+        fingerprint = None
+        if self.dedup is not None:
+            fingerprint = self.dedup.fingerprint(record["content"], image_keys)
+            original = self.dedup.find(fingerprint)
+            if original is not None:
+                metrics.DUPLICATES_SUPPRESSED.inc()
+                self.record_message(**record, merged_into=original)
+                # Later copies are caught for a full window after this one
+                self.dedup.add(fingerprint, original)
+                return
+
+        stored = self.record_message(**record)
+        if fingerprint is not None:
+            self.dedup.add(fingerprint, stored.seq)
+        await self._send_notification(message, title=title, image_urls=image_urls,
+                                      notifications=notifications)
+
+    def _track_payload(self, payload: discord.RawMessageUpdateEvent) -> Optional[TrackedMessage]:
+        """Start tracking a message first seen in an edit, if it is monitored.
+
+        Only full payloads name the author, so partial updates to messages
+        that are no longer tracked are ignored.
+        """
+        data = payload.data
+        author = data.get("author")
+        if author is None or "content" not in data:
+            return None
+        author_id = int(author["id"])
+        if not self.routing.routes(payload.channel_id, author_id):
+            return None
+        channel = self.get_channel(payload.channel_id)
+        name = author.get("username", "")
+        display_name = (data.get("member") or {}).get("nick") or author.get("global_name") or name
+        entry = TrackedMessage(
+            payload.message_id,
+            payload.channel_id,
+            author_id,
+            channel=f"{channel.guild.name} - #{channel.name}" if channel else str(payload.channel_id),
+            author=f"{display_name} (@{name})",
+            content="",
+            attachments=(),
+            embeds=(),
+            matched=self._was_matched(payload.message_id)
+        )
+        self.tracker.track(entry)
+        return entry
+
+    def _was_matched(self, message_id: int) -> bool:
+        """Whether a message no longer tracked was matched, e.g. before a restart."""
+        return self.history.find_message(message_id) is not None
+
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        """Handler for edited messages, including Discord adding link embeds.
+
+        Only the changed parts are filtered again. A message that starts
+        matching is notified as if new. For one that already matched, the
+        history entry is updated in place, and a follow-up is sent only if
+        the edit added attachments or images. A message first seen in this
+        edit (after a restart or once it left the tracker) has no earlier
+        state to compare with, so it gets no follow-up.
+        """
+        routing = self.routing
+        try:
+            entry = self.tracker.get(payload.message_id)
+            first_seen = entry is None
+            if first_seen:
+                entry = self._track_payload(payload)
+            if entry is None:
+                return
+            route = routing.route(entry.channel_id, entry.author_id)
+            if route is None:
+                return
+            was_matched = entry.matched
+            previous = entry.image_keys()
+            changed = entry.apply(payload.data)
+            if not changed:
+                return
+            metrics.MESSAGES_EDITED.inc()
+            matched = entry.evaluate(route.filters, changed)
+
+            if matched and not was_matched:
+                await self._notify_tracked(entry, route)
+                return
+            if not was_matched:
+                return
+            self.update_record(entry.message_id, edited_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                               **self._record_fields(entry))
+            if matched and not first_seen and changed & {"attachments", "embeds"}:
+                await self._send_followup(entry, route, previous)
+
+        except Exception as e:
+            metrics.MESSAGES_FAILED.inc()
+            print(f"Error processing message edit: {e}")
+
+    async def _send_followup(self, entry: TrackedMessage, route: Route, previous: frozenset):
+        """Notify about attachments and images an edit added to a matched message."""
+        image_urls = []
+        files = []
+        for filename, url, _ in entry.attachments:
+            if image_key(url) in previous:
+                continue
+            if route.filters.is_image(filename):
+                image_urls.append(url)
+            else:
+                files.append(url)
+        for _, _, image_url in entry.embeds:
+            if image_url and image_key(image_url) not in previous:
+                image_urls.append(image_url)
+        if not image_urls and not files:
+            return  # Only removed or re-signed, nothing new to show
+        metrics.EDIT_FOLLOWUPS.inc()
+        await self._send_notification(
+            route.template.message(f"✏️ {entry.author} edited", entry.channel, entry.content, files),
+            title=route.template.title(entry.author, entry.channel, entry.content),
+            image_urls=image_urls if image_urls else None,
+            notifications=route.notifications
+        )
+
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        """Handler for deleted messages; marks their history entry as deleted."""
+        self._mark_deleted(payload.message_id, payload.channel_id)
+
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        """Handler for messages deleted in bulk by a moderator."""
+        for message_id in payload.message_ids:
+            self._mark_deleted(message_id, payload.channel_id)
+
+    def _mark_deleted(self, message_id: int, channel_id: int):
+        entry = self.tracker.forget(message_id)
+        if entry is None and channel_id not in self.routing.channel_ids:
+            return
+        metrics.MESSAGES_DELETED.inc()
+        self.update_record(message_id, deleted=True)
+
     async def on_error(self, event, *args, **kwargs):
         """Handler for client errors."""
         error_msg = f"Error in {event}: {args[0]}"
@@ -179,9 +759,17 @@ class DiscordMonitor(discord.Client):
             title="Discord Monitor Error"
         )
 
+    async def on_resumed(self):
+        """Handler for a gateway session resuming after a disconnect."""
+        self.connected = True
+        self.publish_status()
+        # Discord replays missed events on resume; this only fetches what it didn't
+        self._start_backfill()
+
     async def on_disconnect(self):
         """Handler for Discord disconnection events."""
         self.connected = False
+        self.publish_status()
         disconnect_msg = "Disconnected from Discord. Attempting to reconnect..."
         print(disconnect_msg)
         await self._send_notification(
@@ -0,0 +1,132 @@
+import re
+from typing import Dict, FrozenSet, Iterable, Optional, Pattern, Sequence
+from ..models.config import FilterConfig
+
+
+def _trie_pattern(words: Iterable[str]) -> Optional[str]:
+    """Build a prefix-factored regex alternation from a set of literal words.
+
+    Sharing prefixes keeps the regex engine from re-trying every word at each
+    position, so a scan stays close to linear even with thousands of words.
+    The pattern is only used to find whether any word occurs, so words that
+    extend a shorter word are left out: any text containing them contains
+    the shorter one too. The trie is walked with an explicit stack, since
+    it is as deep as the longest word and a recursive walk would hit the
+    recursion limit.
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+    if not trie:
+        return None
+
+    # Post-order: a node's pattern is built once all of its children's are
+    built: Dict[int, str] = {}
+    stack = [(trie, False)]
+    while stack:
+        node, children_built = stack.pop()
+        if not children_built:
+            stack.append((node, True))
+            stack.extend((child, False) for char, child in node.items() if char)
+            continue
+        branches = [re.escape(char) + built.pop(id(child))
+                    for char, child in sorted(node.items()) if char]
+        if "" in node or not branches:
+            pattern = ""  # A word ends here
+        elif len(branches) == 1:
+            pattern = branches[0]
+        else:
+            pattern = "(?:" + "|".join(branches) + ")"
+        built[id(node)] = pattern
+    return built[id(trie)]
+
+
+def _compile_words(words: Iterable[str]) -> Pattern:
+    """A regex finding any of ``words`` in a text."""
+    words = list(words)
+    try:
+        return re.compile(_trie_pattern(words))
+    except RecursionError:
+        # The regex parser recurses into each group; thousands of words
+        # branching off one long chain nest too deep for it. A flat
+        # alternation has no nesting, at the cost of scanning more slowly.
+        return re.compile("|".join(re.escape(w) for w in sorted(words, key=len, reverse=True)))
+
+
+class CompiledFilter:
+    """A FilterConfig compiled once into prebuilt matchers.
+
+    Keywords and link patterns are folded into one regex each, and image
+    types into a set of extensions, so every message is scanned in a single
+    pass instead of once per configured entry.
+    """
+
+    __slots__ = ("config", "enabled", "_keywords", "_links", "_match_any_word",
+                 "_image_types", "_image_suffixes", "_has_embed_rules")
+
+    def __init__(self, config: FilterConfig):
+        self.config = config
+        self.enabled = config.enabled
+
+        keywords = {k.lower() for k in config.keywords}
+        # An empty keyword is a substring of everything
+        self._keywords: Optional[Pattern] = None
+        if "" in keywords:
+            self._keywords = re.compile("")
+        elif keywords:
+            self._keywords = _compile_words(keywords)
+
+        # Link patterns are matched against whitespace-separated words, so a
+        # pattern containing whitespace can never match and is dropped.
+        links = {p for p in config.link_patterns if not any(c.isspace() for c in p)}
+        self._match_any_word = "" in links
+        links.discard("")
+        self._links: Optional[Pattern] = _compile_words(links) if links else None
+
+        extensions = {ext.lower().lstrip(".") for ext in config.image_types}
+        extensions.discard("")
+        self._image_types: FrozenSet[str] = frozenset(e for e in extensions if "." not in e)
+        # Multi-part extensions (e.g. "tar.gz") can't be found by a single split
+        self._image_suffixes = tuple(f".{e}" for e in extensions if "." in e)
+        self._has_embed_rules = bool(config.link_patterns or config.image_types)
+
+    def is_image(self, filename: str) -> bool:
+        """Check whether a filename has one of the configured image extensions."""
+        name = filename.lower()
+        _, dot, ext = name.rpartition(".")
+        if dot and ext in self._image_types:
+            return True
+        return bool(self._image_suffixes) and name.endswith(self._image_suffixes)
+
+    def matches_content(self, content: str) -> bool:
+        """Check message text against the keyword and link pattern matchers."""
+        if self._keywords is not None and self._keywords.search(content.lower()):
+            return True
+        if self._links is not None and self._links.search(content):
+            return True
+        return self._match_any_word and bool(content.split())
+
+    def matches_attachments(self, attachment_names: Sequence[str]) -> bool:
+        """Check whether any attachment is a configured image type."""
+        return any(self.is_image(name) for name in attachment_names)
+
+    def matches_embeds(self, has_embeds: bool) -> bool:
+        """Check whether embeds count as a match under the configured rules."""
+        return has_embeds and self._has_embed_rules
+
+    def matches(self, content: str, attachment_names: Sequence[str] = (),
+                has_embeds: bool = False) -> bool:
+        """Check whether a message passes the compiled filter."""
+        if not self.enabled:
+            return True
+        return (self.matches_content(content)
+                or self.matches_attachments(attachment_names)
+                or self.matches_embeds(has_embeds))
+
+
+def compile_filters(config: FilterConfig) -> CompiledFilter:
+    """Compile a filter configuration into a reusable matcher."""
+    return CompiledFilter(config)
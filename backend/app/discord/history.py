@@ -0,0 +1,269 @@
+import hashlib
+import os
+from collections import deque
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+import orjson
+
+PAGE_CACHE_SIZE = 64  # Distinct queries cached per history version
+
+
+class HistoryRecord:
+    """A matched message as stored in the dashboard history."""
+
+    __slots__ = ("seq", "timestamp", "channel_id", "channel", "author_id", "author",
+                 "content", "attachments", "embeds", "merged_into", "message_id", "edited_at",
+                 "deleted", "_json")
+
+    def __init__(self, seq: int, timestamp: str, channel_id: int, channel: str,
+                 author_id: int, author: str, content: str,
+                 attachments: List[str], embeds: List[Dict], merged_into: Optional[int] = None,
+                 message_id: Optional[int] = None, edited_at: Optional[str] = None,
+                 deleted: bool = False):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.channel_id = channel_id
+        self.channel = channel
+        self.author_id = author_id
+        self.author = author
+        self.content = content
+        self.attachments = attachments
+        self.embeds = embeds
+        self.merged_into = merged_into  # Seq of the message this one duplicated
+        self.message_id = message_id  # Discord message ID, for applying edits and deletes
+        self.edited_at = edited_at
+        self.deleted = deleted
+        self._json: Optional[bytes] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.seq,
+            "timestamp": self.timestamp,
+            "channel_id": self.channel_id,
+            "channel": self.channel,
+            "author_id": self.author_id,
+            "author": self.author,
+            "content": self.content,
+            "attachments": self.attachments,
+            "embeds": self.embeds,
+            "merged_into": self.merged_into,
+            "message_id": self.message_id,
+            "edited_at": self.edited_at,
+            "deleted": self.deleted
+        }
+
+    @property
+    def json(self) -> bytes:
+        """The record serialized as JSON, encoded once and then reused."""
+        if self._json is None:
+            self._json = orjson.dumps(self.to_dict())
+        return self._json
+
+
+def serialize(records: Iterable[HistoryRecord]) -> bytes:
+    """A JSON array of records, joined from their cached encodings."""
+    return b"[" + b",".join(record.json for record in records) + b"]"
+
+
+class Page:
+    """A serialized query result with its entity tag.
+
+    ``encoded`` caches compressed bodies by content coding, so each page
+    is compressed at most once per coding.
+    """
+
+    __slots__ = ("etag", "body", "encoded")
+
+    def __init__(self, etag: str, body: bytes):
+        self.etag = etag
+        self.body = body
+        self.encoded: Dict[str, bytes] = {}
+
+    @classmethod
+    def of(cls, body: bytes) -> "Page":
+        """A page whose entity tag is a hash of its body."""
+        return cls(f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"', body)
+
+
+class MessageHistory:
+    """Fixed-capacity ring buffer of history records.
+
+    Every record gets a monotonically increasing sequence number that
+    clients use as a cursor. Per-channel and per-author indexes hold the
+    sequence numbers of live records, oldest first, so filtered queries
+    only touch matching rows.
+
+    Serialized query results are cached until the history changes, so
+    repeated polls between messages reuse the same bytes and entity tag.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        if capacity < 1:
+            raise ValueError("history capacity must be at least 1")
+        self.capacity = capacity
+        self._slots: List[Optional[HistoryRecord]] = [None] * capacity
+        self._base_seq = 1  # Sequence number of the first record ever stored
+        self._next_seq = 1
+        self._by_channel: Dict[int, Deque[int]] = {}
+        self._by_author: Dict[int, Deque[int]] = {}
+        self._by_message: Dict[int, int] = {}  # Discord message ID -> seq of live records
+        self.version = 0  # Bumped on every change
+        # Distinguishes entity tags from those of an earlier process
+        self._epoch = os.urandom(4).hex()
+        self._pages: Dict[Tuple, Page] = {}
+        self._pages_version = 0
+
+    def __len__(self) -> int:
+        return min(self._next_seq - self._base_seq, self.capacity)
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest record still held."""
+        return max(self._base_seq, self._next_seq - self.capacity)
+
+    @property
+    def last_seq(self) -> int:
+        """Sequence number of the newest record, or 0 when empty."""
+        return self._next_seq - 1
+
+    def append(self, timestamp: str, channel_id: int, channel: str, author_id: int,
+               author: str, content: str, attachments: List[str],
+               embeds: List[Dict], merged_into: Optional[int] = None,
+               message_id: Optional[int] = None) -> HistoryRecord:
+        """Store a new record, overwriting the oldest once full."""
+        record = HistoryRecord(self._next_seq, timestamp, channel_id, channel, author_id,
+                               author, content, attachments, embeds, merged_into, message_id)
+        self._insert(record)
+        return record
+
+    def restore(self, records: Iterable[HistoryRecord], next_seq: int):
+        """Reload persisted records into an empty history.
+
+        ``records`` must be in sequence order. Only the newest run of
+        consecutive sequence numbers is kept, and numbering continues from
+        ``next_seq``.
+        """
+        if len(self):
+            raise RuntimeError("history can only be restored while empty")
+        run: List[HistoryRecord] = []
+        for record in records:
+            if run and record.seq != run[-1].seq + 1:
+                run = []
+            run.append(record)
+        if run and run[-1].seq + 1 == next_seq:
+            run = run[-self.capacity:]
+            self._base_seq = run[0].seq
+            for record in run:
+                self._insert(record)
+        else:
+            self._base_seq = self._next_seq = next_seq
+
+    def _insert(self, record: HistoryRecord):
+        self.version += 1
+        seq = record.seq
+        self._next_seq = seq + 1
+        slot = seq % self.capacity
+
+        evicted = self._slots[slot]
+        if evicted is not None:
+            # The evicted record is always the oldest entry of its indexes
+            self._unindex(self._by_channel, evicted.channel_id)
+            self._unindex(self._by_author, evicted.author_id)
+            if self._by_message.get(evicted.message_id) == evicted.seq:
+                del self._by_message[evicted.message_id]
+
+        self._slots[slot] = record
+        self._by_channel.setdefault(record.channel_id, deque()).append(seq)
+        self._by_author.setdefault(record.author_id, deque()).append(seq)
+        if record.message_id is not None:
+            self._by_message[record.message_id] = seq
+
+    @staticmethod
+    def _unindex(index: Dict[int, Deque[int]], key: int):
+        seqs = index[key]
+        seqs.popleft()
+        if not seqs:
+            del index[key]
+
+    def get(self, seq: int) -> Optional[HistoryRecord]:
+        """Look up a live record by sequence number."""
+        if seq < self.first_seq or seq > self.last_seq:
+            return None
+        return self._slots[seq % self.capacity]
+
+    def find_message(self, message_id: int) -> Optional[HistoryRecord]:
+        """The live record of a Discord message, if it is still held."""
+        seq = self._by_message.get(message_id)
+        return self.get(seq) if seq is not None else None
+
+    def update(self, record: HistoryRecord, **fields):
+        """Change fields of a live record in place.
+
+        Channel and author are indexed and can't be changed.
+        """
+        if fields.keys() & {"seq", "channel_id", "author_id", "message_id"}:
+            raise ValueError("indexed record fields can't be updated")
+        for name, value in fields.items():
+            setattr(record, name, value)
+        record._json = None
+        self.version += 1
+
+    def _newest_first(self, channel: Optional[int], author: Optional[int]) -> Iterator[int]:
+        if channel is not None and author is not None:
+            by_channel = self._by_channel.get(channel, ())
+            by_author = self._by_author.get(author, ())
+            # Walk the shorter index and check the other field on the record
+            if len(by_channel) <= len(by_author):
+                return (s for s in reversed(by_channel) if self.get(s).author_id == author)
+            return (s for s in reversed(by_author) if self.get(s).channel_id == channel)
+        if channel is not None:
+            return reversed(self._by_channel.get(channel, ()))
+        if author is not None:
+            return reversed(self._by_author.get(author, ()))
+        return iter(range(self.last_seq, self.first_seq - 1, -1))
+
+    def query(self, since: Optional[int] = None, channel: Optional[int] = None,
+              author: Optional[int] = None, limit: int = 100) -> List[HistoryRecord]:
+        """Return matching records in chronological order.
+
+        Without ``since`` the newest ``limit`` matches are returned. With
+        ``since`` the oldest ``limit`` matches after that sequence number are
+        returned, so a client can page forward from its last seen ``id``.
+        """
+        if len(self) == 0 or limit < 1:
+            return []
+        seqs = self._newest_first(channel, author)
+        if since is None:
+            newest = []
+            for seq in seqs:
+                newest.append(seq)
+                if len(newest) >= limit:
+                    break
+            selected: Iterable[int] = reversed(newest)
+        else:
+            newer = []
+            for seq in seqs:
+                if seq <= since:
+                    break
+                newer.append(seq)
+            selected = reversed(newer[-limit:])
+        return [self._slots[seq % self.capacity] for seq in selected]
+
+    def page(self, since: Optional[int] = None, channel: Optional[int] = None,
+             author: Optional[int] = None, limit: int = 100) -> Page:
+        """``query`` serialized to JSON, cached until the history changes."""
+        if self._pages_version != self.version:
+            self._pages.clear()
+            self._pages_version = self.version
+        key = (since, channel, author, limit)
+        page = self._pages.get(key)
+        if page is None:
+            if len(self._pages) >= PAGE_CACHE_SIZE:
+                self._pages.clear()
+            body = serialize(self.query(since=since, channel=channel, author=author, limit=limit))
+            # A query's result only changes with the version, so that tags it
+            page = self._pages[key] = Page(f'"{self._epoch}-{self.version}"', body)
+        return page
+
+    def __iter__(self) -> Iterator[HistoryRecord]:
+        for seq in range(self.first_seq, self._next_seq):
+            yield self._slots[seq % self.capacity]
@@ -0,0 +1,447 @@
+import asyncio
+import multiprocessing
+import signal
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from ..models.config import Settings, FilterConfig, NotificationConfig, RoutingRule, WorkerConfig
+from ..services import metrics
+from .client import DiscordMonitor, _patch_ids
+from .supervisor import MonitorSupervisor
+
+# Messages sent from workers to the supervisor over the shared queue are
+# (kind, worker_id, data) tuples; kind is "match", "update", "notify", "health"
+# or "metrics". Commands sent to a worker are (kind, data) tuples on its own queue.
+
+
+class WorkerMonitor(DiscordMonitor):
+    """Monitor running inside a worker process.
+
+    Matching happens locally; matched messages, notifications and health
+    reports are forwarded to the supervisor process, which owns history,
+    storage, duplicate suppression and delivery. Metrics recorded here are
+    forwarded as changes since the last report.
+
+    History lives in the supervisor, so the IDs of messages matched here
+    are kept locally, as many as history holds, to tell whether an edited
+    message that is no longer tracked was matched. The supervisor seeds
+    them from its history when the worker starts.
+    """
+
+    def __init__(self, settings: Settings, worker_id: int, outbox, **options):
+        super().__init__(settings, **options)
+        self.worker_id = worker_id
+        self._outbox = outbox
+        self._matched: Dict[int, None] = {}  # Insertion ordered, oldest first
+        self._metrics = metrics.REGISTRY.snapshot()
+
+    def remember_matched(self, message_ids: Iterable[int]):
+        for message_id in message_ids:
+            self._matched[message_id] = None
+        while len(self._matched) > self.settings.history_size:
+            del self._matched[next(iter(self._matched))]
+
+    def _was_matched(self, message_id: int) -> bool:
+        return message_id in self._matched
+
+    async def start_services(self):
+        """Delivery and storage run in the supervisor process."""
+
+    async def stop_services(self):
+        """Delivery and storage run in the supervisor process."""
+
+    async def _handle_match(self, **match):
+        """Forward a matched message to the supervisor."""
+        self.remember_matched([match["record"]["message_id"]])
+        self._outbox.put(("match", self.worker_id, match))
+
+    def update_record(self, message_id: int, **fields):
+        """Forward an edit or delete of a message to the supervisor."""
+        self._outbox.put(("update", self.worker_id, {"message_id": message_id, **fields}))
+
+    async def _send_notification(self, message: str, title: Optional[str] = None,
+                               image_urls: Optional[List[str]] = None,
+                               notifications: Optional[NotificationConfig] = None):
+        """Forward a notification to the supervisor's delivery queue."""
+        self._outbox.put(("notify", self.worker_id,
+                          {"message": message, "title": title, "image_urls": image_urls,
+                           "notifications": notifications}))
+
+    def publish_status(self):
+        """Report this worker's health to the supervisor."""
+        self._outbox.put(("health", self.worker_id, {
+            "connected": self.connected,
+            "readiness": self.supervisor.readiness() if self.supervisor else None,
+            "channels": [
+                {"id": channel_id, "name": f"{channel.guild.name} - #{channel.name}"}
+                for channel_id, channel in self.target_channels.items()
+            ]
+        }))
+
+    def publish_metrics(self):
+        """Send the supervisor what was recorded since the last report."""
+        snapshot = metrics.REGISTRY.snapshot()
+        changes = metrics.changes(snapshot, self._metrics)
+        self._metrics = snapshot
+        if changes:
+            self._outbox.put(("metrics", self.worker_id, changes))
+
+
+def run_worker(worker_id: int, settings_data: Dict, worker_data: Dict, outbox, inbox):
+    """Process entry point for one monitor worker."""
+    # The supervisor asks workers to stop; don't die on the terminal's Ctrl+C
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    sys.exit(asyncio.run(_worker_main(worker_id, settings_data, worker_data, outbox, inbox)))
+
+
+async def _worker_main(worker_id: int, settings_data: Dict, worker_data: Dict, outbox, inbox) -> int:
+    """Run the worker until told to stop (exit code 0) or until its monitor stops by itself (1).
+
+    A monitor stops by itself on an invalid token or when none of its
+    channels are found. The process exits then, so the supervisor process
+    sees it, reports it and restarts it with backoff.
+    """
+    worker = WorkerConfig(**worker_data)
+    settings = Settings(**settings_data)
+    settings.discord_token = worker.discord_token
+    if worker.channel_ids:
+        settings.channel_ids = worker.channel_ids
+    settings.message_store_path = None
+    settings.config_path = None
+    settings.notification_outbox_path = None
+    settings.image_cache_max_bytes = 0
+    settings.image_processing_workers = 0
+    settings.dedup_window = 0
+
+    options = {}
+    if worker.shard_id is not None:
+        options.update(shard_id=worker.shard_id, shard_count=worker.shard_count)
+    monitor = WorkerMonitor(settings, worker_id, outbox, **options)
+    supervisor = MonitorSupervisor(
+        monitor,
+        max_backoff=settings.reconnect_max_backoff,
+        shutdown_timeout=settings.shutdown_timeout
+    )
+    supervisor.start()
+
+    async def heartbeat():
+        while True:
+            monitor.publish_status()
+            monitor.publish_metrics()
+            await asyncio.sleep(settings.worker_health_interval)
+
+    async def commands():
+        loop = asyncio.get_running_loop()
+        while True:
+            kind, data = await loop.run_in_executor(None, inbox.get)
+            if kind == "stop":
+                return
+            elif kind == "matched":
+                monitor.remember_matched(data)
+            elif kind == "filters":
+                monitor.update_filters(FilterConfig(**data))
+            elif kind == "notifications":
+                monitor.update_notifications(NotificationConfig(**data))
+            elif kind == "users":
+                monitor.update_users(data)
+            elif kind == "rules":
+                monitor.update_rules([RoutingRule(**rule) for rule in data])
+            elif kind == "users_patch":
+                monitor.patch_users(data["add"], data["remove"])
+            elif kind == "channels":
+                # Keep only the channels this account can see
+                monitor.update_channels(data)
+            elif kind == "channels_patch":
+                monitor.patch_channels(data["add"], data["remove"])
+
+    heartbeat_task = asyncio.create_task(heartbeat())
+    command_task = asyncio.create_task(commands())
+    monitor_task = asyncio.create_task(supervisor.wait())
+    exit_code = 0
+    try:
+        await asyncio.wait({command_task, monitor_task}, return_when=asyncio.FIRST_COMPLETED)
+        if not command_task.done():
+            exit_code = 1
+            readiness = supervisor.readiness()
+            print(f"Worker {worker_id} monitor stopped ({readiness['state']}): "
+                  f"{readiness['last_error'] or 'the client closed itself'}")
+            # Last health report, then unblock the command reader so the loop can shut down
+            monitor.publish_status()
+            inbox.put(("stop", None))
+            await command_task
+    finally:
+        heartbeat_task.cancel()
+        monitor_task.cancel()
+        await supervisor.stop()
+        monitor.publish_metrics()
+    return exit_code
+
+
+class ShardedMonitor(DiscordMonitor):
+    """API-facing monitor for supervisor mode.
+
+    It never connects to Discord itself. Worker processes feed it matched
+    messages and notifications, and configuration changes are broadcast to
+    every worker.
+    """
+
+    async def run_gateway(self):
+        """Gateway connections are owned by the worker processes."""
+
+    def status(self) -> Dict:
+        """Status aggregated from every worker's last health report."""
+        status = super().status()
+        if self.supervisor:
+            status["channels"] = self.supervisor.channels()
+        return status
+
+    def update_filters(self, filters: FilterConfig):
+        super().update_filters(filters)
+        self._broadcast("filters", filters.model_dump(mode="json"))
+
+    def update_notifications(self, notifications: NotificationConfig):
+        super().update_notifications(notifications)
+        self._broadcast("notifications", notifications.model_dump(mode="json"))
+
+    def update_users(self, user_ids: List[int]):
+        super().update_users(user_ids)
+        self._broadcast("users", user_ids)
+
+    def update_rules(self, rules: List[RoutingRule]):
+        super().update_rules(rules)
+        self._broadcast("rules", [rule.model_dump(mode="json") for rule in rules])
+
+    def update_channels(self, channel_ids: List[int]):
+        self.settings.channel_ids = channel_ids
+        self._config_changed()
+        self._broadcast("channels", channel_ids)
+
+    def patch_channels(self, add: Iterable[int], remove: Iterable[int]) -> Tuple[List[int], List[int]]:
+        channel_ids, added, removed = _patch_ids(self.settings.channel_ids, add, remove)
+        if added or removed:
+            self.settings.channel_ids = channel_ids
+            self._config_changed()
+            self._broadcast("channels_patch", {"add": added, "remove": removed})
+        return added, removed
+
+    def patch_users(self, add: Iterable[int], remove: Iterable[int]) -> Tuple[List[int], List[int]]:
+        added, removed = super().patch_users(add, remove)
+        if added or removed:
+            self._broadcast("users_patch", {"add": added, "remove": removed})
+        return added, removed
+
+    def _broadcast(self, kind: str, data: Any):
+        if self.supervisor:
+            self.supervisor.broadcast(kind, data)
+
+
+class _Worker:
+    __slots__ = ("id", "config", "process", "inbox", "health", "last_seen",
+                 "restarts", "next_restart")
+
+    def __init__(self, worker_id: int, config: WorkerConfig):
+        self.id = worker_id
+        self.config = config
+        self.process = None
+        self.inbox = None
+        self.health: Dict = {}
+        self.last_seen: Optional[float] = None
+        self.restarts = 0
+        self.next_restart = 0.0
+
+
+class ShardSupervisor:
+    """Run one monitor worker process per configured account or shard.
+
+    Workers share a single queue back to this process, where matches are
+    recorded in history and the store, notifications go through the
+    normal delivery queue and metrics are added to this process's, so
+    /metrics covers every worker. Dead workers are restarted with backoff, and
+    readiness aggregates every worker's health.
+    """
+
+    def __init__(self, client: ShardedMonitor, max_backoff: float = 60.0,
+                 shutdown_timeout: float = 10.0):
+        self.client = client
+        self.settings = client.settings
+        self.max_backoff = max_backoff
+        self.shutdown_timeout = shutdown_timeout
+        self.last_error: Optional[str] = None
+        self._context = multiprocessing.get_context("spawn")
+        self._outbox = self._context.Queue()
+        self._workers = [_Worker(i, config) for i, config in enumerate(self.settings.workers)]
+        self._tasks: List[asyncio.Task] = []
+        self._state = "created"
+        self._stopping = False
+        self._started_at: Optional[float] = None
+        client.supervisor = self
+
+    def start(self):
+        """Start the services, the worker processes and the result pump."""
+        if not self._tasks:
+            self._started_at = time.monotonic()
+            self._tasks.append(asyncio.create_task(self._run(), name="shard-supervisor"))
+
+    async def _run(self):
+        self._state = "starting"
+        try:
+            await self.client.start_services()
+        except Exception as e:
+            self.last_error = f"Service startup failed: {e}"
+            self._state = "failed"
+            print(self.last_error)
+            return
+        for worker in self._workers:
+            self._spawn(worker)
+        self._state = "connecting"
+        self._tasks.append(asyncio.create_task(self._watchdog(), name="shard-watchdog"))
+        await self._pump()
+
+    def _spawn(self, worker: _Worker):
+        worker.inbox = self._context.Queue()
+        # Queued ahead of any command, so edits of earlier matches are recognized
+        worker.inbox.put(("matched", [record.message_id for record in self.client.history
+                                      if record.message_id is not None]))
+        settings_data = self.settings.model_dump(mode="json", exclude={"workers"})
+        worker.process = self._context.Process(
+            target=run_worker,
+            args=(worker.id, settings_data, worker.config.model_dump(mode="json"),
+                  self._outbox, worker.inbox),
+            name=f"discord-worker-{worker.id}",
+            daemon=True
+        )
+        worker.process.start()
+        worker.health = {}
+        print(f"Started Discord worker {worker.id} (pid {worker.process.pid})")
+
+    async def _pump(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await loop.run_in_executor(None, self._outbox.get)
+            if item is None:
+                break
+            kind, worker_id, data = item
+            try:
+                if kind == "match":
+                    await self.client._handle_match(**data)
+                elif kind == "update":
+                    self.client.update_record(**data)
+                elif kind == "notify":
+                    await self.client._send_notification(**data)
+                elif kind == "health":
+                    self._update_health(self._workers[worker_id], data)
+                elif kind == "metrics":
+                    metrics.REGISTRY.merge(data)
+            except Exception as e:
+                print(f"Error handling {kind} from worker {worker_id}: {e}")
+
+    def _update_health(self, worker: _Worker, health: Dict):
+        changed = (health.get("connected") != worker.health.get("connected") or
+                   health.get("channels") != worker.health.get("channels"))
+        worker.health = health
+        worker.last_seen = time.monotonic()
+        self.client.connected = all(w.health.get("connected") for w in self._workers)
+        if changed:
+            self.client.publish_status()
+
+    async def _watchdog(self):
+        while not self._stopping:
+            await asyncio.sleep(self.settings.worker_health_interval)
+            now = time.monotonic()
+            for worker in self._workers:
+                if self._stopping or worker.process.is_alive():
+                    continue
+                if now < worker.next_restart:
+                    continue
+                reason = (worker.health.get("readiness") or {}).get("last_error")
+                self.last_error = f"Worker {worker.id} exited with code {worker.process.exitcode}"
+                if reason:
+                    self.last_error += f" ({reason})"
+                print(f"{self.last_error}; restarting")
+                worker.restarts += 1
+                backoff = min(2 ** worker.restarts, self.max_backoff)
+                worker.next_restart = now + backoff
+                self._spawn(worker)
+                self.client.connected = False
+                self.client.publish_status()
+
+    def broadcast(self, kind: str, data: Any):
+        """Send a configuration command to every worker."""
+        for worker in self._workers:
+            if worker.inbox is not None:
+                worker.inbox.put((kind, data))
+
+    def channels(self) -> List[Dict]:
+        """Channels reported by all workers."""
+        return [channel for worker in self._workers
+                for channel in worker.health.get("channels", [])]
+
+    def _worker_status(self, worker: _Worker, now: float) -> Dict:
+        readiness = worker.health.get("readiness") or {}
+        return {
+            "id": worker.id,
+            "pid": worker.process.pid if worker.process else None,
+            "alive": bool(worker.process and worker.process.is_alive()),
+            "connected": bool(worker.health.get("connected")),
+            "state": readiness.get("state"),
+            "channels": len(worker.health.get("channels", [])),
+            "restarts": worker.restarts,
+            "last_seen": round(now - worker.last_seen, 1) if worker.last_seen else None,
+            "last_error": readiness.get("last_error")
+        }
+
+    @property
+    def state(self) -> str:
+        """Supervisor state; ``degraded`` while only some workers are connected."""
+        if self._state != "connecting":
+            return self._state
+        connected = sum(1 for w in self._workers if w.health.get("connected"))
+        if connected == len(self._workers):
+            return "ready"
+        return "degraded" if connected else "connecting"
+
+    def readiness(self) -> Dict:
+        """Readiness summary aggregated from all workers."""
+        now = time.monotonic()
+        return {
+            "state": self.state,
+            "ready": self.state == "ready",
+            "uptime": round(now - self._started_at, 1) if self._started_at else None,
+            "restarts": sum(w.restarts for w in self._workers),
+            "last_error": self.last_error,
+            "workers": [self._worker_status(w, now) for w in self._workers]
+        }
+
+    async def stop(self):
+        """Stop every worker, then the shared services, within ``shutdown_timeout``."""
+        self._stopping = True
+        self._state = "stopping"
+        self.broadcast("stop", None)
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + self.shutdown_timeout
+        for worker in self._workers:
+            if worker.process is None:
+                continue
+            remaining = max(0.0, deadline - time.monotonic())
+            await loop.run_in_executor(None, worker.process.join, remaining)
+            if worker.process.is_alive():
+                print(f"Worker {worker.id} did not stop in time; terminating")
+                worker.process.terminate()
+
+        # Unblock the pump, then let it drain what the workers sent last
+        self._outbox.put(None)
+        for task in self._tasks:
+            if task.get_name() == "shard-watchdog":
+                task.cancel()
+        try:
+            await asyncio.wait_for(asyncio.gather(*self._tasks, return_exceptions=True),
+                                   max(1.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            for task in self._tasks:
+                task.cancel()
+        self._tasks = []
+        try:
+            await asyncio.wait_for(self.client.close(), max(1.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            print(f"Discord monitor did not close within {self.shutdown_timeout}s")
+        self._state = "stopped"
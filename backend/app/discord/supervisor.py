@@ -0,0 +1,110 @@
+import asyncio
+import time
+import discord
+from typing import Dict, Optional
+from .client import DiscordMonitor
+
+
+class MonitorSupervisor:
+    """Run a DiscordMonitor as a background task and track its readiness.
+
+    The web server finishes starting straight away while the gateway
+    connects. If the connection task fails, it is restarted with
+    exponential backoff. Invalid credentials are treated as fatal.
+    """
+
+    def __init__(self, client: DiscordMonitor, max_backoff: float = 60.0,
+                 shutdown_timeout: float = 10.0):
+        self.client = client
+        self.max_backoff = max_backoff
+        self.shutdown_timeout = shutdown_timeout
+        self.restarts = 0
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._state = "created"
+        self._stopping = False
+        self._started_at: Optional[float] = None
+        client.supervisor = self
+
+    @property
+    def state(self) -> str:
+        """One of created, starting, connecting, ready, reconnecting, stopping, stopped or failed."""
+        if self._state in ("connecting", "reconnecting"):
+            if self.client.connected:
+                return "ready"
+            if self.client.is_ready():
+                # Connected before and waiting for the gateway to come back
+                return "reconnecting"
+        return self._state
+
+    def readiness(self) -> Dict:
+        """Readiness summary for the status endpoint."""
+        return {
+            "state": self.state,
+            "ready": self.state == "ready",
+            "uptime": round(time.monotonic() - self._started_at, 1) if self._started_at else None,
+            "restarts": self.restarts,
+            "last_error": self.last_error
+        }
+
+    def start(self):
+        """Start the monitor in a background task on the running loop."""
+        if self._task is None:
+            self._started_at = time.monotonic()
+            self._task = asyncio.create_task(self._run(), name="discord-monitor")
+
+    async def _run(self):
+        self._state = "starting"
+        try:
+            await self.client.start_services()
+        except Exception as e:
+            self.last_error = f"Service startup failed: {e}"
+            self._state = "failed"
+            print(self.last_error)
+            return
+
+        backoff = 1.0
+        while not self._stopping:
+            self._state = "connecting" if self.restarts == 0 else "reconnecting"
+            try:
+                await self.client.run_gateway()
+                # The client closed itself (e.g. no channels found) or we are shutting down
+                break
+            except discord.LoginFailure as e:
+                self.last_error = f"Invalid Discord token: {e}"
+                self._state = "failed"
+                print(self.last_error)
+                return
+            except Exception as e:
+                self.last_error = f"Discord connection failed: {e}"
+                print(f"{self.last_error}; retrying in {backoff:.0f}s")
+
+            if self._stopping:
+                break
+            await self.client.close_gateway()
+            self.client.reset_gateway()
+            self.restarts += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+        if self._state != "failed":
+            self._state = "stopped"
+
+    async def wait(self):
+        """Wait until the monitor stops running: stopped, failed, or closed by the client itself."""
+        if self._task is not None:
+            await asyncio.wait({self._task})
+
+    async def stop(self):
+        """Close the monitor, waiting at most ``shutdown_timeout`` seconds."""
+        self._stopping = True
+        self._state = "stopping"
+        try:
+            await asyncio.wait_for(self.client.close(), self.shutdown_timeout)
+        except asyncio.TimeoutError:
+            print(f"Discord monitor did not close within {self.shutdown_timeout}s")
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._state = "stopped"
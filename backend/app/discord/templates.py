@@ -0,0 +1,108 @@
+import re
+from string import Formatter
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+MESSAGE_LIMIT = 1024  # Pushover's limits, in characters
+TITLE_LIMIT = 250
+ELLIPSIS = "…"
+LINK = re.compile(r"https?://\S+")
+
+# Reproduces the format used before templates were configurable
+DEFAULT_TEMPLATE = "{author}: {content}{attachments}{embeds}"
+TITLE_TEMPLATE = "Discord: {channel}"
+
+
+def _attachments(files: Sequence[str]) -> str:
+    if not files:
+        return ""
+    return "".join(["\n📎 " + url for url in files])
+
+
+def _embeds(embeds: Sequence[Tuple]) -> str:
+    if not embeds:
+        return ""
+    text = ""
+    for embed in embeds:
+        title, description = embed[0], embed[1]
+        if title:
+            text += f"\n📌 {title}: {description}" if description else f"\n📌 {title}"
+    return text
+
+
+def _links(content: str) -> str:
+    if "http" not in content:
+        return ""
+    return "".join(["\n🔗 " + url for url in LINK.findall(content)])
+
+
+# Python expression for each field, in terms of the renderer's arguments.
+# List fields start each item on its own line, so "{content}{links}" reads naturally.
+FIELDS: Dict[str, str] = {
+    "author": "author",
+    "channel": "channel",
+    "content": "content",
+    "attachments": "_attachments(files)",
+    "embeds": "_embeds(embeds)",
+    "links": "_links(content)",
+}
+_HELPERS = {"_attachments": _attachments, "_embeds": _embeds, "_links": _links}
+
+Renderer = Callable[..., str]
+
+
+def _compile(template: str, limit: int) -> Renderer:
+    """Compile a template into a function of (author, channel, content, files, embeds).
+
+    The template becomes a single concatenation expression: literal text is
+    embedded as string constants and each field as the expression that
+    renders it. The result is cut to ``limit`` characters, ending in an
+    ellipsis, in the same function, so formatting a message is one call.
+
+    Raises:
+        ValueError: The template is malformed or names an unknown field
+    """
+    terms = []
+    for literal, name, spec, conversion in Formatter().parse(template):
+        if literal:
+            terms.append(repr(literal))
+        if name is None:
+            continue
+        if name not in FIELDS:
+            raise ValueError(f"Unknown template field {{{name}}}; "
+                             f"available: {', '.join(f'{{{f}}}' for f in FIELDS)}")
+        if spec or conversion:
+            raise ValueError(f"Format specs and conversions are not supported: {{{name}}}")
+        terms.append(FIELDS[name])
+    source = ("def render(author, channel, content=\"\", files=(), embeds=()):\n"
+              f"    text = {' + '.join(terms) or repr('')}\n"
+              f"    return text if len(text) <= {limit} else text[:{limit - 1}] + {ELLIPSIS!r}\n")
+    namespace = dict(_HELPERS)
+    exec(source, namespace)
+    return namespace["render"]
+
+
+class NotificationTemplate:
+    """A message template compiled once into rendering functions.
+
+    ``message(author, channel, content, files, embeds)`` and
+    ``title(author, channel, content)`` return the notification text and
+    title, cut to Pushover's limits. ``files`` are the URLs of attachments
+    not sent as images; ``embeds`` are (title, description, ...) tuples.
+    Only the fields a template uses are computed for each message.
+    """
+
+    __slots__ = ("source", "message", "title")
+
+    def __init__(self, source: Optional[str] = None):
+        self.source = source or DEFAULT_TEMPLATE
+        self.message: Renderer = _compile(self.source, MESSAGE_LIMIT)
+        self.title: Renderer = _compile(TITLE_TEMPLATE, TITLE_LIMIT)
+
+
+def compile_template(source: Optional[str] = None) -> NotificationTemplate:
+    """Compile a custom message template, or the default one if unset.
+
+    Raises:
+        ValueError: The template is malformed or names an unknown field
+    """
+    return NotificationTemplate(source)
@@ -0,0 +1,124 @@
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+import discord
+from ..services.dedup import image_key
+from .filters import CompiledFilter
+
+# (filename, url, size) of an attachment; (title, description, image url) of an embed
+Attachment = Tuple[str, str, int]
+Embed = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+def attachments_of(message: discord.Message) -> Tuple[Attachment, ...]:
+    return tuple((a.filename, a.url, a.size) for a in message.attachments)
+
+
+def embeds_of(message: discord.Message) -> Tuple[Embed, ...]:
+    return tuple((e.title, e.description, e.image.url if e.image else None)
+                 for e in message.embeds)
+
+
+def attachments_from_payload(data: List[Dict]) -> Tuple[Attachment, ...]:
+    return tuple((a.get("filename", ""), a.get("url", ""), a.get("size", 0)) for a in data)
+
+
+def embeds_from_payload(data: List[Dict]) -> Tuple[Embed, ...]:
+    return tuple((e.get("title"), e.get("description"), (e.get("image") or {}).get("url"))
+                 for e in data)
+
+
+class TrackedMessage:
+    """What the monitor last saw of a message from a monitored user.
+
+    The match result of each part (content, attachments, embeds) is kept
+    so that an edit only re-runs the filters for the parts it changed.
+    """
+
+    __slots__ = ("message_id", "channel_id", "author_id", "channel", "author", "content",
+                 "attachments", "embeds", "matched", "_filters", "_parts")
+
+    def __init__(self, message_id: int, channel_id: int, author_id: int, channel: str,
+                 author: str, content: str, attachments: Tuple[Attachment, ...],
+                 embeds: Tuple[Embed, ...], matched: bool):
+        self.message_id = message_id
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.channel = channel  # Labels as used in history and notifications
+        self.author = author
+        self.content = content
+        self.attachments = attachments
+        self.embeds = embeds
+        self.matched = matched
+        self._filters: Optional[CompiledFilter] = None  # Filters the parts were evaluated with
+        self._parts: Dict[str, bool] = {}
+
+    def image_keys(self) -> FrozenSet[str]:
+        """Keys of every attachment and embed image, stable across CDN URL signatures."""
+        keys = {image_key(url) for _, url, _ in self.attachments}
+        keys.update(image_key(url) for _, _, url in self.embeds if url)
+        return frozenset(keys)
+
+    def apply(self, data: Dict) -> Set[str]:
+        """Take the fields present in a MESSAGE_UPDATE payload; returns the parts that changed.
+
+        Updates can be partial: when Discord unfurls a link it sends only
+        the new embeds.
+        """
+        changed = set()
+        if "content" in data and data["content"] != self.content:
+            self.content = data["content"]
+            changed.add("content")
+        if "attachments" in data:
+            attachments = attachments_from_payload(data["attachments"])
+            if attachments != self.attachments:
+                self.attachments = attachments
+                changed.add("attachments")
+        if "embeds" in data:
+            embeds = embeds_from_payload(data["embeds"])
+            if embeds != self.embeds:
+                self.embeds = embeds
+                changed.add("embeds")
+        return changed
+
+    def evaluate(self, filters: CompiledFilter, changed: Set[str]) -> bool:
+        """Re-run the filters on the changed parts and return whether the message now matches."""
+        if filters is not self._filters:
+            # First evaluation, or the configuration changed since: check every part
+            self._filters = filters
+            self._parts = {}
+            changed = {"content", "attachments", "embeds"}
+        parts = self._parts
+        if "content" in changed:
+            parts["content"] = filters.matches_content(self.content)
+        if "attachments" in changed:
+            parts["attachments"] = filters.matches_attachments([a[0] for a in self.attachments])
+        if "embeds" in changed:
+            parts["embeds"] = filters.matches_embeds(bool(self.embeds))
+        self.matched = not filters.enabled or any(parts.values())
+        return self.matched
+
+
+class MessageTracker:
+    """Bounded index of recent messages from monitored users, by message ID.
+
+    The oldest message is forgotten once ``capacity`` are tracked; later
+    edits to it are then treated like edits to an unknown message.
+    """
+
+    def __init__(self, capacity: int = 5000):
+        self.capacity = capacity
+        self._messages: "OrderedDict[int, TrackedMessage]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def track(self, message: TrackedMessage):
+        self._messages[message.message_id] = message
+        if len(self._messages) > self.capacity:
+            self._messages.popitem(last=False)
+
+    def get(self, message_id: int) -> Optional[TrackedMessage]:
+        return self._messages.get(message_id)
+
+    def forget(self, message_id: int) -> Optional[TrackedMessage]:
+        return self._messages.pop(message_id, None)
@@ -8,24 +8,39 @@ import os
 
 # Import our modules
 from .discord.client import DiscordMonitor
+from .discord.supervisor import MonitorSupervisor
+from .discord.sharding import ShardedMonitor, ShardSupervisor
 from .models.config import Settings
 
 # Global discord client instance
 discord_client = None
+supervisor = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Load config and start Discord client
-    global discord_client
+    # Startup: Load config and start Discord client in the background so the
+    # API is served while the gateway connects
+    global discord_client, supervisor
     settings = Settings()  # Load settings from environment
-    discord_client = DiscordMonitor(settings)
-    await discord_client.start()
+    if settings.workers:
+        # One worker process per account or shard, feeding this process
+        discord_client = ShardedMonitor(settings)
+        supervisor_class = ShardSupervisor
+    else:
+        discord_client = DiscordMonitor(settings)
+        supervisor_class = MonitorSupervisor
+    supervisor = supervisor_class(
+        discord_client,
+        max_backoff=settings.reconnect_max_backoff,
+        shutdown_timeout=settings.shutdown_timeout
+    )
+    supervisor.start()
     
     yield
     
     # Shutdown: Close Discord client
-    if discord_client:
-        await discord_client.close()
+    if supervisor:
+        await supervisor.stop()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -39,8 +54,9 @@ app.add_middleware(
 )
 
 # Import and include routers
-from .routers import api
+from .routers import api, metrics
 app.include_router(api.router, prefix="/api")
+app.include_router(metrics.router)
 
 # Serve static files in production
 frontend_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend/build")
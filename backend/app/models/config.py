@@ -1,14 +1,9 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_serializer, field_validator
 from pydantic_settings import BaseSettings
 from typing import List, Optional, Dict
-from enum import Enum
-
-class NotificationPriority(str, Enum):
-    LOWEST = -2
-    LOW = -1
-    NORMAL = 0
-    HIGH = 1
-    EMERGENCY = 2
+import uuid
+# Kept free of pydantic so the delivery services import without it
+from .enums import NotificationPriority, OverflowPolicy
 
 class FilterConfig(BaseModel):
     keywords: List[str] = Field(default_factory=list)
@@ -17,9 +12,73 @@ class FilterConfig(BaseModel):
     enabled: bool = True
 
 class NotificationConfig(BaseModel):
+    """How notifications are sent.
+
+    ``priority`` is accepted as the string the UI sends (``"2"``) or as a
+    JSON integer (``2``). ``retry`` and ``expire`` are sent with EMERGENCY
+    notifications, which Pushover repeats every ``retry`` seconds until
+    acknowledged or ``expire`` seconds have passed; Pushover requires
+    both, with retry at least 30 and expire at most 10800.
+    """
     priority: NotificationPriority = NotificationPriority.NORMAL
     sound: str = "pushover"
     custom_message_template: Optional[str] = None
+    retry: int = Field(60, ge=30)
+    expire: int = Field(3600, gt=0, le=10800)
+
+    @field_validator("priority", mode="before")
+    @classmethod
+    def _priority_from_int(cls, value):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return str(value)
+        return value
+
+class RoutingRule(BaseModel):
+    """Filters and notification settings for messages from one source.
+
+    ``channel_id`` and ``author_id`` left unset match any channel or author.
+    ``filters`` and ``notifications`` left unset fall back to the global ones.
+    """
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex[:12])
+    name: str = ""
+    channel_id: Optional[int] = None
+    author_id: Optional[int] = None
+    filters: Optional[FilterConfig] = None
+    notifications: Optional[NotificationConfig] = None
+    enabled: bool = True
+
+    @field_serializer("channel_id", "author_id", when_used="json")
+    def _id_as_string(self, value: Optional[int]) -> Optional[str]:
+        # Snowflakes exceed JavaScript's safe integers; strings are coerced back on input
+        return str(value) if value is not None else None
+
+class ConfigResponse(BaseModel):
+    """The configuration the dashboard edits, as returned by GET /api/config."""
+    channel_ids: List[int]
+    target_user_ids: List[int]
+    filters: FilterConfig
+    notifications: NotificationConfig
+    rules: List[RoutingRule]
+
+    @field_serializer("channel_ids", "target_user_ids", when_used="json")
+    def _ids_as_strings(self, value: List[int]) -> List[str]:
+        # Snowflakes exceed JavaScript's safe integers, as with RoutingRule's IDs
+        return [str(i) for i in value]
+
+class ConfigPatch(BaseModel):
+    """IDs to add to and remove from a watch list; an ID in both ends up watched."""
+    add: List[int] = Field(default_factory=list)
+    remove: List[int] = Field(default_factory=list)
+
+class ProfilerConfig(BaseModel):
+    sample_rate: float = Field(0.0, ge=0.0, le=1.0)  # Share of on_message calls to profile
+    reset: bool = False
+
+class WorkerConfig(BaseModel):
+    discord_token: str
+    channel_ids: List[int] = Field(default_factory=list)  # Defaults to the global channel_ids
+    shard_id: Optional[int] = None
+    shard_count: Optional[int] = None
 
 class Settings(BaseSettings):
     discord_token: str
@@ -29,6 +88,51 @@ class Settings(BaseSettings):
     pushover_api_token: str
     filters: FilterConfig = Field(default_factory=FilterConfig)
     notifications: NotificationConfig = Field(default_factory=NotificationConfig)
+    rules: List[RoutingRule] = Field(default_factory=list)
+    config_path: Optional[str] = "config.json"  # API changes saved here override the above
+    config_save_delay: float = 1.0  # Seconds to wait for more changes before saving
+    lean_gateway: bool = True
+    discord_message_cache_size: int = 100  # 0 disables discord.py's message cache
+    workers: List[WorkerConfig] = Field(default_factory=list)
+    worker_health_interval: float = 5.0
+    shutdown_timeout: float = 10.0
+    reconnect_max_backoff: float = 60.0
+    backfill_concurrency: int = 4  # Channels read at once after a reconnect; 0 disables backfill
+    backfill_max_messages: int = 200  # Newest missed messages fetched per channel
+    history_size: int = 1000
+    edit_tracking_size: int = 5000  # Recent messages from monitored users kept for edits
+    message_store_path: Optional[str] = "messages.db"
+    message_store_batch_size: int = 500
+    message_store_flush_interval: float = 0.25
+    stream_queue_size: int = 256
+    stream_heartbeat_interval: float = 15.0
+    http_connection_limit: int = 20
+    http_connection_limit_per_host: int = 8
+    http_dns_cache_ttl: int = 300
+    http_keepalive_timeout: float = 60.0
+    image_concurrency: int = 4
+    image_cache_max_bytes: int = 64 * 1024 * 1024
+    image_cache_ttl: float = 3600.0
+    image_cache_dir: Optional[str] = None
+    image_cache_dir_max_bytes: int = 512 * 1024 * 1024
+    image_processing_workers: int = 0  # Processes that resize large images before upload; 0 disables
+    image_target_bytes: int = 1_000_000
+    image_max_dimension: int = 2048
+    image_process_min_bytes: int = 256 * 1024  # Smaller images are sent as downloaded
+    dispatch_queue_size: int = 100
+    dispatch_workers: int = 4
+    dispatch_overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK
+    notification_digest_window: float = 2.0
+    notification_digest_max_window: float = 60.0
+    pushover_quota_reserve: float = 0.2  # Widen the digest window below this share of quota
+    dedup_window: float = 300.0  # Seconds a notified message suppresses its duplicates; 0 disables
+    dedup_max_entries: int = 10000
+    dedup_similarity: float = 0.5  # Word-pair Jaccard similarity at which texts are near-duplicates
+    profile_sample_rate: float = 0.0
+    notification_outbox_path: Optional[str] = "outbox.db"
+    notification_retry_attempts: int = 8
+    notification_retry_base_delay: float = 1.0
+    notification_retry_max_delay: float = 300.0
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,13 @@
+from enum import Enum
+
+class NotificationPriority(str, Enum):
+    LOWEST = -2
+    LOW = -1
+    NORMAL = 0
+    HIGH = 1
+    EMERGENCY = 2
+
+class OverflowPolicy(str, Enum):
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"
@@ -1,80 +1,305 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Optional
-from ..models.config import Settings, FilterConfig, NotificationConfig
+from fastapi import APIRouter, HTTPException, Depends, Query, Header, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from typing import Iterable, List, Optional
+import asyncio
+import re
+import uuid
+import orjson
+from ..models.config import Settings, ConfigPatch, ConfigResponse, FilterConfig, NotificationConfig, ProfilerConfig, RoutingRule
 from ..discord.client import DiscordMonitor
-from ..main import discord_client
+from ..discord.history import Page, serialize
+from .caching import page_response
+from ..services.events import format_sse
+from .. import main
 
 router = APIRouter()
 
+def get_discord_client() -> DiscordMonitor:
+    """Resolve the running Discord client, which is created during app startup."""
+    if not main.discord_client:
+        raise HTTPException(status_code=503, detail="Discord client not initialized")
+    return main.discord_client
+
 @router.get("/status")
-async def get_status():
+async def get_status(discord_client: DiscordMonitor = Depends(get_discord_client)):
     """Get the current connection status of the Discord client."""
-    if not discord_client:
-        raise HTTPException(status_code=503, detail="Discord client not initialized")
-    return {
-        "connected": discord_client.connected,
-        "channels": [
-            {
-                "id": channel_id,
-                "name": f"{channel.guild.name} - #{channel.name}"
-            }
-            for channel_id, channel in discord_client.target_channels.items()
-        ]
-    }
+    return discord_client.status()
 
 @router.get("/messages")
-async def get_messages():
-    """Get recent message history."""
-    if not discord_client:
-        raise HTTPException(status_code=503, detail="Discord client not initialized")
-    return discord_client.message_history
+async def get_messages(
+    request: Request,
+    since: Optional[int] = Query(None, description="Only return messages with an id greater than this"),
+    channel: Optional[int] = Query(None, description="Only return messages from this channel ID"),
+    author: Optional[int] = Query(None, description="Only return messages from this user ID"),
+    before: Optional[int] = Query(None, description="Only return messages with an id less than this"),
+    q: Optional[str] = Query(None, description="Full-text search over message content"),
+    limit: int = Query(100, ge=1, le=10000),
+    discord_client: DiscordMonitor = Depends(get_discord_client)
+):
+    """Get message history.
 
-@router.get("/config")
-async def get_config():
-    """Get current configuration."""
-    if not discord_client:
-        raise HTTPException(status_code=503, detail="Discord client not initialized")
-    return {
-        "channel_ids": discord_client.settings.channel_ids,
-        "target_user_ids": discord_client.settings.target_user_ids,
-        "filters": discord_client.settings.filters,
-        "notifications": discord_client.settings.notifications
-    }
+    Recent pages are answered from memory; older pages and searches are
+    read from the persistent message store. Responses carry an ETag, and a
+    poll with a current If-None-Match gets 304 Not Modified.
+    """
+    history = discord_client.history
+    store = discord_client.store
+    in_memory = (before is None and not q and
+                 (since is None or since >= history.first_seq - 1 or store is None))
+    if in_memory:
+        return page_response(request, history.page(since=since, channel=channel,
+                                                   author=author, limit=limit))
+    if store is None:
+        raise HTTPException(status_code=400, detail="Paging and search require the message store")
+    try:
+        records = await store.query(before=before, since=since, channel=channel,
+                                    author=author, search=q, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return page_response(request, Page.of(serialize(records)))
+
+@router.get("/stream")
+async def stream(
+    request: Request,
+    since: Optional[int] = Query(None, description="Resume after this message id"),
+    limit: int = Query(50, ge=1, le=1000, description="Messages to replay on a fresh connection"),
+    last_event_id: Optional[int] = Header(None),
+    discord_client: DiscordMonitor = Depends(get_discord_client)
+):
+    """Stream new messages and status changes as Server-Sent Events.
+
+    Reconnecting clients resume from the Last-Event-ID header (or ``since``)
+    and are first sent any messages they missed.
+    """
+    cursor = last_event_id if last_event_id is not None else since
+    heartbeat = discord_client.settings.stream_heartbeat_interval
+
+    async def events():
+        subscription = discord_client.events.subscribe()
+        try:
+            yield "retry: 3000\n\n"
+            yield format_sse("status", discord_client.status())
+
+            sent = cursor if cursor is not None else 0
+            replay_limit = discord_client.history.capacity if cursor is not None else limit
+            for record in discord_client.history.query(since=cursor, limit=replay_limit):
+                yield format_sse("message", record.to_dict(), record.seq)
+                sent = record.seq
+
+            while True:
+                try:
+                    event = await subscription.get(timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield format_sse("status", discord_client.status())
+                    continue
+                if event is None:
+                    # Fell too far behind; the client reconnects with its last id
+                    break
+                event_id, frame = event
+                if event_id is not None and event_id <= sent:
+                    continue  # Already sent during replay
+                yield frame
+        finally:
+            discord_client.events.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Serialized configuration, reused until the client's config_version changes
+_config_page = (None, -1, None)
+
+@router.get("/config", response_model=ConfigResponse)
+async def get_config(request: Request,
+                     discord_client: DiscordMonitor = Depends(get_discord_client)):
+    """Get current configuration. Channel and user IDs are sent as strings."""
+    global _config_page
+    client, version, page = _config_page
+    if client is not discord_client or version != discord_client.config_version:
+        settings = discord_client.settings
+        config = ConfigResponse(channel_ids=settings.channel_ids,
+                                target_user_ids=settings.target_user_ids,
+                                filters=settings.filters, notifications=settings.notifications,
+                                rules=settings.rules)
+        page = Page.of(orjson.dumps(config.model_dump(mode="json")))
+        _config_page = (discord_client, discord_client.config_version, page)
+    return page_response(request, page)
 
 @router.put("/config/filters")
-async def update_filters(filters: FilterConfig):
+async def update_filters(filters: FilterConfig,
+                         discord_client: DiscordMonitor = Depends(get_discord_client)):
     """Update filter configuration."""
-    if not discord_client:
-        raise HTTPException(status_code=503, detail="Discord client not initialized")
-    discord_client.settings.filters = filters
+    discord_client.update_filters(filters)
     return {"status": "success", "filters": filters}
 
 @router.put("/config/notifications")
-async def update_notifications(notifications: NotificationConfig):
+async def update_notifications(notifications: NotificationConfig,
+                               discord_client: DiscordMonitor = Depends(get_discord_client)):
     """Update notification configuration."""
-    if not discord_client:
-        raise HTTPException(status_code=503, detail="Discord client not initialized")
-    discord_client.settings.notifications = notifications
+    try:
+        discord_client.update_notifications(notifications)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid message template: {e}")
     return {"status": "success", "notifications": notifications}
 
 @router.put("/config/channels")
-async def update_channels(channel_ids: List[int]):
+async def update_channels(channel_ids: List[int],
+                          discord_client: DiscordMonitor = Depends(get_discord_client)):
     """Update monitored channel IDs."""
-    if not discord_client:
-        raise HTTPException(status_code=503, detail="Discord client not initialized")
-    discord_client.settings.channel_ids = channel_ids
-    # Reinitialize channels
-    discord_client.target_channels.clear()
-    for channel_id in channel_ids:
-        channel = discord_client.get_channel(channel_id)
-        if channel:
-            discord_client.target_channels[channel_id] = channel
+    discord_client.update_channels(channel_ids)
     return {"status": "success", "channel_ids": channel_ids}
 
 @router.put("/config/users")
-async def update_users(user_ids: List[int]):
+async def update_users(user_ids: List[int],
+                       discord_client: DiscordMonitor = Depends(get_discord_client)):
     """Update target user IDs."""
-    if not discord_client:
-        raise HTTPException(status_code=503, detail="Discord client not initialized")
-    discord_client.settings.target_user_ids = user_ids
-    return {"status": "success", "user_ids": user_ids} 
\ No newline at end of file
+    discord_client.update_users(user_ids)
+    return {"status": "success", "user_ids": user_ids}
+
+def _patch_ids(discord_client: DiscordMonitor, kind: str,
+               add: Iterable[int], remove: Iterable[int]) -> dict:
+    if kind == "channels":
+        added, removed = discord_client.patch_channels(add, remove)
+        total = len(discord_client.settings.channel_ids)
+    else:
+        added, removed = discord_client.patch_users(add, remove)
+        total = len(discord_client.settings.target_user_ids)
+    return {"status": "success", "added": added, "removed": removed, "total": total}
+
+@router.patch("/config/channels")
+async def patch_channels(patch: ConfigPatch,
+                         discord_client: DiscordMonitor = Depends(get_discord_client)):
+    """Add and remove monitored channel IDs; only the added channels are looked up."""
+    return _patch_ids(discord_client, "channels", patch.add, patch.remove)
+
+@router.patch("/config/users")
+async def patch_users(patch: ConfigPatch,
+                      discord_client: DiscordMonitor = Depends(get_discord_client)):
+    """Add and remove target user IDs."""
+    return _patch_ids(discord_client, "users", patch.add, patch.remove)
+
+_ID_SEPARATORS = re.compile(rb"[\s,;]+")
+
+def _ids_in_line(line: bytes, first_column: bool, ids: List[int]):
+    fields = [line.split(b",", 1)[0]] if first_column else _ID_SEPARATORS.split(line)
+    for field in fields:
+        field = field.strip().strip(b'"')
+        if field.isdigit():  # Skips headers, names and blank fields
+            ids.append(int(field))
+
+async def _read_ids(request: Request) -> List[int]:
+    """IDs from an import body: JSON, CSV (first column) or text separated by commas or whitespace.
+
+    Text bodies are tokenized line by line as they stream in, so a large
+    upload is never held whole in memory as text.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type == "application/json":
+        try:
+            data = orjson.loads(await request.body())
+        except orjson.JSONDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+        if not isinstance(data, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of IDs")
+        try:
+            return [int(item["id"] if isinstance(item, dict) else item) for item in data]
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400,
+                                detail="Expected IDs as numbers, strings or objects with an \"id\"")
+
+    first_column = content_type == "text/csv"
+    ids: List[int] = []
+    pending = b""
+    async for chunk in request.stream():
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            _ids_in_line(line, first_column, ids)
+    _ids_in_line(pending, first_column, ids)
+    return ids
+
+async def _import_ids(request: Request, discord_client: DiscordMonitor, kind: str, mode: str) -> dict:
+    ids = await _read_ids(request)
+    remove = ()
+    if mode == "replace":
+        current = (discord_client.settings.channel_ids if kind == "channels"
+                   else discord_client.settings.target_user_ids)
+        remove = set(current).difference(ids)
+    result = _patch_ids(discord_client, kind, ids, remove)
+    # Counts only; an import can touch tens of thousands of IDs
+    return {"status": "success", "read": len(ids), "added": len(result["added"]),
+            "removed": len(result["removed"]), "total": result["total"]}
+
+@router.post("/config/channels/import")
+async def import_channels(request: Request,
+                          mode: str = Query("add", pattern="^(add|replace)$"),
+                          discord_client: DiscordMonitor = Depends(get_discord_client)):
+    """Import channel IDs from a file; ``replace`` also removes channels the file doesn't list."""
+    return await _import_ids(request, discord_client, "channels", mode)
+
+@router.post("/config/users/import")
+async def import_users(request: Request,
+                       mode: str = Query("add", pattern="^(add|replace)$"),
+                       discord_client: DiscordMonitor = Depends(get_discord_client)):
+    """Import target user IDs from a file; ``replace`` also removes users the file doesn't list."""
+    return await _import_ids(request, discord_client, "users", mode)
+
+def _update_rules(discord_client: DiscordMonitor, rules: List[RoutingRule]):
+    try:
+        discord_client.update_rules(rules)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid message template: {e}")
+
+@router.get("/config/rules")
+async def get_rules(discord_client: DiscordMonitor = Depends(get_discord_client)):
+    """Get the routing rules in the order they are applied."""
+    return discord_client.settings.rules
+
+@router.post("/config/rules", status_code=201)
+async def create_rule(rule: RoutingRule,
+                      discord_client: DiscordMonitor = Depends(get_discord_client)):
+    """Add a routing rule under a newly assigned id."""
+    rule = rule.model_copy(update={"id": uuid.uuid4().hex[:12]})
+    _update_rules(discord_client, [*discord_client.settings.rules, rule])
+    return rule
+
+@router.put("/config/rules/{rule_id}")
+async def update_rule(rule_id: str, rule: RoutingRule,
+                      discord_client: DiscordMonitor = Depends(get_discord_client)):
+    """Replace a routing rule, keeping its position."""
+    rules = list(discord_client.settings.rules)
+    for index, existing in enumerate(rules):
+        if existing.id == rule_id:
+            rules[index] = rule = rule.model_copy(update={"id": rule_id})
+            _update_rules(discord_client, rules)
+            return rule
+    raise HTTPException(status_code=404, detail="Rule not found")
+
+@router.delete("/config/rules/{rule_id}")
+async def delete_rule(rule_id: str,
+                      discord_client: DiscordMonitor = Depends(get_discord_client)):
+    """Remove a routing rule."""
+    rules = [rule for rule in discord_client.settings.rules if rule.id != rule_id]
+    if len(rules) == len(discord_client.settings.rules):
+        raise HTTPException(status_code=404, detail="Rule not found")
+    discord_client.update_rules(rules)
+    return {"status": "success", "id": rule_id}
+
+@router.get("/debug/profile", response_class=PlainTextResponse)
+async def get_profile(limit: int = Query(40, ge=1, le=500),
+                      sort: str = Query("cumulative", pattern="^(cumulative|tottime|calls)$"),
+                      discord_client: DiscordMonitor = Depends(get_discord_client)):
+    """Top functions from the sampled on_message profile."""
+    return discord_client.profiler.report(limit=limit, sort=sort)
+
+@router.put("/debug/profile")
+async def update_profile(config: ProfilerConfig,
+                         discord_client: DiscordMonitor = Depends(get_discord_client)):
+    """Turn sampled profiling of on_message on or off (sample_rate 0)."""
+    discord_client.profiler.configure(config.sample_rate, reset=config.reset)
+    return {"status": "success", "sample_rate": config.sample_rate,
+            "samples": discord_client.profiler.samples}
@@ -0,0 +1,59 @@
+import gzip
+from fastapi import Request, Response
+from ..discord.history import Page
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always offered
+    brotli = None
+
+COMPRESS_MIN_BYTES = 1024  # Smaller bodies gain less than the header costs
+
+
+def _accepts(request: Request, coding: str) -> bool:
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip() == coding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _compress(body: bytes, coding: str) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def page_response(request: Request, page: Page) -> Response:
+    """Serve a serialized page, answering 304 if the client's copy is current.
+
+    The tag is weak because the same page is sent with different content
+    codings. Large pages are compressed with brotli if installed and
+    accepted, else gzip, and the compressed body is kept on the page.
+    """
+    headers = {"ETag": f"W/{page.etag}", "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if _not_modified(request, page.etag):
+        return Response(status_code=304, headers=headers)
+
+    body = page.body
+    if len(body) >= COMPRESS_MIN_BYTES:
+        coding = None
+        if brotli is not None and _accepts(request, "br"):
+            coding = "br"
+        elif _accepts(request, "gzip"):
+            coding = "gzip"
+        if coding:
+            encoded = page.encoded.get(coding)
+            if encoded is None:
+                encoded = page.encoded[coding] = _compress(body, coding)
+            headers["Content-Encoding"] = coding
+            body = encoded
+    return Response(body, media_type="application/json", headers=headers)
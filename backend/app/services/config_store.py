@@ -0,0 +1,97 @@
+import asyncio
+import json
+import os
+import tempfile
+from typing import Any, Callable, Dict, Optional
+
+Snapshot = Callable[[], Dict[str, Any]]
+
+
+class ConfigStore:
+    """Configuration changed through the API, kept across restarts.
+
+    Saves are debounced: a change schedules a write ``delay`` seconds later,
+    and further changes before then are folded into that one write, which
+    takes the configuration as it is when it runs. A bulk import of
+    thousands of IDs, or a burst of small edits, costs a single write.
+
+    Each write goes to a temporary file in the same directory that is
+    fsynced and renamed over the old one, so a crash leaves either the old
+    or the new configuration, never a partial file. Writes run on a thread.
+    """
+
+    def __init__(self, path: str, delay: float = 1.0):
+        self.path = path
+        self.delay = delay
+        self._snapshot: Optional[Snapshot] = None
+        self._task: Optional[asyncio.Task] = None  # The debounced save, while it waits
+        self._lock = asyncio.Lock()
+        self.saves = 0
+        self.coalesced = 0  # Changes folded into an already scheduled write
+
+    def load(self) -> Dict[str, Any]:
+        """The saved configuration, or an empty dict if there is none."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Error loading saved configuration from {self.path}, using defaults: {e}")
+            return {}
+
+    def schedule(self, snapshot: Snapshot):
+        """Save the configuration ``snapshot`` returns, after the debounce delay."""
+        self._snapshot = snapshot
+        if self._task is not None:
+            self.coalesced += 1
+            return
+        self._task = asyncio.create_task(self._save_later(), name="config-save")
+
+    async def _save_later(self):
+        await asyncio.sleep(self.delay)
+        # Changes from here on schedule a new save
+        self._task = None
+        await self._save()
+
+    async def flush(self):
+        """Write a pending change now."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self._save()
+
+    async def _save(self):
+        snapshot, self._snapshot = self._snapshot, None
+        if snapshot is None:
+            return
+        # Serialized on the loop so the file matches one consistent state
+        text = json.dumps(snapshot(), indent=2)
+        async with self._lock:
+            try:
+                await asyncio.to_thread(self._write, text)
+                self.saves += 1
+            except OSError as e:
+                print(f"Error saving configuration to {self.path}: {e}")
+
+    def _write(self, text: str):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".config-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def stats(self) -> Dict:
+        return {
+            "path": self.path,
+            "pending": self._snapshot is not None,
+            "saves": self.saves,
+            "coalesced": self.coalesced
+        }
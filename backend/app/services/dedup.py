@@ -0,0 +1,212 @@
+import re
+import time
+from collections import deque
+from itertools import islice
+from typing import Deque, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+WORD = re.compile(r"\w+")
+URL = re.compile(r"https?://\S+")
+MASK = (1 << 64) - 1
+BINS = 8  # MinHash values per message, each one LSH bucket
+MIN_TEXT_LENGTH = 12  # Shorter normalized texts ("tail", "lol") aren't fingerprinted
+MIN_SHINGLE_WORDS = 5  # Near-duplicate detection is too noisy below this
+BUCKET_SCAN = 32  # Newest entries compared per bucket, bounding hot buckets of common phrases
+
+
+def normalize(text: str) -> List[str]:
+    """Lowercased words of a message, without links, punctuation or emoji."""
+    return WORD.findall(URL.sub(" ", text.lower()))
+
+
+def link_keys(text: str) -> FrozenSet[str]:
+    """Host and path of each link in a message, without query strings or trailing punctuation."""
+    if "http" not in text:
+        return frozenset()
+    keys = set()
+    for url in URL.findall(text):
+        parts = urlsplit(url.rstrip(").,!?>]\"'"))
+        keys.add(parts.netloc.lower() + parts.path.rstrip("/"))
+    return frozenset(keys)
+
+
+def shingles(words: List[str]) -> FrozenSet[int]:
+    """Hashes of the word pairs (bigrams) of a text."""
+    return frozenset(hash(f"{a} {b}") & MASK for a, b in zip(words, words[1:]))
+
+
+def minhash(hashes: Iterable[int]) -> Tuple[Optional[int], ...]:
+    """One-permutation MinHash: the smallest hash in each of ``BINS`` bins.
+
+    Each bin's minimum agrees between two sets with probability close to
+    their Jaccard similarity, at the cost of one pass over the hashes.
+    Empty bins are None.
+    """
+    mins = [None] * BINS
+    for h in hashes:
+        index = h % BINS
+        current = mins[index]
+        if current is None or h < current:
+            mins[index] = h
+    return tuple(mins)
+
+
+def image_key(url: str) -> str:
+    """An image URL without its query string, which Discord's CDN signs per request."""
+    return url.split("?", 1)[0]
+
+
+class Fingerprint:
+    """Content fingerprints of one message."""
+
+    __slots__ = ("exact", "shingles", "images", "links")
+
+    def __init__(self, exact: Optional[int], shingles: FrozenSet[int], images: Tuple[str, ...],
+                 links: FrozenSet[str] = frozenset()):
+        self.exact = exact  # Hash of the normalized text and its links
+        self.shingles = shingles  # Empty for texts too short to compare
+        self.images = images
+        self.links = links
+
+    def adds_to(self, other: "Fingerprint") -> bool:
+        """Whether this message has links or images that ``other`` lacks."""
+        return not self.links <= other.links or any(key not in other.images for key in self.images)
+
+
+class _Entry:
+    __slots__ = ("seq", "expires", "fingerprint", "buckets")
+
+    def __init__(self, seq: int, expires: float, fingerprint: Fingerprint,
+                 buckets: Tuple[Tuple[int, int], ...]):
+        self.seq = seq
+        self.expires = expires
+        self.fingerprint = fingerprint
+        self.buckets = buckets
+
+
+class DuplicateIndex:
+    """Recently notified messages, for spotting cross-posts and reposts.
+
+    A message is a duplicate of an earlier one if they share an image, or
+    if their normalized texts are identical or the Jaccard similarity of
+    their word bigrams is at least ``similarity`` and the new message adds
+    no links or images the earlier one lacked. The same caption with a
+    different link or slip image is a new pick, not a repost. Near-duplicate candidates come
+    from MinHash buckets: a message is only compared with entries that
+    share at least one MinHash value, newest first and at most
+    ``BUCKET_SCAN`` per bucket, and the similarity of each candidate is then
+    computed exactly.
+
+    Entries expire ``window`` seconds after they were added, and the oldest
+    are dropped beyond ``max_entries``. Entries are kept in insertion order,
+    so both kinds of eviction only ever remove from the front. The exact
+    and image indexes point at the newest entry for each key, so a repeat
+    stays caught for a full window after its latest copy, not its first.
+    """
+
+    def __init__(self, window: float = 300.0, max_entries: int = 10000, similarity: float = 0.5):
+        self.window = window
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self._entries: Deque[_Entry] = deque()
+        self._exact: Dict[int, _Entry] = {}
+        self._images: Dict[str, _Entry] = {}
+        self._buckets: Dict[Tuple[int, int], Deque[_Entry]] = {}
+        self.checked = 0
+        self.suppressed = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def fingerprint(self, text: str, image_keys: Iterable[str] = ()) -> Fingerprint:
+        """Fingerprint a message's text and images."""
+        words = normalize(text)
+        normalized = " ".join(words)
+        links = link_keys(text)
+        exact = hash((normalized, *sorted(links))) if len(normalized) >= MIN_TEXT_LENGTH else None
+        pairs = shingles(words) if len(words) >= MIN_SHINGLE_WORDS else frozenset()
+        return Fingerprint(exact, pairs, tuple(dict.fromkeys(image_keys)), links)
+
+    @staticmethod
+    def _bucket_keys(fingerprint: Fingerprint) -> Tuple[Tuple[int, int], ...]:
+        if not fingerprint.shingles:
+            return ()
+        return tuple((i, h) for i, h in enumerate(minhash(fingerprint.shingles)) if h is not None)
+
+    def _expire(self, now: float):
+        entries = self._entries
+        while entries and (entries[0].expires <= now or len(entries) > self.max_entries):
+            entry = entries.popleft()
+            fingerprint = entry.fingerprint
+            if self._exact.get(fingerprint.exact) is entry:
+                del self._exact[fingerprint.exact]
+            for key in fingerprint.images:
+                if self._images.get(key) is entry:
+                    del self._images[key]
+            for key in entry.buckets:
+                # The evicted entry is always the oldest in its buckets
+                bucket = self._buckets[key]
+                bucket.popleft()
+                if not bucket:
+                    del self._buckets[key]
+
+    def find(self, fingerprint: Fingerprint) -> Optional[int]:
+        """History sequence number of the message this one duplicates, if any."""
+        self._expire(time.monotonic())
+        self.checked += 1
+        entry = self._match(fingerprint)
+        if entry is None:
+            return None
+        self.suppressed += 1
+        return entry.seq
+
+    def _match(self, fingerprint: Fingerprint) -> Optional[_Entry]:
+        for key in fingerprint.images:
+            entry = self._images.get(key)
+            if entry is not None:
+                return entry
+        if fingerprint.exact is not None:
+            entry = self._exact.get(fingerprint.exact)
+            if entry is not None and not fingerprint.adds_to(entry.fingerprint):
+                return entry
+        shingles = fingerprint.shingles
+        seen = set()
+        for key in self._bucket_keys(fingerprint):
+            for entry in islice(reversed(self._buckets.get(key, ())), BUCKET_SCAN):
+                if entry.seq in seen:
+                    continue
+                seen.add(entry.seq)
+                other = entry.fingerprint.shingles
+                common = len(shingles & other)
+                if (common >= self.similarity * (len(shingles) + len(other) - common)
+                        and not fingerprint.adds_to(entry.fingerprint)):
+                    return entry
+        return None
+
+    def add(self, fingerprint: Fingerprint, seq: int):
+        """Remember a notified message under its history sequence number."""
+        buckets = self._bucket_keys(fingerprint)
+        entry = _Entry(seq, time.monotonic() + self.window, fingerprint, buckets)
+        self._entries.append(entry)
+        if fingerprint.exact is not None:
+            self._exact[fingerprint.exact] = entry
+        for key in fingerprint.images:
+            self._images[key] = entry
+        for key in buckets:
+            self._buckets.setdefault(key, deque()).append(entry)
+        if len(self._entries) > self.max_entries:
+            self._expire(time.monotonic())
+
+    @property
+    def suppression_rate(self) -> float:
+        """Share of checked messages that were suppressed as duplicates."""
+        return self.suppressed / self.checked if self.checked else 0.0
+
+    def stats(self) -> Dict:
+        """Counters for the status endpoint."""
+        return {
+            "entries": len(self._entries),
+            "checked": self.checked,
+            "suppressed": self.suppressed,
+            "suppression_rate": round(self.suppression_rate, 4)
+        }
@@ -0,0 +1,224 @@
+import asyncio
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+from ..models.enums import NotificationPriority, OverflowPolicy
+
+
+class DispatchItem:
+    """A notification waiting for delivery, with its timing record."""
+
+    __slots__ = ("id", "message", "title", "priority", "sound", "retry", "expire", "image_urls",
+                 "key", "attempts", "enqueued_at", "started_at", "finished_at", "merged")
+
+    def __init__(self, message: str, title: Optional[str] = None, priority: int = 0,
+                 sound: str = "pushover", image_urls: Optional[List[str]] = None,
+                 key: Optional[str] = None, id: Optional[str] = None,
+                 retry: Optional[int] = None, expire: Optional[int] = None):
+        self.id = id or uuid.uuid4().hex  # Idempotency key, stable across retries
+        self.message = message
+        self.title = title
+        self.priority = priority
+        self.sound = sound
+        self.retry = retry  # Emergency notifications only
+        self.expire = expire
+        self.image_urls = image_urls
+        self.key = key if key is not None else title
+        self.attempts = 0
+        self.enqueued_at = time.perf_counter()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.merged = 0
+
+    @property
+    def wait_time(self) -> Optional[float]:
+        """Seconds spent queued before a worker picked the item up."""
+        if self.started_at is None:
+            return None
+        return self.started_at - self.enqueued_at
+
+    @property
+    def delivery_time(self) -> Optional[float]:
+        """Seconds spent delivering the item."""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def merge(self, other: "DispatchItem"):
+        """Fold a later notification for the same key into this one."""
+        self.message = f"{self.message}\n\n{other.message}"
+        if other.image_urls:
+            self.image_urls = (self.image_urls or []) + other.image_urls
+        if int(other.priority) > int(self.priority):
+            self.priority, self.retry, self.expire = other.priority, other.retry, other.expire
+        self.merged += 1 + other.merged
+
+
+Deliver = Callable[[DispatchItem], Awaitable[None]]
+Discard = Callable[[DispatchItem], None]
+Merged = Callable[[DispatchItem], None]
+
+
+class NotificationDispatcher:
+    """Bounded notification queue drained by a pool of delivery workers.
+
+    Submitting only enqueues, so gateway event handlers return immediately
+    while images download and Pushover requests complete in the background.
+    When the queue is full the overflow policy decides whether to wait for
+    space, drop the oldest pending item, or merge into a pending item for
+    the same key.
+
+    EMERGENCY items skip the queue and the overflow policy: they go to an
+    unbounded lane with a worker of its own, so they are never stuck
+    behind a backlog or busy workers.
+    """
+
+    def __init__(self, deliver: Deliver, maxsize: int = 100, workers: int = 4,
+                 overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+                 on_discard: Optional[Discard] = None, on_merge: Optional[Merged] = None):
+        self._deliver = deliver
+        self._on_discard = on_discard  # Called for items dropped or merged away
+        self._on_merge = on_merge  # Called for a pending item that absorbed another
+        self.maxsize = maxsize
+        self.worker_count = workers
+        self.overflow_policy = OverflowPolicy(overflow_policy)
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._urgent: asyncio.Queue = asyncio.Queue()
+        self._pending: Dict[Optional[str], DispatchItem] = {}
+        self._workers: List[asyncio.Task] = []
+        self._busy = 0
+        self._busy_time = 0.0
+        self._started_at: Optional[float] = None
+
+        self.enqueued = 0
+        self.delivered = 0
+        self.failed = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.urgent = 0
+        self._total_wait = 0.0
+        self._total_delivery = 0.0
+        self._runs = 0
+        self._last_item: Optional[DispatchItem] = None
+
+    @property
+    def depth(self) -> int:
+        """Number of items waiting for a worker."""
+        return self._queue.qsize()
+
+    @property
+    def running(self) -> bool:
+        """Whether the delivery workers have been started."""
+        return bool(self._workers)
+
+    def start(self):
+        """Start the delivery workers on the running event loop."""
+        if self._workers:
+            return
+        self._started_at = time.perf_counter()
+        self._workers = [asyncio.create_task(self._worker(self._queue), name=f"notification-worker-{i}")
+                         for i in range(self.worker_count)]
+        self._workers.append(asyncio.create_task(self._worker(self._urgent),
+                                                 name="notification-worker-urgent"))
+
+    async def stop(self, timeout: float = 5.0):
+        """Give queued and in-flight items up to ``timeout`` seconds to finish, then stop the workers."""
+        if self._workers:
+            try:
+                # join() also waits for items a worker has taken but not finished
+                await asyncio.wait_for(
+                    asyncio.gather(self._urgent.join(), self._queue.join()), timeout)
+            except asyncio.TimeoutError:
+                print(f"Dropping {self.depth + self._urgent.qsize() + self._busy} "
+                      f"undelivered notifications on shutdown")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, item: DispatchItem):
+        """Queue a notification, applying the overflow policy when full."""
+        self.enqueued += 1
+        if int(item.priority) >= int(NotificationPriority.EMERGENCY.value):
+            self.urgent += 1
+            self._urgent.put_nowait(item)
+            return
+        if self._queue.full():
+            if self.overflow_policy == OverflowPolicy.COALESCE:
+                pending = self._pending.get(item.key)
+                if pending is not None:
+                    pending.merge(item)
+                    self.coalesced += 1
+                    # Record the merged payload before the absorbed item is forgotten
+                    if self._on_merge:
+                        self._on_merge(pending)
+                    if self._on_discard:
+                        self._on_discard(item)
+                    return
+                self._drop_oldest()
+            elif self.overflow_policy == OverflowPolicy.DROP_OLDEST:
+                self._drop_oldest()
+        self._pending[item.key] = item
+        await self._queue.put(item)
+
+    def _drop_oldest(self):
+        try:
+            oldest = self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        self._forget(oldest)
+        self._queue.task_done()
+        self.dropped += 1 + oldest.merged
+        print(f"Notification queue full, dropped: {oldest.title}")
+        if self._on_discard:
+            self._on_discard(oldest)
+
+    def _forget(self, item: DispatchItem):
+        if self._pending.get(item.key) is item:
+            del self._pending[item.key]
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            item = await queue.get()
+            self._forget(item)
+            self._busy += 1
+            item.started_at = time.perf_counter()
+            try:
+                await self._deliver(item)
+                self.delivered += 1 + item.merged
+            except Exception as e:
+                self.failed += 1 + item.merged
+                print(f"Error delivering notification: {e}")
+            finally:
+                item.finished_at = time.perf_counter()
+                self._busy -= 1
+                self._busy_time += item.delivery_time
+                self._total_wait += item.wait_time
+                self._total_delivery += item.delivery_time
+                self._runs += 1
+                self._last_item = item
+                queue.task_done()
+
+    def stats(self) -> Dict:
+        """Queue depth, worker utilisation and per-item timing summary."""
+        runs = self._runs
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+        capacity = elapsed * (self.worker_count + 1)  # Including the urgent lane
+        return {
+            "queue_depth": self.depth,
+            "queue_size": self.maxsize,
+            "overflow_policy": self.overflow_policy.value,
+            "workers": len(self._workers),
+            "busy_workers": self._busy,
+            "utilisation": round(self._busy_time / capacity, 4) if capacity else 0.0,
+            "enqueued": self.enqueued,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "urgent": self.urgent,
+            "avg_wait_ms": round(self._total_wait / runs * 1000, 3) if runs else None,
+            "avg_delivery_ms": round(self._total_delivery / runs * 1000, 3) if runs else None,
+            "last_wait_ms": round(self._last_item.wait_time * 1000, 3) if self._last_item else None,
+            "last_delivery_ms": round(self._last_item.delivery_time * 1000, 3) if self._last_item else None,
+        }
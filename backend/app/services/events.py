@@ -0,0 +1,76 @@
+import asyncio
+import json
+from typing import Any, Dict, Optional, Set, Tuple
+
+# (event id, encoded Server-Sent Event); None tells the subscriber it fell behind
+StreamEvent = Optional[Tuple[Optional[int], str]]
+
+
+def format_sse(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    """Encode one Server-Sent Event frame."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscription:
+    """One live-feed client with its own bounded event queue."""
+
+    def __init__(self, maxsize: int):
+        self.queue: "asyncio.Queue[StreamEvent]" = asyncio.Queue(maxsize=maxsize)
+        self.lagged = False
+
+    async def get(self, timeout: Optional[float] = None) -> StreamEvent:
+        """Wait for the next event; raises asyncio.TimeoutError after ``timeout``."""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class EventBroadcaster:
+    """Fan out monitor events to live-feed subscribers.
+
+    Each event is encoded once and pushed to every subscriber's bounded
+    queue without waiting. A subscriber whose queue is full is cut off
+    rather than slowing the monitor down; it reconnects and resumes from
+    its last event id.
+    """
+
+    def __init__(self, queue_size: int = 256):
+        self.queue_size = queue_size
+        self._subscribers: Set[Subscription] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        """Number of connected live-feed clients."""
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscription:
+        """Register a new live-feed client."""
+        subscription = Subscription(self.queue_size)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a live-feed client."""
+        self._subscribers.discard(subscription)
+
+    def publish(self, event: str, data: Dict, event_id: Optional[int] = None):
+        """Queue an event for every subscriber."""
+        if not self._subscribers:
+            return
+        frame = (event_id, format_sse(event, data, event_id))
+        for subscription in list(self._subscribers):
+            try:
+                subscription.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                self._drop(subscription)
+
+    def _drop(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+        subscription.lagged = True
+        # Make room for the wake-up marker so the stream notices and ends
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
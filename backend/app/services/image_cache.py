@@ -0,0 +1,212 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# Hosts serving Discord attachments and embed proxies; the same file is
+# reachable from either host, and its query string carries signing params
+# and, on the media proxy, the size to resize to.
+DISCORD_CDN_HOSTS = frozenset({"cdn.discordapp.com", "media.discordapp.net"})
+# Query parameters that change the image served, not just its signature
+DISCORD_SIZE_PARAMS = frozenset({"width", "height"})
+
+
+def cache_key(url: str) -> str:
+    """Normalize an image URL into a cache key.
+
+    Discord CDN URLs are keyed by path and size parameters, so reposts of
+    the same file through either host or with fresh signature params share
+    one entry while resized variants of it don't. Other URLs are keyed by
+    the full URL.
+    """
+    parts = urlsplit(url)
+    if parts.hostname in DISCORD_CDN_HOSTS:
+        size = sorted((name, value) for name, value in parse_qsl(parts.query)
+                      if name in DISCORD_SIZE_PARAMS)
+        return f"discord-cdn:{parts.path}?{urlencode(size)}" if size else f"discord-cdn:{parts.path}"
+    return url
+
+
+class _Entry:
+    __slots__ = ("data", "stored_at")
+
+    def __init__(self, data: bytes, stored_at: float):
+        self.data = data
+        self.stored_at = stored_at
+
+
+class ImageCache:
+    """Size-bounded LRU cache of downloaded images with a TTL.
+
+    Entries evicted from memory are optionally spilled to ``spill_dir`` and
+    read back on the next hit, which promotes them into memory again. Both
+    tiers are bounded in bytes. File reads, writes and deletes run on a
+    thread.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: float = 3600.0,
+                 spill_dir: Optional[str] = None, spill_max_bytes: int = 512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.spill_dir = spill_dir
+        self.spill_max_bytes = spill_max_bytes
+        self._memory: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._memory_bytes = 0
+        # key -> (file path, stored_at, size)
+        self._spilled: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()
+        self._disk_bytes = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def _expired(self, entry: _Entry, now: float) -> bool:
+        return self.ttl > 0 and now - entry.stored_at > self.ttl
+
+    async def get(self, url: str) -> Optional[bytes]:
+        """Return the cached image for ``url``, or None on a miss."""
+        key = cache_key(url)
+        now = time.monotonic()
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            if not self._expired(entry, now):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry.data
+            self._remove_memory(key)
+            self.expired += 1
+
+        spilled = self._spilled.get(key)
+        if spilled is not None:
+            path, stored_at, _ = spilled
+            self._remove_spilled(key, delete=False)
+            if self.ttl <= 0 or now - stored_at <= self.ttl:
+                try:
+                    data = await asyncio.to_thread(_read_file, path)
+                except OSError:
+                    data = None
+                await asyncio.to_thread(_unlink, path)
+                if data is not None:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    await self._store(key, data, stored_at)
+                    return data
+            else:
+                self.expired += 1
+                await asyncio.to_thread(_unlink, path)
+
+        self.misses += 1
+        return None
+
+    async def put(self, url: str, data: bytes):
+        """Cache an image body under the normalized key for ``url``."""
+        if not data:
+            return
+        await self._store(cache_key(url), bytes(data), time.monotonic())
+
+    async def _store(self, key: str, data: bytes, stored_at: float):
+        if len(data) > self.max_bytes:
+            return
+        self._remove_memory(key)
+        self._memory[key] = _Entry(data, stored_at)
+        self._memory_bytes += len(data)
+
+        while self._memory_bytes > self.max_bytes:
+            old_key, old = self._memory.popitem(last=False)
+            self._memory_bytes -= len(old.data)
+            self.evictions += 1
+            if self.spill_dir and not self._expired(old, time.monotonic()):
+                await self._spill(old_key, old)
+
+    async def _spill(self, key: str, entry: _Entry):
+        size = len(entry.data)
+        if size > self.spill_max_bytes:
+            return
+        evicted = []
+        while self._disk_bytes + size > self.spill_max_bytes and self._spilled:
+            evicted.append(self._remove_spilled(next(iter(self._spilled)), delete=False))
+        if evicted:
+            await asyncio.to_thread(_unlink_all, evicted)
+        path = os.path.join(self.spill_dir, hashlib.sha256(key.encode()).hexdigest())
+        try:
+            await asyncio.to_thread(_write_file, path, entry.data)
+        except OSError as e:
+            print(f"Error spilling cached image to disk: {e}")
+            return
+        self._remove_spilled(key, delete=False)
+        self._spilled[key] = (path, entry.stored_at, size)
+        self._disk_bytes += size
+
+    def _remove_memory(self, key: str):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= len(entry.data)
+
+    def _remove_spilled(self, key: str, delete: bool) -> Optional[str]:
+        """Forget a spilled entry; returns its file, which is deleted here only if ``delete``."""
+        spilled = self._spilled.pop(key, None)
+        if spilled is None:
+            return None
+        path, _, size = spilled
+        self._disk_bytes -= size
+        if delete:
+            _unlink(path)
+        return path
+
+    def clear(self):
+        """Drop every cached entry, including spilled files."""
+        for key in list(self._spilled):
+            self._remove_spilled(key, delete=True)
+        self._memory.clear()
+        self._memory_bytes = 0
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size of both tiers."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "entries": len(self._memory),
+            "bytes": self._memory_bytes,
+            "max_bytes": self.max_bytes,
+            "spilled_entries": len(self._spilled),
+            "spilled_bytes": self._disk_bytes,
+        }
+
+
+def _read_file(path: str) -> bytes:
+    # A hit is promoted into memory as bytes, so a plain read is all it needs
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _write_file(path: str, data: bytes):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _unlink(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _unlink_all(paths: List[str]):
+    for path in paths:
+        _unlink(path)
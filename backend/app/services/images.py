@@ -0,0 +1,201 @@
+import asyncio
+import importlib.util
+import io
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+from . import metrics
+
+# (magic bytes, content type, extension); WebP is checked separately
+SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png", "png"),
+    (b"GIF87a", "image/gif", "gif"),
+    (b"GIF89a", "image/gif", "gif"),
+    (b"BM", "image/bmp", "bmp"),
+)
+SNIFF_BYTES = 12  # Enough for every signature above
+JPEG_QUALITIES = (85, 75, 65, 50, 35)
+
+
+def sniff(data: bytes) -> Tuple[str, str]:
+    """Content type and file extension of an image, from its first bytes.
+
+    Unknown formats are reported as JPEG, which is what was always sent.
+    """
+    for magic, content_type, extension in SIGNATURES:
+        if data.startswith(magic):
+            return content_type, extension
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp", "webp"
+    return "image/jpeg", "jpg"
+
+
+class ProcessedImage:
+    """An image ready to attach, with its real type."""
+
+    __slots__ = ("data", "content_type", "filename")
+
+    def __init__(self, data: bytes, content_type: str, extension: str):
+        self.data = data
+        self.content_type = content_type
+        self.filename = f"image.{extension}"
+
+    @classmethod
+    def of(cls, data: bytes) -> "ProcessedImage":
+        return cls(data, *sniff(data))
+
+
+def _encode_jpeg(image, quality: int) -> bytes:
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def shrink(data: bytes, max_bytes: int, max_dimension: int) -> Tuple[bytes, Dict[str, float]]:
+    """Downscale and re-encode an image to fit ``max_bytes``; runs in a worker process.
+
+    Images larger than ``max_dimension`` on either side are scaled down.
+    The result is encoded as JPEG at decreasing quality, halving the size
+    again if even the lowest quality is too large. Animated images are
+    returned unchanged, and so is any image the re-encoding doesn't make
+    smaller. Returns the image and the seconds spent decoding, resizing
+    and encoding.
+    """
+    # Imported here so only the worker processes load Pillow
+    from PIL import Image
+
+    timings = {"decode": 0.0, "resize": 0.0, "encode": 0.0}
+    start = time.perf_counter()
+    image = Image.open(io.BytesIO(data))
+    if getattr(image, "is_animated", False):
+        return data, timings
+    image.load()
+    now = time.perf_counter()
+    timings["decode"] = now - start
+
+    start = now
+    resized = max(image.size) > max_dimension
+    if resized:
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    if image.mode != "RGB":
+        # JPEG has no alpha; flatten transparent areas onto white
+        background = Image.new("RGB", image.size, "white")
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        image = background
+    now = time.perf_counter()
+    timings["resize"] = now - start
+
+    start = now
+    best = None
+    while True:
+        for quality in JPEG_QUALITIES:
+            encoded = _encode_jpeg(image, quality)
+            if best is None or len(encoded) < len(best):
+                best = encoded
+            if len(encoded) <= max_bytes:
+                break
+        if len(best) <= max_bytes or min(image.size) <= 64:
+            break
+        image = image.resize((image.width // 2, image.height // 2), Image.LANCZOS)
+        resized = True
+    timings["encode"] = time.perf_counter() - start
+
+    # Keep the original when it already fits and re-encoding wouldn't help
+    if not resized and len(data) <= max_bytes and len(best) >= len(data):
+        return data, timings
+    return best, timings
+
+
+class ImageProcessor:
+    """Downscale and recompress image attachments in a pool of processes.
+
+    Images of at least ``min_bytes`` are decoded and re-encoded to fit
+    ``max_bytes`` in a ``ProcessPoolExecutor``, so decoding never runs on
+    the event loop. Smaller images, and every image when Pillow isn't
+    installed, are only sniffed for their real type. Pillow is optional
+    and is only ever imported by the worker processes; ``start`` checks
+    that it is installed. An image that fails to process is sent as
+    downloaded.
+    """
+
+    def __init__(self, max_bytes: int = 1_000_000, max_dimension: int = 2048,
+                 min_bytes: int = 256 * 1024, workers: int = 2):
+        self.max_bytes = max_bytes
+        self.max_dimension = max_dimension
+        self.min_bytes = min_bytes
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.processed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._seconds = {"queue": 0.0, "decode": 0.0, "resize": 0.0, "encode": 0.0}
+
+    @property
+    def enabled(self) -> bool:
+        """Whether images are resized, not just sniffed."""
+        return self._pool is not None
+
+    def start(self):
+        """Start the worker processes, ahead of the first image."""
+        if self._pool is not None:
+            return
+        if importlib.util.find_spec("PIL") is None:
+            print("Pillow is not installed; images will be sent without resizing")
+        else:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            # Processes are spawned on demand; one trivial task each starts them all now
+            for _ in range(self.workers):
+                self._pool.submit(int)
+
+    def stop(self):
+        """Shut down the worker processes, abandoning queued work."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def process(self, data: bytes) -> ProcessedImage:
+        """Fit an image to the byte budget, off the event loop."""
+        if self._pool is None or len(data) < self.min_bytes:
+            self.skipped += 1
+            return ProcessedImage.of(data)
+
+        start = time.perf_counter()
+        try:
+            result, timings = await asyncio.get_running_loop().run_in_executor(
+                self._pool, shrink, data, self.max_bytes, self.max_dimension)
+        except Exception as e:
+            self.failed += 1
+            print(f"Error processing image, sending it unchanged: {e}")
+            return ProcessedImage.of(data)
+        elapsed = time.perf_counter() - start
+        metrics.IMAGE_PROCESS_SECONDS.observe(elapsed)
+
+        self.processed += 1
+        self.bytes_in += len(data)
+        self.bytes_out += len(result)
+        metrics.IMAGE_BYTES_SAVED.inc(max(0, len(data) - len(result)))
+        self._seconds["queue"] += elapsed - sum(timings.values())
+        for stage, seconds in timings.items():
+            self._seconds[stage] += seconds
+        return ProcessedImage.of(result)
+
+    def stats(self) -> Dict:
+        """Counts, bytes saved and average milliseconds per stage, for the status endpoint."""
+        processed = self.processed
+        return {
+            "enabled": self.enabled,
+            "processed": processed,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+            "avg_ms": {stage: round(seconds / processed * 1000, 3) if processed else None
+                       for stage, seconds in self._seconds.items()}
+        }
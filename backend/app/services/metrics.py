@@ -0,0 +1,283 @@
+import cProfile
+import io
+import math
+import pstats
+import random
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# Buckets in seconds, from single microseconds for in-process work up to
+# tens of seconds for network calls
+FAST_BUCKETS = (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+NETWORK_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Registry:
+    """Collection of metrics rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: List = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """All metrics in Prometheus text exposition format 0.0.4."""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            metric.collect(lines)
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counter and histogram state by name; gauges describe only their own process."""
+        return {metric.name: metric.state() for metric in self._metrics
+                if metric.type != "gauge"}
+
+    def merge(self, changes: Dict[str, Any]):
+        """Add what another process recorded, as returned by ``changes``."""
+        for metric in self._metrics:
+            change = changes.get(metric.name)
+            if change is not None:
+                metric.merge(change)
+
+
+def changes(current: Dict[str, Any], previous: Dict[str, Any]) -> Dict[str, Any]:
+    """What was recorded between two ``Registry.snapshot`` calls, leaving out unchanged metrics."""
+    result = {}
+    for name, state in current.items():
+        before = previous.get(name)
+        if isinstance(state, tuple):
+            counts, total = state
+            if before is not None:
+                counts = [now - then for now, then in zip(counts, before[0])]
+                total -= before[1]
+            if any(counts):
+                result[name] = (counts, total)
+        else:
+            change = state - (before or 0)
+            if change:
+                result[name] = change
+    return result
+
+
+REGISTRY = Registry()
+
+
+class Counter:
+    """Monotonically increasing count."""
+
+    __slots__ = ("name", "help", "value")
+    type = "counter"
+
+    def __init__(self, name: str, help: str, registry: Registry = REGISTRY):
+        self.name = name
+        self.help = help
+        self.value = 0
+        registry.register(self)
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+    def state(self) -> int:
+        return self.value
+
+    def merge(self, amount: int):
+        self.value += amount
+
+    def collect(self, lines: List[str]):
+        lines.append(f"{self.name} {_format(self.value)}")
+
+
+class Gauge:
+    """Value that can go up and down, optionally read from a callback at scrape time."""
+
+    __slots__ = ("name", "help", "value", "_function")
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, registry: Registry = REGISTRY):
+        self.name = name
+        self.help = help
+        self.value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+        registry.register(self)
+
+    def set(self, value: float):
+        self.value = value
+
+    def set_function(self, function: Optional[Callable[[], float]]):
+        """Read the value from ``function`` whenever metrics are collected."""
+        self._function = function
+
+    def collect(self, lines: List[str]):
+        value = self.value
+        if self._function is not None:
+            try:
+                value = float(self._function())
+            except Exception:
+                value = math.nan
+        lines.append(f"{self.name} {_format(value)}")
+
+
+class Histogram:
+    """Distribution of observations over fixed buckets.
+
+    Bucket counts live in a list sized at creation, so ``observe`` is a
+    bisect and two additions with no allocation. Counts are made cumulative
+    only when collected.
+    """
+
+    __slots__ = ("name", "help", "buckets", "_counts", "_sum")
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = NETWORK_BUCKETS,
+                 registry: Registry = REGISTRY):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self._sum = 0.0
+        registry.register(self)
+
+    def observe(self, value: float):
+        self._counts[bisect_left(self.buckets, value)] += 1
+        self._sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    def state(self):
+        return tuple(self._counts), self._sum
+
+    def merge(self, change):
+        counts, total = change
+        for i, count in enumerate(counts):
+            self._counts[i] += count
+        self._sum += total
+
+    def collect(self, lines: List[str]):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), self._counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{_format(bound)}"}} {cumulative}')
+        lines.append(f"{self.name}_sum {repr(self._sum)}")
+        lines.append(f"{self.name}_count {cumulative}")
+
+
+class SamplingProfiler:
+    """Profile a random sample of calls into one accumulated cProfile.
+
+    Only one sampled call is profiled at a time, since profiling an async
+    handler also captures whatever else runs while it awaits.
+    """
+
+    def __init__(self, sample_rate: float = 0.0):
+        self.sample_rate = sample_rate
+        self.samples = 0
+        self._profile = cProfile.Profile()
+        self._active = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def configure(self, sample_rate: float, reset: bool = False):
+        """Change the sample rate (0 disables profiling), optionally discarding collected data."""
+        self.sample_rate = sample_rate
+        if reset:
+            self.samples = 0
+            self._profile = cProfile.Profile()
+
+    def start(self) -> bool:
+        """Begin profiling this call if it is sampled; returns whether it was."""
+        if self._active or random.random() >= self.sample_rate:
+            return False
+        self._active = True
+        self.samples += 1
+        self._profile.enable()
+        return True
+
+    def stop(self):
+        self._profile.disable()
+        self._active = False
+
+    def report(self, limit: int = 40, sort: str = "cumulative") -> str:
+        """The top functions of the accumulated profile as text."""
+        if not self.samples:
+            return "No samples collected.\n"
+        out = io.StringIO()
+        out.write(f"{self.samples} sampled calls\n")
+        pstats.Stats(self._profile, stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+MESSAGES_RECEIVED = Counter(
+    "discord_monitor_messages_received_total",
+    "Messages from monitored users in monitored channels")
+MESSAGES_MATCHED = Counter(
+    "discord_monitor_messages_matched_total", "Messages that passed the filters")
+MESSAGES_FILTERED = Counter(
+    "discord_monitor_messages_filtered_total", "Messages rejected by the filters")
+MESSAGES_FAILED = Counter(
+    "discord_monitor_messages_failed_total", "Messages whose processing raised an error")
+IMAGES_SENT = Counter(
+    "discord_monitor_images_sent_total", "Image notifications accepted by Pushover")
+PUSHOVER_FAILURES = Counter(
+    "discord_monitor_pushover_failures_total", "Pushover requests that failed or were rejected")
+MESSAGES_EDITED = Counter(
+    "discord_monitor_messages_edited_total", "Edits to messages from monitored users")
+MESSAGES_DELETED = Counter(
+    "discord_monitor_messages_deleted_total", "Deleted messages in monitored channels")
+EDIT_FOLLOWUPS = Counter(
+    "discord_monitor_edit_followups_total",
+    "Follow-up notifications for attachments added to a matched message")
+IMAGE_BYTES_SAVED = Counter(
+    "discord_monitor_image_bytes_saved_total", "Upload bytes saved by resizing images")
+MESSAGES_BACKFILLED = Counter(
+    "discord_monitor_messages_backfilled_total",
+    "Messages in monitored channels fetched after a reconnect")
+DUPLICATES_SUPPRESSED = Counter(
+    "discord_monitor_duplicates_suppressed_total",
+    "Matched messages not notified because they duplicated a recent one")
+
+FILTER_SECONDS = Histogram(
+    "discord_monitor_filter_seconds", "Time to evaluate the filters for one message",
+    FAST_BUCKETS)
+HISTORY_SECONDS = Histogram(
+    "discord_monitor_history_insert_seconds",
+    "Time to record one message in history, the store buffer and the live feed",
+    FAST_BUCKETS)
+IMAGE_FETCH_SECONDS = Histogram(
+    "discord_monitor_image_fetch_seconds",
+    "Time until an image download returns its headers; the body streams into the POST")
+IMAGE_PROCESS_SECONDS = Histogram(
+    "discord_monitor_image_process_seconds",
+    "Time to downscale and re-encode one image in the process pool, including queueing")
+BACKFILL_SECONDS = Histogram(
+    "discord_monitor_backfill_seconds",
+    "Time to fetch the messages missed while disconnected from every monitored channel")
+PUSHOVER_POST_SECONDS = Histogram(
+    "discord_monitor_pushover_post_seconds", "Duration of one Pushover API request")
+
+CONNECTED = Gauge("discord_monitor_connected", "1 while the gateway connection is up")
+DISPATCH_QUEUE_DEPTH = Gauge(
+    "discord_monitor_dispatch_queue_depth", "Notifications waiting for a delivery worker")
+OUTBOX_PENDING = Gauge(
+    "discord_monitor_outbox_pending", "Notifications not yet accepted by Pushover")
+STREAM_SUBSCRIBERS = Gauge(
+    "discord_monitor_stream_subscribers", "Connected live-feed clients")
+DEDUP_SUPPRESSION_RATIO = Gauge(
+    "discord_monitor_dedup_suppression_ratio",
+    "Share of matched messages suppressed as duplicates since startup")
@@ -0,0 +1,224 @@
+import asyncio
+import heapq
+import json
+import os
+import random
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from .dispatch import DispatchItem
+from .pushover import PushoverError, PushoverRateLimit, is_retryable
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    last_error TEXT
+);
+"""
+
+Submit = Callable[[DispatchItem], Awaitable[None]]
+
+
+def _payload(item: DispatchItem) -> str:
+    return json.dumps({
+        "message": item.message,
+        "title": item.title,
+        "priority": item.priority,
+        "sound": item.sound,
+        "retry": item.retry,
+        "expire": item.expire,
+        "image_urls": item.image_urls,
+        "key": item.key
+    })
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter.
+
+    The n-th retry waits a random time between zero and
+    ``base_delay * 2**(n-1)``, capped at ``max_delay``, so clients that fail
+    together don't retry in lockstep.
+    """
+
+    def __init__(self, max_attempts: int = 8, base_delay: float = 1.0, max_delay: float = 300.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before retry number ``attempt`` (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class NotificationOutbox:
+    """Durable record of notifications that have not been delivered yet.
+
+    Every notification is written here before it is queued for delivery
+    and removed once Pushover accepts it. A transient failure (network
+    error, 5xx or 429) reschedules it with jittered backoff. Any other
+    failure, or running out of attempts, gives it up. If only some images
+    of a notification went through, the retry resends just the rest. Rows
+    left over from a previous run are queued again on start.
+
+    Without a ``path`` the outbox still retries but keeps nothing on disk.
+    """
+
+    def __init__(self, submit: Submit, path: Optional[str] = None,
+                 policy: Optional[RetryPolicy] = None,
+                 rate_limit: Optional[PushoverRateLimit] = None):
+        self._submit = submit
+        self.path = path
+        self.policy = policy or RetryPolicy()
+        self.rate_limit = rate_limit
+        self._items: Dict[str, DispatchItem] = {}
+        self._due: List[Tuple[float, str]] = []  # (unix time, item id) heap of retries
+        self._wakeup = asyncio.Event()
+        self._retrier: Optional[asyncio.Task] = None
+        # sqlite3 connections are bound to their thread; one executor per start()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._conn: Optional[sqlite3.Connection] = None
+
+        self.recovered = 0
+        self.retried = 0
+        self.given_up = 0
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _write(self, sql: str, params: Tuple):
+        """Queue a write on the outbox thread without waiting for it."""
+        if self.path and self._executor is not None:
+            asyncio.get_running_loop().run_in_executor(self._executor, self._execute, sql, params)
+
+    def _execute(self, sql: str, params: Tuple):
+        try:
+            with self._conn:
+                self._conn.execute(sql, params)
+        except sqlite3.Error as e:
+            print(f"Error writing notification outbox: {e}")
+
+    async def start(self):
+        """Open the outbox, queue leftover notifications and start the retry task."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outbox")
+        if self.path:
+            rows = await self._run(self._open)
+            # The file is the record of what is pending, including after a restart in-process
+            self._items.clear()
+            self._due.clear()
+            for item_id, payload, attempts in rows:
+                item = DispatchItem(**json.loads(payload), id=item_id)
+                item.attempts = attempts
+                self._items[item.id] = item
+            if rows:
+                self.recovered += len(rows)
+                print(f"Resending {len(rows)} notifications left in the outbox")
+            for item_id, _, _ in rows:
+                await self._submit(self._items[item_id])
+        self._retrier = asyncio.create_task(self._retry_loop(), name="notification-retry")
+
+    def _open(self) -> List[Tuple[str, str, int]]:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        self._conn = conn
+        return conn.execute(
+            "SELECT id, payload, attempts FROM outbox ORDER BY next_attempt"
+        ).fetchall()
+
+    async def stop(self):
+        """Stop retrying; undelivered notifications stay on disk for the next start."""
+        if self._retrier is not None:
+            self._retrier.cancel()
+            await asyncio.gather(self._retrier, return_exceptions=True)
+            self._retrier = None
+        if self._conn is not None:
+            await self._run(self._conn.close)
+            self._conn = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def add(self, item: DispatchItem):
+        """Record a notification before it is queued for delivery."""
+        self._items[item.id] = item
+        if self.path:
+            await self._run(
+                self._execute,
+                "INSERT OR IGNORE INTO outbox (id, payload, attempts, next_attempt) VALUES (?, ?, ?, ?)",
+                (item.id, _payload(item), item.attempts, time.time())
+            )
+
+    def update(self, item: DispatchItem):
+        """Record a pending notification's payload again after it changed, e.g. by a merge."""
+        if item.id in self._items:
+            self._write("UPDATE outbox SET payload = ? WHERE id = ?", (_payload(item), item.id))
+
+    def discard(self, item: DispatchItem):
+        """Forget a notification that was delivered, dropped or merged away."""
+        if self._items.pop(item.id, None) is not None:
+            self._write("DELETE FROM outbox WHERE id = ?", (item.id,))
+
+    def delivered(self, item: DispatchItem):
+        """Mark a notification as accepted by Pushover."""
+        self.discard(item)
+
+    def failed(self, item: DispatchItem, error: BaseException):
+        """Schedule a retry for a transient failure, or give the notification up."""
+        if item.id not in self._items:
+            return
+        item.attempts += 1
+        if not is_retryable(error) or item.attempts >= self.policy.max_attempts:
+            self.given_up += 1
+            print(f"Giving up on notification {item.title!r} after {item.attempts} attempts: {error}")
+            self.discard(item)
+            return
+
+        if isinstance(error, PushoverError) and error.pending_images:
+            item.image_urls = error.pending_images
+        delay = self.policy.delay(item.attempts)
+        if self.rate_limit is not None:
+            delay = max(delay, self.rate_limit.retry_after())
+        due = time.time() + delay
+        heapq.heappush(self._due, (due, item.id))
+        self._wakeup.set()
+        self._write(
+            "UPDATE outbox SET payload = ?, attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?",
+            (_payload(item), item.attempts, due, str(error), item.id)
+        )
+
+    async def _retry_loop(self):
+        while True:
+            timeout = max(0.0, self._due[0][0] - time.time()) if self._due else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            now = time.time()
+            while self._due and self._due[0][0] <= now:
+                _, item_id = heapq.heappop(self._due)
+                item = self._items.get(item_id)
+                if item is None:
+                    continue
+                self.retried += 1
+                item.enqueued_at = time.perf_counter()
+                item.started_at = item.finished_at = None
+                await self._submit(item)
+
+    def stats(self) -> Dict:
+        """Retry counters for the status endpoint."""
+        return {
+            "pending": len(self._items),
+            "retry_scheduled": len(self._due),
+            "recovered": self.recovered,
+            "retried": self.retried,
+            "given_up": self.given_up
+        }
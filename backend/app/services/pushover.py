@@ -1,6 +1,108 @@
 import aiohttp
-from typing import Optional, List
+import time
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, Optional, List, Union
 import asyncio
+from .image_cache import ImageCache
+from .images import SNIFF_BYTES, ImageProcessor, ProcessedImage, sniff
+from . import metrics
+
+PUSHOVER_API_URL = "https://api.pushover.net/1/messages.json"
+# Pushover rejects attachments larger than 2.5 MB
+PUSHOVER_ATTACHMENT_LIMIT = 2_621_440
+# Largest download accepted for resizing to fit the attachment limit
+PROCESS_INPUT_LIMIT = 25 * 1024 * 1024
+# Pushover requires retry and expire for emergency notifications
+EMERGENCY_PRIORITY = 2
+EMERGENCY_RETRY = 60
+EMERGENCY_EXPIRE = 3600
+
+class PushoverError(Exception):
+    """A notification that Pushover did not accept.
+
+    ``status`` is the HTTP status when Pushover answered. ``pending_images``
+    lists the image notifications still undelivered when only some failed.
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None,
+                 pending_images: Optional[List[str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.pending_images = pending_images
+
+def _form_fields(data: Dict[str, Any]) -> Dict[str, str]:
+    """Request fields as Pushover expects them, with enums such as the priority sent by value."""
+    return {key: str(value.value if isinstance(value, Enum) else value)
+            for key, value in data.items()}
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether a failed send may succeed if repeated.
+
+    Network errors, timeouts, 5xx and 429 are transient; other 4xx
+    responses mean the request itself was rejected.
+    """
+    if isinstance(error, PushoverError):
+        if error.status is not None:
+            return error.status == 429 or error.status >= 500
+        return error.__cause__ is not None and is_retryable(error.__cause__)
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError))
+
+class PushoverRateLimit:
+    """Application quota as last reported by Pushover's ``X-Limit-App-*`` headers.
+
+    A 429 response starts an exponential backoff that is cleared by the next
+    accepted request.
+    """
+
+    def __init__(self, max_backoff: float = 300.0):
+        self.max_backoff = max_backoff
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset: Optional[int] = None  # Unix time the quota renews
+        self.throttled = 0
+        self._backoff = 0.0
+        self._throttled_until = 0.0
+
+    @property
+    def fraction_remaining(self) -> Optional[float]:
+        """Share of the quota left, or None until Pushover has reported it."""
+        if not self.limit or self.remaining is None:
+            return None
+        return self.remaining / self.limit
+
+    def retry_after(self) -> float:
+        """Seconds to hold back non-urgent requests after being throttled."""
+        return max(0.0, self._throttled_until - time.monotonic())
+
+    def update(self, response: aiohttp.ClientResponse):
+        """Record the quota headers and status of a Pushover response."""
+        headers = response.headers
+        try:
+            if "X-Limit-App-Limit" in headers:
+                self.limit = int(headers["X-Limit-App-Limit"])
+            if "X-Limit-App-Remaining" in headers:
+                self.remaining = int(headers["X-Limit-App-Remaining"])
+            if "X-Limit-App-Reset" in headers:
+                self.reset = int(headers["X-Limit-App-Reset"])
+        except ValueError:
+            pass
+        if response.status == 429:
+            self.throttled += 1
+            self._backoff = min(max(self._backoff * 2, 1.0), self.max_backoff)
+            self._throttled_until = time.monotonic() + self._backoff
+            print(f"Pushover rate limit hit; holding notifications for {self._backoff:.0f}s")
+        elif response.status < 500:
+            self._backoff = 0.0
+
+    def stats(self) -> Dict:
+        """Quota summary for the status endpoint."""
+        return {
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "reset": self.reset,
+            "throttled": self.throttled,
+            "retry_after": round(self.retry_after(), 1)
+        }
 
 async def send_pushover_notification(
     message: str,
@@ -9,10 +111,23 @@ async def send_pushover_notification(
     title: Optional[str] = None,
     priority: int = 0,
     sound: str = "pushover",
-    image_urls: Optional[List[str]] = None
+    image_urls: Optional[List[str]] = None,
+    session: Optional[aiohttp.ClientSession] = None,
+    api_url: str = PUSHOVER_API_URL,
+    max_concurrent_images: int = 4,
+    image_cache: Optional[ImageCache] = None,
+    rate_limit: Optional[PushoverRateLimit] = None,
+    image_processor: Optional[ImageProcessor] = None,
+    retry: Optional[int] = None,
+    expire: Optional[int] = None
 ) -> None:
     """Send a notification via Pushover with optional image attachments.
-    
+
+    Images are fetched and uploaded concurrently, up to
+    ``max_concurrent_images`` at a time. Without an image processor each
+    body is streamed straight from the download into the upload rather
+    than buffered in memory; with one, it is downloaded whole and resized.
+
     Args:
         message: The main notification message
         user_key: Pushover user key
@@ -21,57 +136,321 @@ async def send_pushover_notification(
         priority: Message priority (-2 to 2)
         sound: Notification sound to play
         image_urls: Optional list of image URLs to attach
+        session: Optional shared session; a temporary one is opened if omitted
+        api_url: Pushover messages endpoint
+        max_concurrent_images: Maximum number of images in flight at once
+        image_cache: Optional cache consulted before downloading each image
+        rate_limit: Optional quota tracker updated from every response
+        image_processor: Optional stage that downsizes images before upload
+        retry: Seconds between repeats of an emergency notification
+        expire: Seconds after which an emergency notification stops repeating
+
+    Raises:
+        PushoverError: Pushover rejected the notification or one of its images
+        aiohttp.ClientError: Pushover could not be reached
     """
-    async with aiohttp.ClientSession() as session:
-        data = {
-            "token": api_token,
-            "user": user_key,
-            "message": message,
-            "priority": priority,
-            "sound": sound
-        }
-        if title:
-            data["title"] = title
-            
+    data = {
+        "token": api_token,
+        "user": user_key,
+        "message": message,
+        "priority": priority,
+        "sound": sound
+    }
+    if title:
+        data["title"] = title
+    if int(priority) == EMERGENCY_PRIORITY:
+        data["retry"] = retry or EMERGENCY_RETRY
+        data["expire"] = expire or EMERGENCY_EXPIRE
+    # Text and image posts send the same fields
+    data = _form_fields(data)
+
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            await _send(session, api_url, data, image_urls, max_concurrent_images,
+                        image_cache, rate_limit, image_processor)
+    else:
+        await _send(session, api_url, data, image_urls, max_concurrent_images,
+                    image_cache, rate_limit, image_processor)
+
+async def _send(
+    session: aiohttp.ClientSession,
+    api_url: str,
+    data: Dict[str, str],
+    image_urls: Optional[List[str]],
+    max_concurrent_images: int,
+    image_cache: Optional[ImageCache],
+    rate_limit: Optional[PushoverRateLimit] = None,
+    image_processor: Optional[ImageProcessor] = None
+) -> None:
+    if not image_urls:
+        # Send text-only notification
+        start = time.perf_counter()
+        try:
+            async with session.post(api_url, data=data) as response:
+                if rate_limit is not None:
+                    rate_limit.update(response)
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise PushoverError(f"Pushover returned {response.status}: {error_text}",
+                                        status=response.status)
+        except Exception:
+            metrics.PUSHOVER_FAILURES.inc()
+            raise
+        finally:
+            metrics.PUSHOVER_POST_SECONDS.observe(time.perf_counter() - start)
+        return
+
+    # Send a notification for each image, several at a time
+    semaphore = asyncio.Semaphore(max(1, max_concurrent_images))
+
+    async def send_limited(image_url: str):
+        async with semaphore:
+            await _send_image(session, api_url, data, image_url, image_cache, rate_limit,
+                              image_processor)
+
+    results = await asyncio.gather(*(send_limited(url) for url in image_urls),
+                                   return_exceptions=True)
+    failed = [(url, result) for url, result in zip(image_urls, results)
+              if isinstance(result, BaseException)]
+    if failed:
+        # Report which images are still owed so a retry skips the ones that went through
+        first = failed[0][1]
+        error = PushoverError(
+            f"{len(failed)} of {len(image_urls)} image notifications failed: {first}",
+            status=first.status if isinstance(first, PushoverError) else None,
+            pending_images=[url for url, _ in failed]
+        )
+        raise error from first
+
+async def _send_image(
+    session: aiohttp.ClientSession,
+    api_url: str,
+    data: Dict[str, str],
+    image_url: str,
+    image_cache: Optional[ImageCache] = None,
+    rate_limit: Optional[PushoverRateLimit] = None,
+    image_processor: Optional[ImageProcessor] = None
+) -> None:
+    """Download one image and send it as its own Pushover notification.
+
+    Without an image processor the body is streamed into the upload. With
+    one, it is downloaded whole, resized to the processor's budget, and
+    the result is what gets cached. Images that cannot be downloaded or
+    are too large are skipped; failures to reach the CDN or Pushover are
+    raised.
+    """
+    if image_cache is not None:
+        cached = await image_cache.get(image_url)
+        if cached is not None:
+            # Cached images were already processed when they were stored
+            await _post_image(session, api_url, data, ProcessedImage.of(cached), rate_limit)
+            return
+
+    limit = PROCESS_INPUT_LIMIT if image_processor is not None else PUSHOVER_ATTACHMENT_LIMIT
+    start = time.perf_counter()
+    async with session.get(image_url) as image_response:
+        metrics.IMAGE_FETCH_SECONDS.observe(time.perf_counter() - start)
+        if image_response.status != 200:
+            print(f"Failed to download image: {image_url}")
+            return
+        if (image_response.content_length or 0) > limit:
+            print(f"Skipping image over {limit} bytes: {image_url}")
+            return
+
+        head = await _read_head(image_response.content)
+        if image_processor is None:
+            # Stream the body from the download straight into the upload,
+            # keeping a copy of the chunks only when it is going to be cached
+            chunks: Optional[List[bytes]] = [] if image_cache is not None else None
+            body = _limit_stream(image_response.content, limit, chunks, head)
+            try:
+                await _post_image(session, api_url, data, body, rate_limit, *sniff(head))
+            except ValueError as e:
+                print(f"Skipping image {image_url}: {e}")
+                return
+            if chunks is not None:
+                await image_cache.put(image_url, b"".join(chunks))
+            return
+
         try:
-            if image_urls:
-                # Send a notification for each image
-                for image_url in image_urls:
-                    try:
-                        # Download image
-                        async with session.get(image_url) as image_response:
-                            if image_response.status == 200:
-                                image_data = await image_response.read()
-                                
-                                # Prepare form data with image
-                                form = aiohttp.FormData()
-                                for key, value in data.items():
-                                    form.add_field(key, str(value))
-                                form.add_field('attachment', image_data, 
-                                             filename='image.jpg',
-                                             content_type='image/jpeg')
-                                
-                                # Send notification with image
-                                async with session.post(
-                                    "https://api.pushover.net/1/messages.json",
-                                    data=form
-                                ) as response:
-                                    if response.status != 200:
-                                        error_text = await response.text()
-                                        print(f"Error sending image notification: {error_text}")
-                            else:
-                                print(f"Failed to download image: {image_url}")
-                    except Exception as e:
-                        print(f"Error processing image {image_url}: {e}")
-            else:
-                # Send text-only notification
-                async with session.post(
-                    "https://api.pushover.net/1/messages.json",
-                    data=data
-                ) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        print(f"Error sending notification: {error_text}")
-        
-        except Exception as e:
-            print(f"Error sending notification: {e}") 
\ No newline at end of file
+            downloaded = b"".join([chunk async for chunk in
+                                   _limit_stream(image_response.content, limit, head=head)])
+        except ValueError as e:
+            print(f"Skipping image {image_url}: {e}")
+            return
+
+    # The download's connection is released before the image is processed
+    image = await image_processor.process(downloaded)
+    if len(image.data) > PUSHOVER_ATTACHMENT_LIMIT:
+        print(f"Skipping image still over {PUSHOVER_ATTACHMENT_LIMIT} bytes after processing: {image_url}")
+        return
+    if image_cache is not None:
+        await image_cache.put(image_url, image.data)
+    await _post_image(session, api_url, data, image, rate_limit)
+
+async def _post_image(
+    session: aiohttp.ClientSession,
+    api_url: str,
+    data: Dict[str, str],
+    image: Union[ProcessedImage, AsyncIterator[bytes]],
+    rate_limit: Optional[PushoverRateLimit] = None,
+    content_type: str = "image/jpeg",
+    extension: str = "jpg"
+) -> None:
+    """Send one notification with an image, either processed or as a stream of a given type."""
+    if isinstance(image, ProcessedImage):
+        body, content_type, filename = image.data, image.content_type, image.filename
+    else:
+        body, filename = image, f"image.{extension}"
+
+    # Prepare form data with image
+    form = aiohttp.FormData()
+    for key, value in data.items():
+        form.add_field(key, value)
+    form.add_field('attachment', body,
+                   filename=filename,
+                   content_type=content_type)
+
+    # Send notification with image
+    start = time.perf_counter()
+    try:
+        async with session.post(api_url, data=form) as response:
+            if rate_limit is not None:
+                rate_limit.update(response)
+            if response.status != 200:
+                error_text = await response.text()
+                raise PushoverError(f"Pushover returned {response.status}: {error_text}",
+                                    status=response.status)
+    except Exception:
+        metrics.PUSHOVER_FAILURES.inc()
+        raise
+    finally:
+        metrics.PUSHOVER_POST_SECONDS.observe(time.perf_counter() - start)
+    metrics.IMAGES_SENT.inc()
+
+async def _read_head(stream: aiohttp.StreamReader) -> bytes:
+    """Read the first chunks of a body, enough to tell the image type."""
+    head = b""
+    while len(head) < SNIFF_BYTES:
+        chunk = await stream.readany()
+        if not chunk:
+            break
+        head += chunk
+    return head
+
+async def _limit_stream(
+    stream: aiohttp.StreamReader,
+    limit: int,
+    sink: Optional[List[bytes]] = None,
+    head: bytes = b"",
+    chunk_size: int = 64 * 1024
+) -> AsyncIterator[bytes]:
+    """Yield chunks from a response body, failing once it exceeds ``limit`` bytes.
+
+    Covers responses that omit Content-Length, where the size is only known
+    while streaming. ``head`` is what was already read from the stream.
+    Chunks are also appended to ``sink`` when given.
+    """
+    total = len(head)
+    if total > limit:
+        raise ValueError(f"image exceeds {limit} bytes")
+    if head:
+        if sink is not None:
+            sink.append(head)
+        yield head
+    async for chunk in stream.iter_chunked(chunk_size):
+        total += len(chunk)
+        if total > limit:
+            raise ValueError(f"image exceeds {limit} bytes")
+        if sink is not None:
+            sink.append(chunk)
+        yield chunk
+
+class PushoverNotifier:
+    """Pushover sender that owns one pooled, keep-alive HTTP session.
+
+    Reusing connections to api.pushover.net and the Discord CDN avoids a new
+    TCP and TLS handshake for every alert.
+    """
+
+    def __init__(
+        self,
+        user_key: str,
+        api_token: str,
+        connection_limit: int = 20,
+        connection_limit_per_host: int = 8,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 60.0,
+        api_url: str = PUSHOVER_API_URL,
+        max_concurrent_images: int = 4,
+        image_cache: Optional[ImageCache] = None,
+        image_processor: Optional[ImageProcessor] = None
+    ):
+        self.user_key = user_key
+        self.api_token = api_token
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.api_url = api_url
+        self.max_concurrent_images = max_concurrent_images
+        self.image_cache = image_cache
+        self.image_processor = image_processor
+        self.rate_limit = PushoverRateLimit()
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The shared session, opened lazily on first use."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                limit_per_host=self.connection_limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def start(self):
+        """Open the pooled session and start image processing ahead of the first notification."""
+        self.session
+        if self.image_processor is not None:
+            self.image_processor.start()
+
+    async def close(self):
+        """Close the pooled session and its connections, and stop image processing."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self.image_processor is not None:
+            self.image_processor.stop()
+
+    async def send(
+        self,
+        message: str,
+        title: Optional[str] = None,
+        priority: int = 0,
+        sound: str = "pushover",
+        image_urls: Optional[List[str]] = None,
+        retry: Optional[int] = None,
+        expire: Optional[int] = None
+    ) -> None:
+        """Send a notification over the pooled session."""
+        await send_pushover_notification(
+            message=message,
+            user_key=self.user_key,
+            api_token=self.api_token,
+            title=title,
+            priority=priority,
+            sound=sound,
+            image_urls=image_urls,
+            session=self.session,
+            api_url=self.api_url,
+            max_concurrent_images=self.max_concurrent_images,
+            image_cache=self.image_cache,
+            rate_limit=self.rate_limit,
+            image_processor=self.image_processor,
+            retry=retry,
+            expire=expire
+        )
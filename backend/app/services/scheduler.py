@@ -0,0 +1,218 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+from ..models.enums import NotificationPriority
+from .dispatch import DispatchItem
+from .pushover import PushoverRateLimit
+
+# Pushover truncates messages longer than this
+PUSHOVER_MESSAGE_LIMIT = 1024
+
+Submit = Callable[[DispatchItem], Awaitable[None]]
+
+
+class _Digest:
+    """Notifications for one key collected during a digest window."""
+
+    __slots__ = ("first", "held", "lines", "counts", "priority", "image_urls", "items")
+
+    def __init__(self, item: DispatchItem):
+        self.first = item
+        self.held: List[DispatchItem] = []
+        self.lines: List[str] = []
+        self.counts: List[int] = []
+        self.priority = item.priority
+        self.image_urls: List[str] = []
+        self.items = 0
+        self.add(item)
+
+    def add(self, item: DispatchItem):
+        self.held.append(item)
+        # Repeats of the previous message (e.g. a reconnect storm) collapse into a count
+        if self.lines and self.lines[-1] == item.message:
+            self.counts[-1] += 1
+        else:
+            self.lines.append(item.message)
+            self.counts.append(1)
+        if item.image_urls:
+            self.image_urls.extend(item.image_urls)
+        self.priority = max(self.priority, item.priority, key=int)
+        self.items += 1 + item.merged
+
+    def build(self, max_length: int) -> DispatchItem:
+        first = self.first
+        if self.items == 1:
+            return first
+        parts = [line if count == 1 else f"{line} (×{count})"
+                 for line, count in zip(self.lines, self.counts)]
+        kept = len(parts)
+        message = "\n\n".join(parts)
+        while len(message) > max_length and kept > 1:
+            kept -= 1
+            more = f"… and {sum(self.counts[kept:])} more"
+            message = "\n\n".join(parts[:kept] + [more])
+        message = message[:max_length]
+        title = f"{first.title} ({self.items} notifications)" if first.title else None
+        item = DispatchItem(message, title=title, priority=self.priority, sound=first.sound,
+                            image_urls=self.image_urls or None, key=first.key)
+        item.enqueued_at = first.enqueued_at
+        item.merged = self.items - 1
+        return item
+
+
+class _Window:
+    """An open digest window for one key."""
+
+    __slots__ = ("digest", "task")
+
+    def __init__(self):
+        self.digest: Optional[_Digest] = None
+        self.task: Optional[asyncio.Task] = None
+
+
+class DeliveryScheduler:
+    """Merge bursts of notifications into digests before they reach the dispatcher.
+
+    The first notification for a key (the title, so one per channel) is
+    delivered at once and opens a window. Anything else for that key that
+    arrives before the window closes goes into a digest, sent when it
+    closes; a digest opens another window, so a sustained burst goes out
+    as one notification per window. The window widens as Pushover reports
+    the app quota running low. After a 429, even the first notification
+    is held until the backoff expires. EMERGENCY items bypass the window
+    and the backoff. A digest that fails to submit is kept and tried
+    again when the window next closes, together with anything that
+    arrived meanwhile.
+
+    Held notifications are passed to ``hold`` as they arrive (the outbox
+    records them, so a crash during the window doesn't lose them) and to
+    ``release`` once the digest replacing them has been submitted.
+    """
+
+    def __init__(self, submit: Submit, window: float = 2.0, max_window: float = 60.0,
+                 rate_limit: Optional[PushoverRateLimit] = None, quota_reserve: float = 0.2,
+                 max_message_length: int = PUSHOVER_MESSAGE_LIMIT,
+                 hold: Optional[Submit] = None,
+                 release: Optional[Callable[[DispatchItem], None]] = None):
+        self._submit = submit
+        self._hold = hold
+        self._release = release
+        self.window = window
+        self.max_window = max(max_window, window)
+        self.rate_limit = rate_limit
+        self.quota_reserve = quota_reserve
+        self.max_message_length = max_message_length
+        self._windows: Dict[Optional[str], _Window] = {}
+
+        self.received = 0
+        self.immediate = 0
+        self.leading = 0
+        self.digests = 0
+        self.merged = 0
+
+    @property
+    def current_window(self) -> float:
+        """Digest window adjusted for the remaining Pushover quota."""
+        fraction = self.rate_limit.fraction_remaining if self.rate_limit else None
+        if fraction is None or fraction >= self.quota_reserve or self.quota_reserve <= 0:
+            return self.window
+        # Scale linearly towards max_window as the reserve is used up
+        pressure = 1.0 - fraction / self.quota_reserve
+        return self.window + (self.max_window - self.window) * pressure
+
+    def _retry_after(self) -> float:
+        return self.rate_limit.retry_after() if self.rate_limit else 0.0
+
+    async def submit(self, item: DispatchItem):
+        """Deliver an item now if it is EMERGENCY or opens a window, otherwise add it to the digest."""
+        self.received += 1
+        if int(item.priority) >= int(NotificationPriority.EMERGENCY.value):
+            self.immediate += 1
+            await self._submit(item)
+            return
+        window = self._windows.get(item.key)
+        if window is not None:
+            await self._add(window, item)
+            return
+        delay = self.current_window
+        throttled = self._retry_after() > 0
+        if delay <= 0 and not throttled:
+            await self._submit(item)
+            return
+        window = _Window()
+        self._windows[item.key] = window
+        window.task = asyncio.create_task(self._run_window(item.key, window, delay),
+                                          name="notification-digest")
+        if throttled:
+            await self._add(window, item)
+        else:
+            self.leading += 1
+            await self._submit(item)
+
+    async def _add(self, window: _Window, item: DispatchItem):
+        if window.digest is None:
+            window.digest = _Digest(item)
+        else:
+            window.digest.add(item)
+            self.merged += 1
+        if self._hold is not None:
+            await self._hold(item)
+
+    async def _run_window(self, key: Optional[str], window: _Window, delay: float):
+        try:
+            while True:
+                await asyncio.sleep(delay)
+                # Hold the digest while Pushover is throttling us; it keeps collecting
+                while (retry_after := self._retry_after()) > 0:
+                    await asyncio.sleep(retry_after)
+                digest, window.digest = window.digest, None
+                if digest is None:
+                    return
+                delay = self.current_window
+                try:
+                    await self._flush(digest)
+                except Exception as e:
+                    print(f"Error sending notification digest, retrying in {delay:.0f}s: {e}")
+                    if window.digest is not None:
+                        for item in window.digest.held:
+                            digest.add(item)
+                    window.digest = digest
+        except Exception as e:
+            print(f"Error in notification digest window for {key}: {e}")
+        finally:
+            # Never leave a window behind that nothing will flush
+            if self._windows.get(key) is window:
+                del self._windows[key]
+
+    async def _flush(self, digest: _Digest):
+        item = digest.build(self.max_message_length)
+        await self._submit(item)
+        self.digests += 1
+        if item is not digest.first and self._release is not None:
+            for held in digest.held:
+                self._release(held)
+
+    async def stop(self):
+        """Flush every open digest immediately."""
+        windows = list(self._windows.values())
+        self._windows.clear()
+        for window in windows:
+            if window.task is not None:
+                window.task.cancel()
+        await asyncio.gather(*(w.task for w in windows if w.task), return_exceptions=True)
+        for window in windows:
+            if window.digest is not None:
+                await self._flush(window.digest)
+
+    def stats(self) -> Dict:
+        """Digest counters and the Pushover quota for the status endpoint."""
+        return {
+            "window": self.window,
+            "current_window": round(self.current_window, 2),
+            "open_digests": sum(1 for w in self._windows.values() if w.digest is not None),
+            "received": self.received,
+            "immediate": self.immediate,
+            "leading": self.leading,
+            "digests": self.digests,
+            "merged": self.merged,
+            "rate_limit": self.rate_limit.stats() if self.rate_limit else None
+        }
@@ -0,0 +1,253 @@
+import asyncio
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from ..discord.history import HistoryRecord
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    channel_id INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    author_id INTEGER NOT NULL,
+    author TEXT NOT NULL,
+    content TEXT NOT NULL,
+    attachments TEXT NOT NULL,
+    embeds TEXT NOT NULL,
+    merged_into INTEGER,
+    message_id INTEGER,
+    edited_at TEXT,
+    deleted INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS messages_timestamp ON messages (timestamp);
+CREATE INDEX IF NOT EXISTS messages_channel ON messages (channel_id, id);
+CREATE INDEX IF NOT EXISTS messages_author ON messages (author_id, id);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts
+    USING fts5(content, content='messages', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+END;
+"""
+
+# Columns added after the first release, created on stores that predate them
+MIGRATIONS = (
+    "ALTER TABLE messages ADD COLUMN merged_into INTEGER",
+    "ALTER TABLE messages ADD COLUMN message_id INTEGER",
+    "ALTER TABLE messages ADD COLUMN edited_at TEXT",
+    "ALTER TABLE messages ADD COLUMN deleted INTEGER NOT NULL DEFAULT 0",
+)
+
+COLUMNS = ("id, timestamp, channel_id, channel, author_id, author, content, attachments, embeds, "
+           "merged_into, message_id, edited_at, deleted")
+# Re-writing a record (after an edit or delete) updates its mutable columns
+UPSERT = (f"INSERT INTO messages ({COLUMNS}) VALUES ({', '.join('?' * len(COLUMNS.split(',')))}) "
+          "ON CONFLICT (id) DO UPDATE SET content = excluded.content, "
+          "attachments = excluded.attachments, embeds = excluded.embeds, "
+          "edited_at = excluded.edited_at, deleted = excluded.deleted")
+
+
+def _to_row(record: HistoryRecord) -> Tuple:
+    return (record.seq, record.timestamp, record.channel_id, record.channel,
+            record.author_id, record.author, record.content,
+            json.dumps(record.attachments), json.dumps(record.embeds), record.merged_into,
+            record.message_id, record.edited_at, int(record.deleted))
+
+
+def _from_row(row: Tuple) -> HistoryRecord:
+    return HistoryRecord(row[0], row[1], row[2], row[3], row[4], row[5], row[6],
+                         json.loads(row[7]), json.loads(row[8]), row[9], row[10], row[11],
+                         bool(row[12]))
+
+
+class MessageStore:
+    """SQLite message archive with write-behind batching.
+
+    ``append`` only buffers the record; a background task commits buffered
+    rows in one transaction every ``batch_size`` rows or ``flush_interval``
+    seconds, whichever comes first. The database runs in WAL mode so reads
+    on their own connection never wait for a write. All SQLite calls run on
+    dedicated threads, keeping the event loop free.
+    """
+
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 0.25):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fts_enabled = False
+        self._pending: List[HistoryRecord] = []
+        self._flush_now = asyncio.Event()
+        self._flusher: Optional[asyncio.Task] = None
+        # One thread per connection: sqlite3 connections are bound to their thread
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="store-writer")
+        self._reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="store-reader")
+        self._write_conn: Optional[sqlite3.Connection] = None
+        self._read_conn: Optional[sqlite3.Connection] = None
+        self.written = 0
+        self.failed = 0
+
+    async def _run(self, executor: ThreadPoolExecutor, func, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+    async def start(self):
+        """Open the database, create the schema and start the flush task."""
+        await self._run(self._writer, self._open_writer)
+        await self._run(self._reader, self._open_reader)
+        self._flusher = asyncio.create_task(self._flush_loop(), name="message-store-flush")
+
+    def _open_writer(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        for migration in MIGRATIONS:
+            try:
+                conn.execute(migration)
+            except sqlite3.OperationalError:
+                pass  # Column already exists
+        try:
+            conn.executescript(FTS_SCHEMA)
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            print(f"SQLite FTS5 unavailable, full-text search disabled: {e}")
+        conn.commit()
+        self._write_conn = conn
+
+    def _open_reader(self):
+        self._read_conn = sqlite3.connect(self.path)
+
+    async def stop(self):
+        """Flush any buffered rows and close the database."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await self.flush()
+        await self._run(self._writer, self._close, "_write_conn")
+        await self._run(self._reader, self._close, "_read_conn")
+        self._writer.shutdown(wait=False)
+        self._reader.shutdown(wait=False)
+
+    def _close(self, attr: str):
+        conn = getattr(self, attr)
+        if conn is not None:
+            conn.close()
+            setattr(self, attr, None)
+
+    def append(self, record: HistoryRecord):
+        """Buffer a record for the next group commit."""
+        self._pending.append(record)
+        if len(self._pending) >= self.batch_size:
+            self._flush_now.set()
+
+    def update(self, record: HistoryRecord):
+        """Buffer a changed record; the next group commit re-writes its row."""
+        self.append(record)
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Write all buffered rows in a single transaction."""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            await self._run(self._writer, self._write, [_to_row(r) for r in batch])
+            self.written += len(batch)
+        except sqlite3.Error as e:
+            self.failed += len(batch)
+            print(f"Error writing {len(batch)} messages to store: {e}")
+
+    def _write(self, rows: List[Tuple]):
+        with self._write_conn:
+            self._write_conn.executemany(UPSERT, rows)
+
+    async def last_id(self) -> int:
+        """Highest stored message id, or 0 for an empty store."""
+        return await self._run(self._reader, self._last_id)
+
+    def _last_id(self) -> int:
+        row = self._read_conn.execute("SELECT MAX(id) FROM messages").fetchone()
+        return row[0] or 0
+
+    async def query(self, before: Optional[int] = None, since: Optional[int] = None,
+                    channel: Optional[int] = None, author: Optional[int] = None,
+                    search: Optional[str] = None, limit: int = 100) -> List[HistoryRecord]:
+        """Page through stored messages using the id as a keyset cursor.
+
+        Results are in chronological order. ``before`` pages backwards from
+        an id; ``since`` pages forwards from one. ``search`` is an FTS5 query
+        over message content.
+        """
+        return await self._run(self._reader, self._query, before, since, channel,
+                               author, search, limit)
+
+    def _query(self, before, since, channel, author, search, limit) -> List[HistoryRecord]:
+        use_fts = bool(search) and self.fts_enabled
+        # With a search, drive the query from the FTS index so it streams
+        # matches in rowid order instead of collecting every match first
+        source = "messages_fts JOIN messages ON messages.id = messages_fts.rowid" if use_fts else "messages"
+        key = "messages_fts.rowid" if use_fts else "id"
+        clauses, params = [], []
+        if use_fts:
+            clauses.append("messages_fts MATCH ?")
+            params.append(search)
+        elif search:
+            clauses.append("content LIKE ?")
+            params.append(f"%{search}%")
+        if before is not None:
+            clauses.append(f"{key} < ?")
+            params.append(before)
+        if since is not None:
+            clauses.append(f"{key} > ?")
+            params.append(since)
+        if channel is not None:
+            clauses.append("channel_id = ?")
+            params.append(channel)
+        if author is not None:
+            clauses.append("author_id = ?")
+            params.append(author)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        # Paging forwards reads oldest-first; otherwise take the newest page
+        order = "ASC" if since is not None and before is None else "DESC"
+        columns = ", ".join(f"messages.{c.strip()}" for c in COLUMNS.split(","))
+        try:
+            rows = self._read_conn.execute(
+                f"SELECT {columns} FROM {source} {where} ORDER BY {key} {order} LIMIT ?",
+                (*params, limit)
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            # Malformed FTS5 query syntax surfaces as an operational error
+            raise ValueError(f"Invalid search query: {e}") from e
+        records = [_from_row(row) for row in rows]
+        if order == "DESC":
+            records.reverse()
+        return records
+
+    def stats(self) -> Dict:
+        """Write-behind counters for the status endpoint."""
+        return {
+            "pending": len(self._pending),
+            "written": self.written,
+            "failed": self.failed,
+            "fts_enabled": self.fts_enabled
+        }
@@ -0,0 +1,4 @@
+"""Micro-benchmarks for the monitor's hot paths.
+
+Run from the ``backend`` directory, e.g. ``python -m benchmarks.bench_filters``.
+"""
@@ -0,0 +1,124 @@
+"""Requests per second on /api/messages for several history sizes.
+
+Requests go straight into the ASGI app, so the numbers cover routing,
+query, serialization and compression but not HTTP parsing or the network.
+Each history size is measured for:
+
+- baseline: the records as a list of dicts through FastAPI's JSON encoder,
+  as the endpoint used to answer
+- cached: the endpoint itself, answered from the serialized page
+- gzip: the same with Accept-Encoding: gzip
+- not_modified: a poll with a current If-None-Match, answered with 304
+
+Usage: python -m benchmarks.bench_api [--limit N] [--seconds S] [sizes...]
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import FastAPI
+
+from app import main
+from app.discord.client import DiscordMonitor
+from app.models.config import Settings
+
+DEFAULT_SIZES = (100, 10_000, 100_000)
+
+
+def build_monitor(size: int) -> DiscordMonitor:
+    settings = Settings(discord_token="bench", channel_ids=[], target_user_ids=[],
+                        pushover_user_key="bench", pushover_api_token="bench",
+                        history_size=size, message_store_path=None,
+                        notification_outbox_path=None)
+    monitor = DiscordMonitor(settings)
+    for i in range(size):
+        monitor.history.append(
+            timestamp="2024-01-01 00:00:00", channel_id=500 + i % 5, channel="Guild - #picks",
+            author_id=1000 + i % 20, author=f"User {i % 20} (@user{i % 20})",
+            content=f"Lock of the day #{i}: over 24.5 points tonight, tail or fade?",
+            attachments=[f"https://cdn.discordapp.com/attachments/1/{i}/slip.png"] if i % 10 == 0 else [],
+            embeds=[]
+        )
+    return monitor
+
+
+def baseline_app(monitor: DiscordMonitor) -> FastAPI:
+    """The endpoint as it was: records as dicts through FastAPI's encoder."""
+    app = FastAPI()
+
+    @app.get("/api/messages")
+    async def get_messages(limit: int = 100):
+        return [record.to_dict() for record in monitor.history.query(limit=limit)]
+
+    return app
+
+
+async def request(app, path: str, query: str, headers: List[Tuple[bytes, bytes]]) -> Tuple[int, Dict, bytes]:
+    """One GET through the ASGI interface."""
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+             "query_string": query.encode(), "headers": headers,
+             "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 7777)}
+    response: Dict = {"body": b""}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode(): v.decode() for k, v in message["headers"]}
+        else:
+            response["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return response["status"], response["headers"], response["body"]
+
+
+async def measure(app, query: str, headers: List[Tuple[bytes, bytes]], seconds: float) -> Dict:
+    status, _, body = await request(app, "/api/messages", query, headers)
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        await request(app, "/api/messages", query, headers)
+        count += 1
+    elapsed = time.perf_counter() - start
+    return {"status": status, "bytes": len(body), "rps": count / elapsed}
+
+
+async def run(sizes, limit: Optional[int], seconds: float):
+    print(f"{'size':>8} {'limit':>6} {'mode':<13} {'status':>6} {'bytes':>10} {'req/s':>10}")
+    for size in sizes:
+        monitor = build_monitor(size)
+        main.discord_client = monitor
+        page_limit = min(limit or size, 10_000)
+        query = f"limit={page_limit}"
+        _, headers, _ = await request(main.app, "/api/messages", query, [])
+        etag = headers["etag"].encode()
+        modes = {
+            "baseline": (baseline_app(monitor), []),
+            "cached": (main.app, []),
+            "gzip": (main.app, [(b"accept-encoding", b"gzip")]),
+            "not_modified": (main.app, [(b"if-none-match", etag)]),
+        }
+        for mode, (app, request_headers) in modes.items():
+            result = await measure(app, query, request_headers, seconds)
+            print(f"{size:>8} {page_limit:>6} {mode:<13} {result['status']:>6} "
+                  f"{result['bytes']:>10} {result['rps']:>10.0f}")
+        main.discord_client = None
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sizes", nargs="*", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--limit", type=int, default=None,
+                        help="page size (default: the whole history, at most 10000)")
+    parser.add_argument("--seconds", type=float, default=2.0, help="duration of each measurement")
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.limit, args.seconds))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,75 @@
+"""Compare the compiled filter engine with the original per-keyword scan."""
+import random
+import string
+import timeit
+from types import SimpleNamespace
+
+from app.discord.filters import compile_filters
+from app.models.config import FilterConfig
+
+
+def legacy_check_filters(filters: FilterConfig, message) -> bool:
+    """The pre-compilation implementation of DiscordMonitor._check_filters."""
+    if not filters.enabled:
+        return True
+    if filters.keywords and any(keyword.lower() in message.content.lower()
+                                for keyword in filters.keywords):
+        return True
+    if filters.link_patterns and any(pattern in word
+                                     for pattern in filters.link_patterns
+                                     for word in message.content.split()):
+        return True
+    if message.attachments and filters.image_types:
+        if any(any(attachment.filename.lower().endswith(f".{ext}")
+                   for ext in filters.image_types)
+               for attachment in message.attachments):
+            return True
+    if message.embeds and (filters.link_patterns or filters.image_types):
+        return True
+    return False
+
+
+def _word(rng: random.Random, size: int) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(size))
+
+
+def _messages(rng: random.Random, count: int):
+    messages = []
+    for _ in range(count):
+        content = " ".join(_word(rng, rng.randint(2, 9)) for _ in range(rng.randint(5, 60)))
+        attachments = [SimpleNamespace(filename=f"{_word(rng, 6)}.{rng.choice(['txt', 'pdf', 'bin'])}")
+                       for _ in range(rng.randint(0, 2))]
+        messages.append(SimpleNamespace(content=content, attachments=attachments, embeds=[]))
+    return messages
+
+
+def run(keyword_counts=(10, 100, 10_000), message_count=200, repeat=3):
+    rng = random.Random(1234)
+    messages = _messages(rng, message_count)
+    print(f"{'keywords':>9} {'legacy us/msg':>14} {'compiled us/msg':>16} {'speedup':>8}")
+    for count in keyword_counts:
+        config = FilterConfig(
+            keywords=[_word(rng, rng.randint(10, 14)) for _ in range(count)],
+            link_patterns=["prizepicks.onelink.me", "underdogfantasy.com"],
+        )
+        compiled = compile_filters(config)
+
+        for message in messages:
+            expected = legacy_check_filters(config, message)
+            actual = compiled.matches(message.content,
+                                      [a.filename for a in message.attachments],
+                                      bool(message.embeds))
+            assert expected == actual, message.content
+
+        legacy = min(timeit.repeat(
+            lambda: [legacy_check_filters(config, m) for m in messages], number=1, repeat=repeat))
+        fast = min(timeit.repeat(
+            lambda: [compiled.matches(m.content, [a.filename for a in m.attachments], bool(m.embeds))
+                     for m in messages], number=1, repeat=repeat))
+        per_legacy = legacy / message_count * 1e6
+        per_fast = fast / message_count * 1e6
+        print(f"{count:>9} {per_legacy:>14.1f} {per_fast:>16.1f} {per_legacy / per_fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,227 @@
+"""Startup time and memory of the gateway cache for each intent mode.
+
+Replays a gateway recording (READY, one GUILD_CREATE per guild, then
+message, typing, reaction and presence traffic) straight into the
+client's event parsers. Discord filters what it sends by intent, so each
+mode (every intent, discord.py's defaults, and lean) first strips
+whatever its intents would never receive: presences, other members'
+records, voice states, and unsubscribed events. The script reports the time spent parsing READY and the guild payloads, the
+time spent on live traffic, and the memory the client still holds
+afterwards.
+
+Without a recording, a synthetic one is generated. A recording is a
+JSON-lines file with one {"t": event, "d": data} dispatch per line.
+
+Usage: python -m benchmarks.bench_gateway [recording.jsonl]
+       python -m benchmarks.bench_gateway --record out.jsonl [guilds] [members] [messages]
+"""
+import asyncio
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Dict, Iterator, List
+
+import discord
+
+from app.discord.client import DiscordMonitor
+from app.models.config import Settings
+
+BOT_ID = 1
+TIMESTAMP = "2024-01-01T00:00:00+00:00"
+
+
+def _user(user_id: int) -> Dict:
+    return {"id": str(user_id), "username": f"user{user_id}", "discriminator": "0",
+            "global_name": f"User {user_id}", "avatar": None}
+
+
+def _member(user_id: int, roles: List[str]) -> Dict:
+    return {"user": _user(user_id), "roles": roles, "joined_at": TIMESTAMP,
+            "deaf": False, "mute": False, "flags": 0}
+
+
+def generate(guilds: int = 200, members: int = 1000, messages: int = 20000,
+             channels: int = 50, seed: int = 1) -> Iterator[Dict]:
+    """Yield a synthetic gateway session for an account in many busy guilds."""
+    rng = random.Random(seed)
+    next_id = iter(range(10_000, 10**12))
+    guild_ids = [next(next_id) for _ in range(guilds)]
+    yield {"t": "READY", "d": {
+        "v": 10, "user": _user(BOT_ID) | {"bot": True}, "session_id": "bench",
+        "application": {"id": str(BOT_ID), "flags": 0},
+        "guilds": [{"id": str(g), "unavailable": True} for g in guild_ids]
+    }}
+
+    text_channels = []
+    for guild_id in guild_ids:
+        roles = [{"id": str(guild_id), "name": "@everyone", "color": 0, "hoist": False,
+                  "position": 0, "permissions": "1071698660929", "managed": False,
+                  "mentionable": False, "flags": 0}]
+        roles += [{"id": str(next(next_id)), "name": f"role{i}", "color": rng.randrange(1 << 24),
+                   "hoist": False, "position": i + 1, "permissions": "0", "managed": False,
+                   "mentionable": False, "flags": 0} for i in range(20)]
+        guild_channels = [{"id": str(next(next_id)), "type": 0, "name": f"channel-{i}",
+                           "position": i, "permission_overwrites": [], "parent_id": None,
+                           "topic": "Picks and discussion", "nsfw": False,
+                           "last_message_id": None, "rate_limit_per_user": 0}
+                          for i in range(channels)]
+        text_channels += [(guild_id, int(c["id"])) for c in guild_channels]
+        user_ids = [BOT_ID] + [next(next_id) for _ in range(members - 1)]
+        yield {"t": "GUILD_CREATE", "d": {
+            "id": str(guild_id), "name": f"Guild {guild_id}", "icon": None, "owner_id": str(user_ids[-1]),
+            "afk_timeout": 300, "verification_level": 1, "default_message_notifications": 1,
+            "explicit_content_filter": 0, "mfa_level": 0, "nsfw_level": 0, "premium_tier": 0,
+            "features": [], "preferred_locale": "en-US", "large": members > 250,
+            "member_count": members, "joined_at": TIMESTAMP, "unavailable": False,
+            "roles": roles, "channels": guild_channels, "threads": [], "stickers": [],
+            "emojis": [{"id": str(next(next_id)), "name": f"emoji{i}", "roles": [],
+                        "require_colons": True, "managed": False, "animated": False,
+                        "available": True} for i in range(50)],
+            "members": [_member(u, [rng.choice(roles)["id"]]) for u in user_ids],
+            "presences": [{"user": {"id": str(u)}, "status": "online", "client_status": {"desktop": "online"},
+                           "activities": [{"name": "a game", "type": 0}]}
+                          for u in user_ids if rng.random() < 0.3],
+            "voice_states": [{"user_id": str(u), "channel_id": guild_channels[0]["id"],
+                              "session_id": "x", "deaf": False, "mute": False, "self_deaf": False,
+                              "self_mute": False, "self_video": False, "suppress": False,
+                              "request_to_speak_timestamp": None}
+                             for u in user_ids[1:6]],
+            "stage_instances": [], "guild_scheduled_events": []
+        }}
+
+    content = "lock of the day over 24.5 points tonight, tail or fade?"
+    for i in range(messages):
+        guild_id, channel_id = rng.choice(text_channels)
+        author = next(next_id)
+        message_id = next(next_id)
+        yield {"t": "MESSAGE_CREATE", "d": {
+            "id": str(message_id), "channel_id": str(channel_id), "guild_id": str(guild_id),
+            "author": _user(author), "member": {"roles": [], "joined_at": TIMESTAMP, "deaf": False,
+                                                "mute": False, "flags": 0},
+            "content": content, "timestamp": TIMESTAMP, "edited_timestamp": None, "tts": False,
+            "mention_everyone": False, "mentions": [], "mention_roles": [], "attachments": [],
+            "embeds": [], "pinned": False, "type": 0
+        }}
+        if i % 4 == 0:
+            yield {"t": "TYPING_START", "d": {"channel_id": str(channel_id), "guild_id": str(guild_id),
+                                              "user_id": str(author), "timestamp": 1704067200}}
+        if i % 4 == 1:
+            yield {"t": "MESSAGE_REACTION_ADD", "d": {
+                "user_id": str(author), "channel_id": str(channel_id), "message_id": str(message_id),
+                "guild_id": str(guild_id), "emoji": {"id": None, "name": "🔥"}, "type": 0}}
+        if i % 4 == 2:
+            yield {"t": "PRESENCE_UPDATE", "d": {
+                "user": {"id": str(author)}, "guild_id": str(guild_id), "status": "idle",
+                "client_status": {"mobile": "idle"}, "activities": []}}
+
+
+# Events Discord only sends with the matching intent
+EVENT_INTENTS = {
+    "PRESENCE_UPDATE": "presences",
+    "TYPING_START": "guild_typing",
+    "MESSAGE_REACTION_ADD": "guild_reactions",
+    "MESSAGE_CREATE": "guild_messages",
+}
+
+
+def _filter(event: Dict, intents) -> Dict:
+    """Drop what the gateway would not send for these intents."""
+    name, data = event["t"], event["d"]
+    intent = EVENT_INTENTS.get(name)
+    if intent and not getattr(intents, intent):
+        return None
+    if name == "GUILD_CREATE":
+        data = dict(data)
+        if not intents.presences:
+            data["presences"] = []
+        if not intents.members:
+            data["members"] = [m for m in data["members"] if m["user"]["id"] == str(BOT_ID)]
+        if not intents.voice_states:
+            data["voice_states"] = []
+    return {"t": name, "d": data}
+
+
+# Mode name -> (lean_gateway, extra client options)
+MODES = {
+    # Every intent, as older discord.py versions subscribed by default.
+    # Chunking stays off because there is no gateway to answer the requests.
+    "all": (False, {"intents": discord.Intents.all(), "chunk_guilds_at_startup": False}),
+    "default": (False, {}),
+    "lean": (True, {}),
+}
+
+
+async def replay(events: List[Dict], mode: str, trace: bool) -> Dict:
+    lean, options = MODES[mode]
+    settings = Settings(discord_token="bench", channel_ids=[], target_user_ids=[],
+                        pushover_user_key="bench", pushover_api_token="bench",
+                        lean_gateway=lean, message_store_path=None,
+                        notification_outbox_path=None)
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0] if trace else 0
+    client = DiscordMonitor(settings, **options)
+    await client._async_setup_hook()  # Binds the loop, as logging in would
+    state = client._connection
+    # The filtered copy is freed before memory is read, so it doesn't count
+    events = [e for e in (_filter(e, client.intents) for e in events) if e is not None]
+
+    start = time.perf_counter()
+    live_from = len(events)
+    for index, event in enumerate(events):
+        if event["t"] not in ("READY", "GUILD_CREATE"):
+            live_from = index
+            break
+        state.parsers[event["t"]](event["d"])
+    startup = time.perf_counter() - start
+    # Nothing is connected, so don't let the guild-ready timer fire on_ready
+    state._ready_task.cancel()
+
+    start = time.perf_counter()
+    for event in events[live_from:]:
+        state.parsers[event["t"]](event["d"])
+    await asyncio.sleep(0)  # Let the dispatched on_message tasks run
+    live = time.perf_counter() - start
+
+    del events
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - baseline if trace else 0
+    if trace:
+        tracemalloc.stop()
+    result = {"startup": startup, "live": live, "retained": retained,
+              "guilds": len(client.guilds), "members": sum(len(g.members) for g in client.guilds),
+              "messages": len(client.cached_messages)}
+    await client.close()
+    return result
+
+
+async def run(events: List[Dict]):
+    for mode in MODES:
+        timed = await replay(events, mode, trace=False)
+        traced = await replay(events, mode, trace=True)
+        print(f"{mode:<8} startup {timed['startup'] * 1000:8.1f} ms  live {timed['live'] * 1000:8.1f} ms  "
+              f"retained {traced['retained'] / 2**20:7.1f} MiB  guilds {timed['guilds']}  "
+              f"members {timed['members']}  cached messages {timed['messages']}")
+
+
+def main(argv: List[str]):
+    if argv and argv[0] == "--record":
+        sizes = [int(a) for a in argv[2:]]
+        with open(argv[1], "w") as f:
+            for event in generate(*sizes):
+                f.write(json.dumps(event) + "\n")
+        return
+    if argv:
+        with open(argv[0]) as f:
+            events = [json.loads(line) for line in f if line.strip()]
+    else:
+        events = list(generate())
+    asyncio.run(run(events))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,67 @@
+"""Bytes saved and time per stage when resizing synthetic slip screenshots.
+
+Each image is a PNG screenshot of text lines with a noisy photo region,
+the kind of attachment that is often larger than it needs to be for a
+phone notification. Requires Pillow.
+
+Usage: python -m benchmarks.bench_images [--count N] [--workers W] [--target BYTES]
+"""
+import argparse
+import asyncio
+import io
+import random
+import time
+
+from PIL import Image, ImageDraw
+
+from app.services.images import ImageProcessor, sniff
+from app.services.pushover import PUSHOVER_ATTACHMENT_LIMIT
+
+
+def screenshot(rng: random.Random, width: int, height: int) -> bytes:
+    image = Image.new("RGB", (width, height), (250, 250, 250))
+    draw = ImageDraw.Draw(image)
+    for y in range(0, height, 40):
+        draw.text((40, y), " ".join(f"pick{rng.randint(0, 999)}" for _ in range(30)), fill=(20, 20, 20))
+    photo = Image.effect_noise((width // 3, height // 4), rng.randint(20, 80)).convert("RGB")
+    image.paste(photo, (rng.randint(0, width - photo.width), rng.randint(0, height - photo.height)))
+    out = io.BytesIO()
+    image.save(out, "PNG")
+    return out.getvalue()
+
+
+async def run(count: int, workers: int, target: int):
+    rng = random.Random(1234)
+    sizes = [(1170, 2532), (1440, 3200), (2560, 1440), (800, 600)]
+    images = [screenshot(rng, *sizes[i % len(sizes)]) for i in range(count)]
+    over_limit = sum(len(image) > PUSHOVER_ATTACHMENT_LIMIT for image in images)
+
+    processor = ImageProcessor(max_bytes=target, workers=workers, min_bytes=0)
+    processor.start()
+    await asyncio.sleep(2)  # Let the worker processes finish starting
+    start = time.perf_counter()
+    results = await asyncio.gather(*(processor.process(image) for image in images))
+    elapsed = time.perf_counter() - start
+    processor.stop()
+
+    stats = processor.stats()
+    print(f"{count} images, {over_limit} over Pushover's attachment limit before processing")
+    print(f"  in:    {stats['bytes_in']:>12,} bytes  ({sniff(images[0])[0]})")
+    print(f"  out:   {stats['bytes_out']:>12,} bytes  ({results[0].content_type})")
+    print(f"  saved: {stats['bytes_saved']:>12,} bytes  ({stats['bytes_saved'] / stats['bytes_in']:.0%})")
+    print(f"  {count / elapsed:.1f} images/s with {workers} workers; average ms per image:")
+    for stage, ms in stats["avg_ms"].items():
+        print(f"    {stage:<7} {ms:>9.1f}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--target", type=int, default=1_000_000, help="byte budget per image")
+    args = parser.parse_args()
+    asyncio.run(run(args.count, args.workers, args.target))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,168 @@
+"""Delivery under injected Pushover faults, with and without the retry outbox.
+
+A local aiohttp server stands in for api.pushover.net. It fails a share of
+requests with 500s, 429s and dropped connections, and rejects a few
+outright with 400. Each request carries a marker, so the script counts how
+many distinct notifications arrived and how many arrived twice. A second
+pass stops the pipeline with notifications still pending, then starts a
+new one on the same outbox file to check that they are sent on boot.
+
+Usage: python -m benchmarks.bench_outbox [notifications] [fault_rate]
+       (defaults: 500 notifications, 0.3 fault rate)
+"""
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+from aiohttp import web
+
+from app.services.dispatch import DispatchItem, NotificationDispatcher
+from app.services.outbox import NotificationOutbox, RetryPolicy
+from app.services.pushover import PushoverNotifier
+
+
+class FaultyPushover:
+    def __init__(self, fault_rate: float, seed: int = 1):
+        self.fault_rate = fault_rate
+        self.rng = random.Random(seed)
+        self.received = {}
+        self.down = False
+
+    async def messages(self, request):
+        form = await request.post()
+        if self.down:
+            return web.Response(status=503, text="maintenance")
+        if form["message"].startswith("reject"):
+            return web.json_response({"status": 0, "errors": ["invalid"]}, status=400)
+        roll = self.rng.random()
+        if roll < self.fault_rate / 3:
+            return web.Response(status=500, text="internal error")
+        if roll < self.fault_rate * 2 / 3:
+            return web.json_response({"status": 0}, status=429,
+                                     headers={"X-Limit-App-Limit": "10000",
+                                              "X-Limit-App-Remaining": "0"})
+        if roll < self.fault_rate:
+            # Drop the connection without answering
+            request.transport.close()
+            return web.Response(status=500)
+        self.received[form["message"]] = self.received.get(form["message"], 0) + 1
+        return web.json_response({"status": 1, "request": "bench"},
+                                 headers={"X-Limit-App-Limit": "10000",
+                                          "X-Limit-App-Remaining": "9000"})
+
+
+async def _start_server(fake: FaultyPushover):
+    app = web.Application()
+    app.router.add_post("/1/messages.json", fake.messages)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/1/messages.json"
+
+
+class Pipeline:
+    """The monitor's delivery path: outbox, dispatcher and notifier."""
+
+    def __init__(self, api_url: str, outbox_path, policy: RetryPolicy):
+        self.notifier = PushoverNotifier("user", "token", api_url=api_url)
+        self.dispatcher = NotificationDispatcher(self.deliver, maxsize=1000, workers=8,
+                                                 on_discard=lambda item: self.outbox.discard(item),
+                                                 on_merge=lambda item: self.outbox.update(item))
+        self.outbox = NotificationOutbox(self.dispatcher.submit, path=outbox_path, policy=policy,
+                                         rate_limit=self.notifier.rate_limit)
+        # The 429s in this run carry no backoff worth waiting for
+        self.notifier.rate_limit.max_backoff = 0.0
+
+    async def deliver(self, item):
+        try:
+            await self.notifier.send(item.message)
+        except Exception as e:
+            self.outbox.failed(item, e)
+            raise
+        self.outbox.delivered(item)
+
+    async def start(self):
+        await self.notifier.start()
+        self.dispatcher.start()
+        await self.outbox.start()
+
+    async def submit(self, message: str):
+        item = DispatchItem(message)
+        await self.outbox.add(item)
+        await self.dispatcher.submit(item)
+
+    async def settle(self, timeout: float = 30.0):
+        deadline = time.monotonic() + timeout
+        while self.outbox.stats()["pending"] and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+    async def stop(self):
+        await self.dispatcher.stop()
+        await self.outbox.stop()
+        await self.notifier.close()
+
+
+def _report(label, fake, sent, rejected, elapsed):
+    delivered = sum(1 for m in sent if m in fake.received)
+    duplicates = sum(count - 1 for count in fake.received.values())
+    print(f"{label:<20} delivered {delivered:4d}/{len(sent)}  duplicates {duplicates:3d}  "
+          f"rejects sent {sum(1 for m in rejected if m in fake.received)}  {elapsed:6.2f}s")
+
+
+async def run(count: int, fault_rate: float):
+    # The pipeline logs every failure; keep the report readable
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    with tempfile.TemporaryDirectory() as directory:
+        for label, attempts in (("print and drop", 1), ("retry outbox", 8)):
+            fake = FaultyPushover(fault_rate)
+            runner, api_url = await _start_server(fake)
+            policy = RetryPolicy(max_attempts=attempts, base_delay=0.01, max_delay=0.2)
+            pipeline = Pipeline(api_url, os.path.join(directory, f"{label}.db"), policy)
+            sent = [f"{label} {i}" for i in range(count)]
+            rejected = [f"reject {label} {i}" for i in range(count // 50)]
+            start = time.perf_counter()
+            with quiet:
+                await pipeline.start()
+                for message in sent + rejected:
+                    await pipeline.submit(message)
+                await pipeline.settle()
+            _report(label, fake, sent, rejected, time.perf_counter() - start)
+            await pipeline.stop()
+            await runner.cleanup()
+
+        # Restart: Pushover is down while the first process queues work
+        fake = FaultyPushover(0.0)
+        fake.down = True
+        runner, api_url = await _start_server(fake)
+        path = os.path.join(directory, "restart.db")
+        sent = [f"restart {i}" for i in range(count)]
+        with quiet:
+            # Backoff long enough that nothing runs out of attempts before the restart
+            first = Pipeline(api_url, path, RetryPolicy(base_delay=1.0))
+            await first.start()
+            for message in sent:
+                await first.submit(message)
+            await asyncio.sleep(0.5)
+            await first.stop()
+            fake.down = False
+            start = time.perf_counter()
+            second = Pipeline(api_url, path, RetryPolicy(base_delay=0.01, max_delay=0.2))
+            await second.start()
+            await second.settle()
+        _report("restart recovery", fake, sent, [], time.perf_counter() - start)
+        print(f"{'':<20} recovered {second.outbox.recovered} from the outbox on boot")
+        await second.stop()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    fault_rate = float(sys.argv[2]) if len(sys.argv) > 2 else 0.3
+    asyncio.run(run(count, fault_rate))
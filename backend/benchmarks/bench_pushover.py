@@ -0,0 +1,66 @@
+"""Compare a fresh session per notification with the pooled PushoverNotifier.
+
+A local aiohttp server stands in for api.pushover.net and the Discord CDN,
+so the numbers reflect connection setup cost rather than internet latency.
+Plain HTTP on loopback only pays the TCP handshake; against the real TLS
+endpoints the gap is larger.
+"""
+import asyncio
+import statistics
+import time
+
+from aiohttp import web
+
+from app.services.pushover import PushoverNotifier, send_pushover_notification
+
+IMAGE = b"\xff\xd8\xff" + b"\0" * 64 * 1024
+
+
+async def _start_server():
+    async def messages(request):
+        await request.read()
+        return web.json_response({"status": 1, "request": "bench"})
+
+    async def image(request):
+        return web.Response(body=IMAGE, content_type="image/jpeg")
+
+    app = web.Application()
+    app.router.add_post("/1/messages.json", messages)
+    app.router.add_get("/image.jpg", image)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+async def _measure(send, count):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        await send()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), statistics.quantiles(samples, n=100)[98]
+
+
+async def run(count=300):
+    runner, base = await _start_server()
+    api_url = f"{base}/1/messages.json"
+    images = [f"{base}/image.jpg"]
+    notifier = PushoverNotifier("user", "token", api_url=api_url)
+    await notifier.start()
+    try:
+        for label, image_urls in (("text", None), ("image", images)):
+            fresh = await _measure(lambda: send_pushover_notification(
+                "bench", "user", "token", image_urls=image_urls, api_url=api_url), count)
+            pooled = await _measure(lambda: notifier.send("bench", image_urls=image_urls), count)
+            print(f"{label:>5} fresh session  p50 {fresh[0]:6.2f} ms  p99 {fresh[1]:6.2f} ms")
+            print(f"{label:>5} pooled session p50 {pooled[0]:6.2f} ms  p99 {pooled[1]:6.2f} ms")
+    finally:
+        await notifier.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
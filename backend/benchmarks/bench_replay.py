@@ -0,0 +1,93 @@
+"""End-to-end latency of DiscordMonitor from gateway event to Pushover POST.
+
+Replays a recorded or synthetic message stream through an instrumented
+monitor (see benchmarks.harness), with the store and outbox on a temporary
+directory and Pushover and the CDN stubbed locally. Prints throughput and
+p50/p99/p99.9 latency for the filter, history, delivery and end-to-end
+stages. With --json the report is written as JSON for CI to compare
+between runs, and --max-p99 fails the run when the end-to-end p99 exceeds
+the given milliseconds.
+
+Usage: python -m benchmarks.bench_replay [--input stream.jsonl] [--count N]
+           [--rate MSGS_PER_SEC] [--keywords a,b] [--json report.json] [--max-p99 MS]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+from app.models.config import FilterConfig, Settings
+from benchmarks.harness import InstrumentedMonitor, StubServices, generate, load, replay
+
+
+async def run(args) -> dict:
+    stream = load(args.input) if args.input else list(generate(args.count))
+    authors = sorted({m["author_id"] for m in stream})
+    # Monitor everyone in a recording; a quarter of the synthetic authors
+    targets = authors if args.input else authors[::4]
+    stubs = StubServices()
+    await stubs.start()
+    with tempfile.TemporaryDirectory() as directory:
+        settings = Settings(
+            discord_token="replay",
+            channel_ids=sorted({m["channel_id"] for m in stream}),
+            target_user_ids=targets,
+            pushover_user_key="replay",
+            pushover_api_token="replay",
+            filters=FilterConfig(keywords=args.keywords.split(",") if args.keywords else []),
+            message_store_path=os.path.join(directory, "messages.db"),
+            notification_outbox_path=os.path.join(directory, "outbox.db"),
+            # Measure each notification on its own rather than waiting out digests
+            notification_digest_window=0.0
+        )
+        monitor = InstrumentedMonitor(settings)
+        monitor.notifier.api_url = stubs.api_url
+        # Failures are counted in the report; keep the per-message log lines out of it
+        with contextlib.redirect_stdout(io.StringIO()):
+            await monitor.start_services()
+            try:
+                report = await replay(monitor, stream, stubs, rate=args.rate)
+            finally:
+                await monitor.close()
+    await stubs.stop()
+    return report
+
+
+def _print(report: dict):
+    print(f"{report['messages']} messages, {report['matched']} matched, "
+          f"{report['delivered']} delivered in {report['pushover_posts']} POSTs, "
+          f"{report['elapsed_seconds']}s ({report['throughput']} msg/s)")
+    for stage, p in report["stages"].items():
+        if p["count"]:
+            print(f"  {stage:<11} n={p['count']:<6} p50 {p['p50']:9.3f} ms  "
+                  f"p99 {p['p99']:9.3f} ms  p99.9 {p['p999']:9.3f} ms")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", help="JSON-lines message stream (default: synthetic)")
+    parser.add_argument("--count", type=int, default=5000, help="synthetic messages to generate")
+    parser.add_argument("--rate", type=float, default=0.0, help="messages per second, 0 for unpaced")
+    parser.add_argument("--keywords", default="", help="comma-separated keyword filter")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--max-p99", type=float, help="fail if end-to-end p99 exceeds this many ms")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    _print(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    p99 = report["stages"]["end_to_end"]["p99"]
+    if args.max_p99 is not None and (p99 is None or p99 > args.max_p99):
+        print(f"end-to-end p99 {p99} ms exceeds {args.max_p99} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,75 @@
+"""Time from launching the server to its first HTTP response, and to exit.
+
+Starts uvicorn in a subprocess with placeholder credentials, so the Discord
+login never succeeds; the API should still answer immediately because the
+gateway connection runs in the background.
+
+Usage: python -m benchmarks.bench_startup [runs]
+"""
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _launch(port: int, store_dir: str) -> subprocess.Popen:
+    env = dict(os.environ,
+               DISCORD_TOKEN="placeholder",
+               CHANNEL_IDS="[1]",
+               TARGET_USER_IDS="[1]",
+               PUSHOVER_USER_KEY="placeholder",
+               PUSHOVER_API_TOKEN="placeholder",
+               MESSAGE_STORE_PATH=os.path.join(store_dir, "messages.db"))
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def _first_response(port: int, timeout: float = 30.0) -> float:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/status", timeout=1) as response:
+                response.read()
+                return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.005)
+    raise TimeoutError("server did not respond")
+
+
+def run(runs: int = 5):
+    ready, shutdown = [], []
+    for _ in range(runs):
+        port = _free_port()
+        with tempfile.TemporaryDirectory() as store_dir:
+            launched = time.perf_counter()
+            process = _launch(port, store_dir)
+            try:
+                _first_response(port)
+                ready.append(time.perf_counter() - launched)
+            finally:
+                stopping = time.perf_counter()
+                process.send_signal(signal.SIGINT)
+                process.wait(timeout=30)
+                shutdown.append(time.perf_counter() - stopping)
+    print(f"time to first HTTP response: median {statistics.median(ready) * 1000:.0f} ms "
+          f"(max {max(ready) * 1000:.0f} ms)")
+    print(f"time to clean shutdown:      median {statistics.median(shutdown) * 1000:.0f} ms "
+          f"(max {max(shutdown) * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,69 @@
+"""Insert throughput and query latency of the SQLite message store.
+
+Usage: python -m benchmarks.bench_store [rows]   (default 1,000,000)
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from app.discord.history import HistoryRecord
+from app.services.store import MessageStore
+
+WORDS = ("lock", "over", "under", "points", "rebounds", "assists", "parlay", "slip",
+         "tonight", "prizepicks", "tail", "fade", "max", "unit", "boost", "line")
+
+
+def _record(rng: random.Random, seq: int) -> HistoryRecord:
+    channel_id = rng.randrange(50)
+    author_id = rng.randrange(500)
+    content = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 25)))
+    return HistoryRecord(seq, time.strftime("%Y-%m-%d %H:%M:%S"), channel_id,
+                         f"Guild - #channel-{channel_id}", author_id, f"user{author_id}",
+                         content, [], [])
+
+
+async def _latency(label: str, query, runs: int = 200):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await query()
+        samples.append((time.perf_counter() - start) * 1000)
+    p50 = statistics.median(samples)
+    p99 = statistics.quantiles(samples, n=100)[98]
+    print(f"{label:<28} p50 {p50:7.3f} ms  p99 {p99:7.3f} ms")
+
+
+async def run(rows: int):
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MessageStore(os.path.join(tmp, "bench.db"), batch_size=1000)
+        await store.start()
+
+        start = time.perf_counter()
+        for seq in range(1, rows + 1):
+            store.append(_record(rng, seq))
+            if seq % store.batch_size == 0:
+                # Let the flush task pick up the full batch, as the gateway loop would
+                await asyncio.sleep(0)
+        await store.flush()
+        while store.written < rows:
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        print(f"inserted {rows:,} rows in {elapsed:.1f} s ({rows / elapsed:,.0f} rows/s)")
+
+        mid = rows // 2
+        await _latency("latest page", lambda: store.query(limit=50))
+        await _latency("keyset page (before=mid)", lambda: store.query(before=mid, limit=50))
+        await _latency("forward page (since=mid)", lambda: store.query(since=mid, limit=50))
+        await _latency("channel filter", lambda: store.query(channel=rng.randrange(50), limit=50))
+        await _latency("author filter", lambda: store.query(author=rng.randrange(500), limit=50))
+        await _latency("full-text search", lambda: store.query(search="parlay AND boost", limit=50))
+        await store.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000))
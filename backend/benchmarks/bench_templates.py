@@ -0,0 +1,101 @@
+"""Compare compiled notification templates with the original string building."""
+import random
+import string
+import timeit
+
+from app.discord.filters import compile_filters
+from app.discord.templates import MESSAGE_LIMIT, compile_template
+from app.models.config import FilterConfig
+
+
+def legacy_format(filters, author: str, channel: str, content: str, attachments, embeds):
+    """The pre-template message building of DiscordMonitor._notify_tracked."""
+    push_msg = f"{author}: {content}"
+    image_urls = []
+    for filename, url, size in attachments:
+        if filters.is_image(filename):
+            image_urls.append(url)
+        else:
+            push_msg += f"\n📎 {url}"
+    for title, description, image_url in embeds:
+        if title:
+            embed_text = f"\n📌 {title}"
+            if description:
+                embed_text += f": {description}"
+            push_msg += embed_text
+        if image_url:
+            image_urls.append(image_url)
+    return push_msg, f"Discord: {channel}", image_urls
+
+
+def template_format(filters, template, author: str, channel: str, content: str, attachments, embeds):
+    """The same through a compiled template, as DiscordMonitor._notify_tracked now does."""
+    image_urls = []
+    files = []
+    for filename, url, size in attachments:
+        if filters.is_image(filename):
+            image_urls.append(url)
+        else:
+            files.append(url)
+    for _, _, image_url in embeds:
+        if image_url:
+            image_urls.append(image_url)
+    return (template.message(author, channel, content, files, embeds),
+            template.title(author, channel, content), image_urls)
+
+
+def _word(rng: random.Random, size: int) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(size))
+
+
+def _messages(rng: random.Random, count: int, max_words: int):
+    messages = []
+    for i in range(count):
+        content = " ".join(_word(rng, rng.randint(2, 9)) for _ in range(rng.randint(5, max_words)))
+        if rng.random() < 0.3:
+            content += f" https://prizepicks.onelink.me/{_word(rng, 8)}"
+        attachments = [(f"{_word(rng, 6)}.{rng.choice(['png', 'jpg', 'pdf', 'txt'])}",
+                        f"https://cdn.discordapp.com/attachments/1/{i}/{_word(rng, 6)}", 1000)
+                       for _ in range(rng.randint(0, 3))]
+        embeds = [(_word(rng, 12), _word(rng, rng.randint(0, 40)) or None,
+                   f"https://media.discordapp.net/{_word(rng, 10)}.png" if rng.random() < 0.5 else None)
+                  for _ in range(rng.randint(0, 2))]
+        messages.append((f"User {i % 20} (@user{i % 20})", f"Guild - #{_word(rng, 8)}",
+                         content, attachments, embeds))
+    return messages
+
+
+def run(message_count=2000, repeat=5):
+    rng = random.Random(1234)
+    filters = compile_filters(FilterConfig())
+    templates = {
+        "default": compile_template(),
+        "custom": compile_template("[{channel}] {author}\n{content}{links}{attachments}{embeds}"),
+    }
+    print(f"{'words':>6} {'template':<9} {'legacy us/msg':>14} {'template us/msg':>16} {'ratio':>7} {'truncated':>10}")
+    for max_words in (20, 120, 400):
+        messages = _messages(rng, message_count, max_words)
+        truncated = 0
+        for message in messages:
+            expected, _, _ = legacy_format(filters, *message)
+            actual, title, _ = template_format(filters, templates["default"], *message)
+            if len(expected) <= MESSAGE_LIMIT:
+                assert expected == actual, expected
+            else:
+                truncated += 1
+                assert len(actual) == MESSAGE_LIMIT and expected.startswith(actual[:-1])
+
+        legacy = min(timeit.repeat(
+            lambda: [legacy_format(filters, *m) for m in messages], number=1, repeat=repeat))
+        per_legacy = legacy / message_count * 1e6
+        for name, template in templates.items():
+            fast = min(timeit.repeat(
+                lambda: [template_format(filters, template, *m) for m in messages],
+                number=1, repeat=repeat))
+            per_fast = fast / message_count * 1e6
+            print(f"{max_words:>6} {name:<9} {per_legacy:>14.2f} {per_fast:>16.2f} "
+                  f"{per_legacy / per_fast:>6.2f}x {truncated:>10}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,260 @@
+"""Replay message streams through a real DiscordMonitor without Discord.
+
+A stream is JSON lines, one message per line:
+
+    {"at": 0.25, "channel_id": 1, "author_id": 7, "author": "capper",
+     "content": "lock of the day", "attachments": ["slip.png"],
+     "embeds": [{"title": "Pick", "description": "Over 24.5"}]}
+
+``at`` (seconds from the start) is optional; without it messages are
+paced by the replay rate. Each message becomes a MESSAGE_CREATE payload
+fed into discord.py's parser, so it goes through the same on_message path
+as live traffic. Notifications are delivered to a local stub of the
+Pushover API, and attachments are served by a stub CDN.
+
+The monitor is instrumented to time each stage per message:
+
+- filter: matching the message against the compiled filters
+- history: recording it in history, the store and the live feed
+- delivery: from queuing the notification to Pushover receiving the POST
+- end_to_end: from the event arriving to Pushover receiving the POST
+"""
+import asyncio
+import json
+import random
+import re
+import statistics
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from aiohttp import web
+
+from app.discord.client import DiscordMonitor
+
+GUILD_ID = 100
+BOT_ID = 1
+TIMESTAMP = "2024-01-01T00:00:00+00:00"
+# Every replayed message carries a marker so its notification can be matched up
+MARKER = re.compile(r"⟦(\d+)⟧")
+IMAGE = b"\xff\xd8\xff" + b"\0" * 32 * 1024
+
+WORDS = ("lock", "over", "under", "points", "rebounds", "assists", "parlay", "slip",
+         "tonight", "tail", "fade", "max", "unit", "boost", "line", "hammer")
+
+
+def load(path: str) -> List[Dict]:
+    """Read a JSON-lines message stream."""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def generate(count: int = 5000, channels: int = 5, authors: int = 20,
+             image_ratio: float = 0.1, seed: int = 1) -> Iterator[Dict]:
+    """Yield a synthetic stream of chatter from ``authors`` users across ``channels``."""
+    rng = random.Random(seed)
+    for seq in range(count):
+        author_id = 1000 + rng.randrange(authors)
+        message = {
+            "channel_id": 500 + rng.randrange(channels),
+            "author_id": author_id,
+            "author": f"user{author_id}",
+            "content": " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 30)))
+        }
+        if rng.random() < image_ratio:
+            # Distinct uploads, so duplicate suppression doesn't merge them
+            message["attachments"] = [f"slip-{seq}.png"]
+        yield message
+
+
+def percentiles(samples: List[float]) -> Dict:
+    """p50, p99 and p99.9 of a list of seconds, in milliseconds."""
+    if not samples:
+        return {"count": 0, "p50": None, "p99": None, "p999": None}
+    if len(samples) == 1:
+        cuts = samples * 999
+    else:
+        cuts = statistics.quantiles(samples, n=1000, method="inclusive")
+    return {
+        "count": len(samples),
+        "p50": round(cuts[499] * 1000, 3),
+        "p99": round(cuts[989] * 1000, 3),
+        "p999": round(cuts[998] * 1000, 3)
+    }
+
+
+class StubServices:
+    """Local stand-ins for the Pushover API and the Discord CDN."""
+
+    def __init__(self):
+        self.received: Dict[int, float] = {}
+        self.posts = 0
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+
+    async def _messages(self, request):
+        form = await request.post()
+        now = time.perf_counter()
+        self.posts += 1
+        for marker in MARKER.findall(form["message"]):
+            self.received.setdefault(int(marker), now)
+        return web.json_response({"status": 1, "request": "replay"},
+                                 headers={"X-Limit-App-Limit": "10000",
+                                          "X-Limit-App-Remaining": "9000"})
+
+    async def _image(self, request):
+        return web.Response(body=IMAGE, content_type="image/jpeg")
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/1/messages.json", self._messages)
+        app.router.add_get("/attachments/{name}", self._image)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.base_url}/1/messages.json"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+class InstrumentedMonitor(DiscordMonitor):
+    """DiscordMonitor that times each stage of handling a replayed message."""
+
+    def __init__(self, settings, **options):
+        super().__init__(settings, **options)
+        self.received_at: Dict[int, float] = {}
+        self.queued_at: Dict[int, float] = {}
+        self.filter_times: List[float] = []
+        self.history_times: List[float] = []
+        self.handled = 0
+
+    def _check_filters(self, message, route) -> bool:
+        start = time.perf_counter()
+        try:
+            return super()._check_filters(message, route)
+        finally:
+            self.filter_times.append(time.perf_counter() - start)
+
+    def record_message(self, **fields):
+        start = time.perf_counter()
+        try:
+            return super().record_message(**fields)
+        finally:
+            self.history_times.append(time.perf_counter() - start)
+
+    async def _send_notification(self, message: str, title: Optional[str] = None,
+                               image_urls: Optional[List[str]] = None, notifications=None):
+        now = time.perf_counter()
+        for marker in MARKER.findall(message):
+            self.queued_at[int(marker)] = now
+        await super()._send_notification(message, title=title, image_urls=image_urls,
+                                         notifications=notifications)
+
+    async def on_message(self, message):
+        await super().on_message(message)
+        self.handled += 1
+
+
+def _guild_create(channel_ids: Iterable[int]) -> Dict:
+    return {
+        "id": str(GUILD_ID), "name": "Replay", "icon": None, "owner_id": str(BOT_ID),
+        "afk_timeout": 300, "verification_level": 0, "default_message_notifications": 0,
+        "explicit_content_filter": 0, "mfa_level": 0, "nsfw_level": 0, "premium_tier": 0,
+        "features": [], "preferred_locale": "en-US", "large": False, "member_count": 1,
+        "joined_at": TIMESTAMP, "unavailable": False, "emojis": [], "stickers": [],
+        "threads": [], "presences": [], "voice_states": [], "members": [],
+        "roles": [{"id": str(GUILD_ID), "name": "@everyone", "color": 0, "hoist": False,
+                   "position": 0, "permissions": "0", "managed": False,
+                   "mentionable": False, "flags": 0}],
+        "channels": [{"id": str(c), "type": 0, "name": f"channel-{c}", "position": i,
+                      "permission_overwrites": [], "parent_id": None, "nsfw": False}
+                     for i, c in enumerate(sorted(channel_ids))]
+    }
+
+
+def _message_create(seq: int, message: Dict, cdn_url: str) -> Dict:
+    author = {"id": str(message["author_id"]), "username": message.get("author", "user"),
+              "discriminator": "0", "global_name": message.get("author"), "avatar": None}
+    attachments = [{"id": str(seq * 10 + i), "filename": name, "size": len(IMAGE),
+                    "url": f"{cdn_url}/attachments/{name}",
+                    "proxy_url": f"{cdn_url}/attachments/{name}"}
+                   for i, name in enumerate(message.get("attachments", []))]
+    embeds = [{"type": "rich", **embed} for embed in message.get("embeds", [])]
+    return {
+        "id": str(10**6 + seq), "channel_id": str(message["channel_id"]),
+        "guild_id": str(GUILD_ID), "author": author,
+        "member": {"roles": [], "joined_at": TIMESTAMP, "deaf": False, "mute": False, "flags": 0},
+        "content": f"{message['content']} ⟦{seq}⟧", "timestamp": TIMESTAMP,
+        "edited_timestamp": None, "tts": False, "mention_everyone": False, "mentions": [],
+        "mention_roles": [], "attachments": attachments, "embeds": embeds,
+        "pinned": False, "type": 0
+    }
+
+
+async def replay(monitor: InstrumentedMonitor, stream: List[Dict], stubs: StubServices,
+                 rate: float = 0.0, settle_timeout: float = 30.0) -> Dict:
+    """Feed a stream through a monitor and collect per-stage latencies.
+
+    The monitor's services must be started and its notifier pointed at
+    ``stubs``. ``rate`` is messages per second; 0 replays as fast as
+    possible. Messages with an ``at`` offset keep their recorded timing.
+    """
+    await monitor._async_setup_hook()  # Binds the loop, as logging in would
+    state = monitor._connection
+    state.parsers["READY"]({
+        "v": 10, "user": {"id": str(BOT_ID), "username": "replay", "discriminator": "0",
+                          "avatar": None, "bot": True},
+        "session_id": "replay", "guilds": [], "application": {"id": str(BOT_ID), "flags": 0}
+    })
+    state._ready_task.cancel()
+    state.parsers["GUILD_CREATE"](_guild_create({m["channel_id"] for m in stream}))
+    monitor._resolve_channels()
+
+    payloads = [_message_create(seq, m, stubs.base_url) for seq, m in enumerate(stream)]
+    parse = state.parsers["MESSAGE_CREATE"]
+    start = time.perf_counter()
+    for seq, (message, payload) in enumerate(zip(stream, payloads)):
+        due = message.get("at", seq / rate if rate > 0 else None)
+        if due is not None:
+            delay = start + due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        monitor.received_at[seq] = time.perf_counter()
+        parse(payload)
+        if due is None and seq % 256 == 0:
+            await asyncio.sleep(0)  # Let handlers run between bursts
+    fed = time.perf_counter() - start
+
+    # Wait until every handler ran and every queued notification was posted
+    deadline = time.perf_counter() + settle_timeout
+    while time.perf_counter() < deadline:
+        if (monitor.handled >= len(stream)
+                and len(stubs.received) >= len(monitor.queued_at)
+                and not monitor.outbox.stats()["pending"]):
+            break
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+
+    delivered = [seq for seq in monitor.queued_at if seq in stubs.received]
+    return {
+        "messages": len(stream),
+        "matched": len(monitor.queued_at),
+        "delivered": len(delivered),
+        "pushover_posts": stubs.posts,
+        "feed_seconds": round(fed, 3),
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput": round(len(stream) / elapsed, 1) if elapsed else None,
+        "stages": {
+            "filter": percentiles(monitor.filter_times),
+            "history": percentiles(monitor.history_times),
+            "delivery": percentiles([stubs.received[s] - monitor.queued_at[s] for s in delivered]),
+            "end_to_end": percentiles([stubs.received[s] - monitor.received_at[s] for s in delivered])
+        }
+    }
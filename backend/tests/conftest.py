@@ -0,0 +1,97 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Dict, Tuple
+
+import pytest
+
+from app.discord.client import DiscordMonitor
+from app.models.config import FilterConfig, Settings
+
+IMAGE = {"filename": "slip.png", "url": "https://cdn.discordapp.com/attachments/1/2/slip.png", "size": 10}
+NEW_IMAGE = {"filename": "slip2.png", "url": "https://cdn.discordapp.com/attachments/1/3/slip2.png",
+             "size": 20}
+
+def make_settings(**overrides) -> Settings:
+    """Settings for a monitor with nothing on disk."""
+    values = dict(
+        discord_token="test",
+        channel_ids=[1],
+        target_user_ids=[7],
+        pushover_user_key="test",
+        pushover_api_token="test",
+        filters=FilterConfig(enabled=False),
+        message_store_path=None,
+        notification_outbox_path=None,
+        config_path=None,
+        dedup_window=0,
+    )
+    values.update(overrides)
+    return Settings(**values)
+
+
+def make_edit(message_id: int, content: str, attachments=()):
+    """A raw edit event for a message in channel 1 by user 7."""
+    return SimpleNamespace(message_id=message_id, channel_id=1, data={
+        "id": str(message_id),
+        "author": {"id": "7", "username": "capper"},
+        "content": content,
+        "attachments": list(attachments),
+        "embeds": [],
+    })
+
+
+def make_message(message_id: int, content: str, attachments=()):
+    """A message in channel 1 by user 7, with attachments given as dicts like ``IMAGE``."""
+    author = SimpleNamespace(id=7, name="capper", display_name="Capper")
+    channel = SimpleNamespace(id=1, name="picks")
+    return SimpleNamespace(
+        id=message_id, channel=channel, author=author, guild=SimpleNamespace(name="Guild"),
+        content=content, embeds=[],
+        attachments=[SimpleNamespace(filename=a["filename"], url=a["url"], size=a["size"])
+                     for a in attachments])
+
+
+@pytest.fixture
+def loop():
+    """A fresh event loop set as current, closed on teardown."""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+    asyncio.set_event_loop(None)
+
+
+@pytest.fixture
+def monitor(loop):
+    """A monitor routing channel 1 and user 7, with notifications captured in ``sent``."""
+    client = DiscordMonitor(make_settings())
+    client.routing = client.routing.replace(channel_ids=[1])
+    client.sent = []
+
+    async def capture(message, title=None, image_urls=None, notifications=None):
+        client.sent.append({"message": message, "title": title, "image_urls": image_urls})
+
+    client._send_notification = capture
+    return client
+
+async def asgi_get(app, path: str, query: str = "", headers: Dict[str, str] = None) -> Tuple[int, Dict[str, str], bytes]:
+    """One GET through the ASGI interface, returning status, headers and body."""
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+             "query_string": query.encode(),
+             "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+             "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 7777)}
+    response: Dict = {"body": b""}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode(): v.decode() for k, v in message["headers"]}
+        else:
+            response["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return response["status"], response["headers"], response["body"]
@@ -0,0 +1,57 @@
+"""Validation of the notification configuration, and how it is served."""
+import asyncio
+
+import orjson
+import pytest
+from pydantic import ValidationError
+
+from app import main
+from app.discord.client import DiscordMonitor
+from app.models.config import NotificationConfig, RoutingRule
+from app.models.enums import NotificationPriority
+
+from .conftest import asgi_get, make_settings
+
+
+def test_priority_accepts_the_ui_string_and_a_json_integer():
+    assert NotificationConfig(priority="2").priority is NotificationPriority.EMERGENCY
+    assert NotificationConfig.model_validate_json('{"priority": 2}').priority is \
+        NotificationPriority.EMERGENCY
+    assert NotificationConfig(priority=-1).priority is NotificationPriority.LOW
+    assert NotificationConfig(priority=2).model_dump(mode="json")["priority"] == "2"
+
+
+def test_unknown_priority_is_rejected():
+    with pytest.raises(ValidationError):
+        NotificationConfig(priority=3)
+
+
+@pytest.mark.parametrize("fields", [{"retry": 29}, {"expire": 10801}, {"expire": 0}])
+def test_emergency_limits_are_validated(fields):
+    with pytest.raises(ValidationError):
+        NotificationConfig(priority=2, **fields)
+
+
+def test_rule_with_emergency_notifications():
+    rule = RoutingRule.model_validate_json(
+        '{"channel_id": "1", "notifications": {"priority": 2, "retry": 30, "expire": 10800}}')
+    assert rule.notifications.priority is NotificationPriority.EMERGENCY
+    assert (rule.notifications.retry, rule.notifications.expire) == (30, 10800)
+
+
+def test_config_ids_are_served_as_strings():
+    snowflake = 1234567890123456789  # Beyond JavaScript's safe integers
+    monitor = DiscordMonitor(make_settings(
+        channel_ids=[snowflake], target_user_ids=[7],
+        rules=[RoutingRule(channel_id=snowflake, notifications=NotificationConfig(priority=1))]))
+    main.discord_client = monitor
+    try:
+        status, _, body = asyncio.run(asgi_get(main.app, "/api/config"))
+    finally:
+        main.discord_client = None
+    assert status == 200
+    config = orjson.loads(body)
+    assert config["channel_ids"] == [str(snowflake)]
+    assert config["target_user_ids"] == ["7"]
+    assert config["rules"][0]["channel_id"] == str(snowflake)
+    assert config["notifications"]["priority"] == "0"
@@ -0,0 +1,37 @@
+"""Debounced saving of the configuration."""
+import asyncio
+import json
+
+from app.services.config_store import ConfigStore
+
+
+def test_changes_within_the_delay_are_saved_once(tmp_path):
+    async def run():
+        store = ConfigStore(str(tmp_path / "config.json"), delay=0.05)
+        for i in range(3):
+            store.schedule(lambda i=i: {"channel_ids": [i]})
+        assert store.stats()["pending"]
+        await asyncio.sleep(0.2)
+        return store
+
+    store = asyncio.run(run())
+    assert store.saves == 1
+    assert store.coalesced == 2
+    assert store.load() == {"channel_ids": [2]}
+
+
+def test_flush_saves_at_once_and_cancels_the_delayed_save(tmp_path):
+    async def run():
+        store = ConfigStore(str(tmp_path / "config.json"), delay=60.0)
+        store.schedule(lambda: {"channel_ids": [1]})
+        task = store._task
+        await store.flush()
+        await asyncio.sleep(0)
+        assert task.cancelled()
+        return store
+
+    store = asyncio.run(run())
+    assert store.saves == 1
+    assert not store.stats()["pending"]
+    with open(tmp_path / "config.json") as f:
+        assert json.load(f) == {"channel_ids": [1]}
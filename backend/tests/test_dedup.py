@@ -0,0 +1,98 @@
+import time
+
+from app.services.dedup import DuplicateIndex
+
+from .conftest import make_message
+
+
+def _notify(index: DuplicateIndex, seq: int, text: str, images=()):
+    """Check and remember a message, like DiscordMonitor._handle_match."""
+    fingerprint = index.fingerprint(text, images)
+    original = index.find(fingerprint)
+    index.add(fingerprint, seq if original is None else original)
+    return original
+
+
+def test_same_text_is_duplicate():
+    index = DuplicateIndex()
+    assert _notify(index, 1, "Tail this now https://prizepicks.onelink.me/aaa") is None
+    assert _notify(index, 2, "Tail this now https://prizepicks.onelink.me/aaa") == 1
+
+
+def test_near_duplicate_text_is_duplicate():
+    index = DuplicateIndex()
+    assert _notify(index, 1, "Lock of the day: LeBron over 25.5 points tonight, tail it") is None
+    assert _notify(index, 2, "LOCK of the day!! LeBron over 25.5 points tonight, tail it 🔥") == 1
+
+
+def test_same_text_with_different_link_is_not_duplicate():
+    index = DuplicateIndex()
+    assert _notify(index, 1, "Tail this now https://prizepicks.onelink.me/aaa") is None
+    assert _notify(index, 2, "Tail this now https://prizepicks.onelink.me/bbb") is None
+
+
+def test_near_duplicate_text_with_new_link_is_not_duplicate():
+    index = DuplicateIndex()
+    assert _notify(index, 1, "Lock of the day tail it right now https://prizepicks.onelink.me/aaa") is None
+    assert _notify(index, 2, "Lock of the day tail it now https://prizepicks.onelink.me/bbb") is None
+
+
+def test_link_query_string_is_ignored():
+    index = DuplicateIndex()
+    assert _notify(index, 1, "Tail this now https://prizepicks.onelink.me/aaa?utm=1") is None
+    assert _notify(index, 2, "Tail this now https://prizepicks.onelink.me/aaa?utm=2.") == 1
+
+
+def test_same_caption_with_different_image_is_not_duplicate():
+    index = DuplicateIndex()
+    assert _notify(index, 1, "New slip, tail this one", ["slip1.png:1000"]) is None
+    assert _notify(index, 2, "New slip, tail this one", ["slip2.png:2000"]) is None
+
+
+def test_same_caption_without_new_image_is_duplicate():
+    index = DuplicateIndex()
+    assert _notify(index, 1, "New slip, tail this one", ["slip1.png:1000"]) is None
+    assert _notify(index, 2, "New slip, tail this one") == 1
+
+
+def test_shared_image_is_duplicate():
+    index = DuplicateIndex()
+    assert _notify(index, 1, "Slip", ["slip1.png:1000"]) is None
+    assert _notify(index, 2, "Cross-posting this", ["slip1.png:1000"]) == 1
+
+
+def test_repeats_are_caught_for_a_window_after_the_latest_copy():
+    index = DuplicateIndex(window=0.1)
+    text = "Tail this now https://prizepicks.onelink.me/aaa"
+    assert _notify(index, 1, text, ["https://cdn.discordapp.com/attachments/1/2/slip.png"]) is None
+    time.sleep(0.07)
+    assert _notify(index, 2, text) == 1
+    assert _notify(index, 3, "slip", ["https://cdn.discordapp.com/attachments/1/2/slip.png"]) == 1
+    time.sleep(0.07)  # Past the first copy's window, within the second's
+    assert _notify(index, 4, text) == 1
+    assert _notify(index, 5, "again", ["https://cdn.discordapp.com/attachments/1/2/slip.png"]) == 1
+
+
+def test_index_points_at_the_newest_entry():
+    index = DuplicateIndex(window=0.1)
+    fingerprint = index.fingerprint("Tail this now, big play tonight")
+    index.add(fingerprint, 1)
+    time.sleep(0.07)
+    index.add(fingerprint, 2)
+    time.sleep(0.07)
+    assert index.find(fingerprint) == 2
+
+
+def test_attachments_are_keyed_by_url_not_name_and_size(loop, monitor):
+    monitor.dedup = DuplicateIndex()
+    first = {"filename": "slip.png", "url": "https://cdn.discordapp.com/attachments/1/2/slip.png",
+             "size": 10}
+    other = {**first, "url": "https://cdn.discordapp.com/attachments/1/3/slip.png"}
+    loop.run_until_complete(monitor._process_message(make_message(100, "first slip", [first])))
+    loop.run_until_complete(monitor._process_message(make_message(101, "second slip", [other])))
+    loop.run_until_complete(monitor._process_message(
+        make_message(102, "first again", [{**first, "url": first["url"] + "?ex=1"}])))
+    # Same name and size is a different image; the same URL, re-signed, is a repeat
+    assert len(monitor.sent) == 2
+    assert "first slip" in monitor.sent[0]["message"]
+    assert "second slip" in monitor.sent[1]["message"]
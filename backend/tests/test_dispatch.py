@@ -0,0 +1,59 @@
+"""The notification dispatcher's queue and emergency lane."""
+import asyncio
+
+from app.models.enums import NotificationPriority
+from app.services.dispatch import DispatchItem, NotificationDispatcher
+
+
+def test_emergency_items_skip_a_blocked_queue():
+    async def run():
+        release = asyncio.Event()
+        delivered = []
+
+        async def deliver(item: DispatchItem):
+            if int(item.priority) < 2:
+                await release.wait()
+            delivered.append(item.message)
+
+        dispatcher = NotificationDispatcher(deliver, maxsize=1, workers=1)
+        dispatcher.start()
+        await dispatcher.submit(DispatchItem("busy"))  # Taken by the only worker
+        await asyncio.sleep(0)
+        await dispatcher.submit(DispatchItem("queued"))  # Fills the queue
+        await asyncio.wait_for(
+            dispatcher.submit(DispatchItem("alert", priority=NotificationPriority.EMERGENCY)), 1.0)
+        await asyncio.sleep(0.01)
+        assert delivered == ["alert"]
+        assert dispatcher.stats()["urgent"] == 1
+
+        release.set()
+        await dispatcher.stop()
+        assert delivered == ["alert", "busy", "queued"]
+
+    asyncio.run(run())
+
+
+def test_merge_keeps_emergency_retry_and_expire():
+    item = DispatchItem("one", key="#picks")
+    item.merge(DispatchItem("two", key="#picks", priority=NotificationPriority.EMERGENCY,
+                            retry=30, expire=600))
+    assert item.priority is NotificationPriority.EMERGENCY
+    assert (item.retry, item.expire) == (30, 600)
+
+
+def test_stop_lets_in_flight_deliveries_finish():
+    async def run():
+        delivered = []
+
+        async def deliver(item: DispatchItem):
+            await asyncio.sleep(0.05)
+            delivered.append(item.message)
+
+        dispatcher = NotificationDispatcher(deliver, workers=1)
+        dispatcher.start()
+        await dispatcher.submit(DispatchItem("pick"))
+        await asyncio.sleep(0.01)  # Taken by the worker; the queue is empty
+        await dispatcher.stop(timeout=1.0)
+        assert delivered == ["pick"]
+
+    asyncio.run(run())
@@ -0,0 +1,33 @@
+import asyncio
+
+from .conftest import IMAGE, NEW_IMAGE, make_edit, make_message
+
+
+def _run(monitor, coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+def test_edit_adding_image_to_tracked_message_sends_followup(monitor):
+    _run(monitor, monitor._process_message(make_message(100, "pick", [IMAGE])))
+    assert len(monitor.sent) == 1
+    _run(monitor, monitor.on_raw_message_edit(make_edit(100, "pick", [IMAGE, NEW_IMAGE])))
+    assert len(monitor.sent) == 2
+    assert monitor.sent[1]["image_urls"] == [NEW_IMAGE["url"]]
+
+
+def test_edit_of_untracked_matched_message_sends_no_followup(monitor):
+    # Matched before a restart: in history, but not in the tracker
+    monitor.record_message(timestamp="2024-01-01 00:00:00", channel_id=1, channel="Guild - #picks",
+                           author_id=7, author="Capper (@capper)", content="pick",
+                           attachments=[IMAGE["url"]], embeds=[], message_id=100)
+    _run(monitor, monitor.on_raw_message_edit(make_edit(100, "pick, edited", [IMAGE])))
+    assert monitor.sent == []
+    record = monitor.history.find_message(100)
+    assert record.content == "pick, edited"
+    assert record.edited_at is not None
+
+
+def test_edit_of_unknown_message_that_matches_is_notified_once(monitor):
+    _run(monitor, monitor.on_raw_message_edit(make_edit(100, "pick", [IMAGE])))
+    assert len(monitor.sent) == 1
+    assert monitor.sent[0]["image_urls"] == [IMAGE["url"]]
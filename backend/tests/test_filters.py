@@ -0,0 +1,94 @@
+"""The compiled keyword and link matchers agree with a plain substring check."""
+import random
+
+import pytest
+
+from app.discord.filters import compile_filters
+from app.models.config import FilterConfig
+
+
+def _keywords(*keywords: str):
+    return compile_filters(FilterConfig(keywords=list(keywords), link_patterns=[], image_types=[]))
+
+
+def _legacy(keywords, content: str) -> bool:
+    """The check the trie regex replaced."""
+    content = content.lower()
+    return any(keyword.lower() in content for keyword in keywords)
+
+
+@pytest.mark.parametrize("content, expected", [
+    ("over tonight", True),
+    ("overtime", True),
+    ("take the under", True),
+    ("ove", False),
+    ("nothing here", False),
+])
+def test_overlapping_prefixes(content, expected):
+    matcher = _keywords("over", "overtime", "overs", "under", "unde")
+    assert matcher.matches_content(content) is expected
+
+
+@pytest.mark.parametrize("keyword, content, expected", [
+    ("25.5+", "LeBron 25.5+ points", True),
+    ("25.5+", "LeBron 2505 points", False),
+    ("(lock)", "today's (lock) is in", True),
+    ("(lock)", "today's lock is in", False),
+    ("a|b", "a|b", True),
+    ("a|b", "a", False),
+    ("$100", "win $100", True),
+    ("[vip]", "[VIP] pick", True),
+    ("\\d", "\\d", True),
+    ("\\d", "7", False),
+])
+def test_regex_metacharacters_are_literal(keyword, content, expected):
+    assert _keywords(keyword).matches_content(content) is expected
+
+
+def test_keywords_ignore_case():
+    matcher = _keywords("LoCk", "Über")
+    assert matcher.matches_content("LOCK OF THE DAY")
+    assert matcher.matches_content("über pick")
+
+
+def test_keywords_match_across_word_boundaries():
+    # Keywords were always plain substrings, and still are
+    matcher = _keywords("lock")
+    assert matcher.matches_content("unlocked")
+    assert matcher.matches_content("lock-of-the-day")
+    assert matcher.matches_content("#lock")
+    assert not matcher.matches_content("l o c k")
+
+
+def test_link_patterns_are_case_sensitive_substrings():
+    matcher = compile_filters(FilterConfig(keywords=[], link_patterns=["prizepicks.onelink.me"],
+                                           image_types=[]))
+    assert matcher.matches_content("tail https://prizepicks.onelink.me/abc")
+    assert not matcher.matches_content("tail https://PrizePicks.onelink.me/abc")
+    assert not matcher.matches_content("prizepicks onelink me")
+
+
+def test_very_long_keyword_compiles():
+    long = "x" * 5000
+    matcher = _keywords(long, "short")
+    assert matcher.matches_content("y" + long)
+    assert not matcher.matches_content(long[1:])
+
+
+def test_deeply_nested_keywords_compile():
+    # Each word branches off the previous one's chain, nesting the regex too deep to parse
+    matcher = _keywords(*("a" * n + "b" for n in range(1, 600)))
+    assert matcher.matches_content("c" + "a" * 300 + "b")
+    assert not matcher.matches_content("a" * 700)
+
+
+def test_random_keyword_sets_match_the_legacy_check():
+    rng = random.Random(7)
+    alphabet = "abc.+*()? "
+    for _ in range(200):
+        keywords = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4)))
+                    for _ in range(rng.randint(1, 8))]
+        matcher = _keywords(*keywords)
+        for _ in range(10):
+            content = "".join(rng.choice(alphabet + "ABC") for _ in range(rng.randint(0, 12)))
+            assert matcher.matches_content(content) == _legacy(keywords, content), (keywords, content)
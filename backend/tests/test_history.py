@@ -0,0 +1,138 @@
+import asyncio
+import gzip
+
+import orjson
+import pytest
+
+from app import main
+from app.discord.client import DiscordMonitor
+from app.discord.history import MessageHistory
+
+from .conftest import asgi_get, make_settings
+
+
+def _append(history: MessageHistory, i: int, channel_id: int = 1, author_id: int = 7,
+            message_id: int = None):
+    return history.append(timestamp=f"2024-01-01 00:00:{i:02d}", channel_id=channel_id,
+                          channel="Guild - #picks", author_id=author_id, author="Capper (@capper)",
+                          content=f"pick {i}", attachments=[], embeds=[], message_id=message_id)
+
+
+def test_overflow_evicts_oldest():
+    history = MessageHistory(capacity=3)
+    for i in range(5):
+        _append(history, i)
+    assert len(history) == 3
+    assert (history.first_seq, history.last_seq) == (3, 5)
+    assert history.get(2) is None
+    assert [r.content for r in history] == ["pick 2", "pick 3", "pick 4"]
+    assert [r.seq for r in history.query(since=1)] == [3, 4, 5]
+
+
+def test_indexes_drop_evicted_records():
+    history = MessageHistory(capacity=4)
+    _append(history, 0, channel_id=1, author_id=7)
+    _append(history, 1, channel_id=2, author_id=8)
+    _append(history, 2, channel_id=1, author_id=8)
+    for i in range(3, 6):
+        _append(history, i, channel_id=3, author_id=9)
+    # Seqs 1 and 2 are gone; seq 3 (channel 1, author 8) is the only survivor of the first three
+    assert [r.seq for r in history.query(channel=1)] == [3]
+    assert history.query(channel=2) == []
+    assert [r.seq for r in history.query(author=8)] == [3]
+    assert history.query(author=7) == []
+    assert [r.seq for r in history.query(channel=1, author=8)] == [3]
+    assert [r.seq for r in history.query(channel=3, author=9, limit=2)] == [5, 6]
+    assert 2 not in history._by_channel and 7 not in history._by_author
+
+
+def test_find_message_after_eviction():
+    history = MessageHistory(capacity=2)
+    _append(history, 0, message_id=100)
+    _append(history, 1, message_id=101)
+    assert history.find_message(100).content == "pick 0"
+    _append(history, 2, message_id=102)
+    assert history.find_message(100) is None
+    assert history.find_message(101).content == "pick 1"
+
+
+def test_update_changes_record_and_its_json():
+    history = MessageHistory(capacity=2)
+    record = _append(history, 0, message_id=100)
+    before = record.json
+    version = history.version
+    history.update(record, content="pick 0, edited", edited_at="2024-01-01 00:01:00")
+    assert history.version == version + 1
+    assert history.find_message(100).content == "pick 0, edited"
+    assert orjson.loads(record.json)["content"] == "pick 0, edited"
+    assert record.json != before
+    with pytest.raises(ValueError):
+        history.update(record, channel_id=2)
+
+
+def test_page_is_cached_until_history_changes():
+    history = MessageHistory(capacity=10)
+    _append(history, 0)
+    page = history.page(limit=5)
+    assert history.page(limit=5) is page
+    assert history.page(limit=4) is not page
+
+    _append(history, 1)
+    newer = history.page(limit=5)
+    assert newer is not page and newer.etag != page.etag
+    assert [m["content"] for m in orjson.loads(newer.body)] == ["pick 0", "pick 1"]
+
+    history.update(history.get(1), content="pick 0, edited")
+    edited = history.page(limit=5)
+    assert edited.etag != newer.etag
+    assert orjson.loads(edited.body)[0]["content"] == "pick 0, edited"
+
+
+@pytest.fixture
+def api_monitor():
+    """A monitor served by the API app, with an empty history."""
+    monitor = DiscordMonitor(make_settings())
+    main.discord_client = monitor
+    yield monitor
+    main.discord_client = None
+
+
+def test_messages_etag_answers_304_until_history_changes(api_monitor):
+    _append(api_monitor.history, 0)
+
+    async def run():
+        status, headers, body = await asgi_get(main.app, "/api/messages")
+        assert status == 200
+        assert [m["content"] for m in orjson.loads(body)] == ["pick 0"]
+        etag = headers["etag"]
+        assert etag.startswith("W/")
+
+        status, _, body = await asgi_get(main.app, "/api/messages", headers={"If-None-Match": etag})
+        assert (status, body) == (304, b"")
+
+        _append(api_monitor.history, 1)
+        status, headers, body = await asgi_get(main.app, "/api/messages",
+                                               headers={"If-None-Match": etag})
+        assert status == 200 and headers["etag"] != etag
+        assert len(orjson.loads(body)) == 2
+
+    asyncio.run(run())
+
+
+def test_large_messages_page_is_compressed_once(api_monitor):
+    for i in range(50):
+        _append(api_monitor.history, i)
+
+    async def run():
+        status, headers, body = await asgi_get(main.app, "/api/messages",
+                                               headers={"Accept-Encoding": "gzip"})
+        assert status == 200 and headers["content-encoding"] == "gzip"
+        assert len(orjson.loads(gzip.decompress(body))) == 50
+        page = api_monitor.history.page()
+        assert page.encoded["gzip"] == body
+
+        _, headers, plain = await asgi_get(main.app, "/api/messages")
+        assert "content-encoding" not in headers
+        assert plain == page.body
+
+    asyncio.run(run())
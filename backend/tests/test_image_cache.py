@@ -0,0 +1,38 @@
+"""The image cache's keys and its disk tier."""
+import asyncio
+import os
+
+from app.services.image_cache import ImageCache, cache_key
+
+PATH = "/attachments/1/2/slip.png"
+
+
+def test_signature_params_and_host_are_ignored():
+    assert cache_key(f"https://cdn.discordapp.com{PATH}?ex=1&is=2&hm=3") == \
+        cache_key(f"https://media.discordapp.net{PATH}?ex=4&is=5&hm=6")
+
+
+def test_resized_variants_get_their_own_entries():
+    small = cache_key(f"https://media.discordapp.net{PATH}?width=400&height=300&ex=1")
+    assert small == cache_key(f"https://media.discordapp.net{PATH}?ex=2&height=300&width=400")
+    assert small != cache_key(f"https://media.discordapp.net{PATH}?width=800&height=600")
+    assert small != cache_key(f"https://cdn.discordapp.com{PATH}")
+
+
+def test_other_urls_keep_their_query():
+    assert cache_key("https://example.com/a.png?v=1") != cache_key("https://example.com/a.png?v=2")
+
+
+def test_spilled_entries_are_read_back_and_evicted_from_disk(tmp_path):
+    async def run():
+        cache = ImageCache(max_bytes=100, spill_dir=str(tmp_path), spill_max_bytes=100)
+        for name in ("a", "b", "c"):
+            await cache.put(f"https://example.com/{name}.png", name.encode() * 60)
+        # a and b were pushed out of memory; a was then pushed off the disk by b
+        assert cache.stats()["spilled_entries"] == 1
+        assert len(os.listdir(tmp_path)) == 1
+        assert await cache.get("https://example.com/a.png") is None
+        assert await cache.get("https://example.com/b.png") == b"b" * 60
+        assert cache.disk_hits == 1
+
+    asyncio.run(run())
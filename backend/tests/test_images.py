@@ -0,0 +1,23 @@
+"""Pillow stays out of the monitor process."""
+import subprocess
+import sys
+
+from app.services.images import ImageProcessor, sniff
+
+
+def test_importing_images_does_not_load_pillow():
+    code = ("import sys; import app.services.pushover, app.services.images; "
+            "sys.exit('PIL' in sys.modules)")
+    assert subprocess.run([sys.executable, "-c", code]).returncode == 0
+
+
+def test_processor_is_disabled_until_started():
+    processor = ImageProcessor(workers=1)
+    assert not processor.enabled
+    assert processor.stats()["enabled"] is False
+
+
+def test_sniff():
+    assert sniff(b"\x89PNG\r\n\x1a\n....") == ("image/png", "png")
+    assert sniff(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == ("image/webp", "webp")
+    assert sniff(b"unknown") == ("image/jpeg", "jpg")
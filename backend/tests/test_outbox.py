@@ -0,0 +1,200 @@
+"""Retry and recovery of the notification outbox against a fake Pushover server."""
+import asyncio
+import os
+import time
+from typing import Dict, List
+
+from aiohttp import web
+
+from app.models.enums import OverflowPolicy
+
+from app.services.dispatch import DispatchItem, NotificationDispatcher
+from app.services.outbox import NotificationOutbox, RetryPolicy
+from app.services.pushover import PushoverNotifier
+
+
+class FakePushover:
+    """Answers each message with its scripted statuses in turn, then 200."""
+
+    def __init__(self):
+        self.script: Dict[str, List[int]] = {}
+        self.requests: Dict[str, int] = {}
+        self.down = False
+
+    async def messages(self, request):
+        form = await request.post()
+        message = form["message"]
+        self.requests[message] = self.requests.get(message, 0) + 1
+        if self.down:
+            return web.Response(status=503, text="maintenance")
+        statuses = self.script.get(message)
+        status = statuses.pop(0) if statuses else 200
+        if status == 200:
+            return web.json_response({"status": 1, "request": "test"})
+        return web.json_response({"status": 0, "errors": ["scripted"]}, status=status)
+
+
+class Pipeline:
+    """The monitor's delivery path: outbox, dispatcher and notifier."""
+
+    def __init__(self, api_url: str, path: str, policy: RetryPolicy):
+        self.notifier = PushoverNotifier("user", "token", api_url=api_url)
+        self.notifier.rate_limit.max_backoff = 0.0  # Don't wait out the scripted 429s
+        self.dispatcher = NotificationDispatcher(self.deliver, maxsize=100, workers=2,
+                                                 on_discard=lambda item: self.outbox.discard(item),
+                                                 on_merge=lambda item: self.outbox.update(item))
+        self.outbox = NotificationOutbox(self.dispatcher.submit, path=path, policy=policy,
+                                         rate_limit=self.notifier.rate_limit)
+
+    async def deliver(self, item: DispatchItem):
+        try:
+            await self.notifier.send(item.message)
+        except Exception as e:
+            self.outbox.failed(item, e)
+            raise
+        self.outbox.delivered(item)
+
+    async def start(self):
+        await self.notifier.start()
+        self.dispatcher.start()
+        await self.outbox.start()
+
+    async def submit(self, message: str):
+        item = DispatchItem(message)
+        await self.outbox.add(item)
+        await self.dispatcher.submit(item)
+
+    async def settle(self, timeout: float = 5.0):
+        deadline = time.monotonic() + timeout
+        while self.outbox.stats()["pending"] and time.monotonic() < deadline:
+            await asyncio.sleep(0.02)
+
+    async def stop(self):
+        await self.dispatcher.stop()
+        await self.outbox.stop()
+        await self.notifier.close()
+
+
+FAST = RetryPolicy(max_attempts=5, base_delay=0.01, max_delay=0.05)
+
+
+def _with_server(test):
+    """Run ``test(fake, api_url)`` with a fake Pushover server on a free port."""
+    async def run():
+        fake = FakePushover()
+        app = web.Application()
+        app.router.add_post("/1/messages.json", fake.messages)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            await test(fake, f"http://127.0.0.1:{port}/1/messages.json")
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(run())
+
+
+def test_server_errors_and_rate_limits_are_retried(tmp_path):
+    async def test(fake, api_url):
+        fake.script = {"five hundred": [500, 502], "rate limited": [429]}
+        pipeline = Pipeline(api_url, str(tmp_path / "outbox.db"), FAST)
+        await pipeline.start()
+        await pipeline.submit("five hundred")
+        await pipeline.submit("rate limited")
+        await pipeline.settle()
+        assert fake.requests == {"five hundred": 3, "rate limited": 2}
+        assert pipeline.outbox.stats()["pending"] == 0
+        assert pipeline.outbox.retried == 3
+        await pipeline.stop()
+
+    _with_server(test)
+
+
+def test_client_errors_are_not_retried(tmp_path):
+    async def test(fake, api_url):
+        fake.script = {"invalid": [400]}
+        pipeline = Pipeline(api_url, str(tmp_path / "outbox.db"), FAST)
+        await pipeline.start()
+        await pipeline.submit("invalid")
+        await pipeline.settle()
+        await asyncio.sleep(0.1)  # Longer than any retry delay
+        assert fake.requests == {"invalid": 1}
+        assert pipeline.outbox.given_up == 1
+        assert pipeline.outbox.stats()["pending"] == 0
+        await pipeline.stop()
+
+    _with_server(test)
+
+
+def test_pending_notifications_are_resent_after_restart(tmp_path):
+    async def test(fake, api_url):
+        path = str(tmp_path / "outbox.db")
+        fake.down = True
+        # Backoff long enough that nothing is retried before the restart
+        first = Pipeline(api_url, path, RetryPolicy(base_delay=60.0, max_delay=60.0))
+        await first.start()
+        for i in range(3):
+            await first.submit(f"pick {i}")
+        await asyncio.sleep(0.2)
+        assert first.outbox.stats()["pending"] == 3
+        await first.stop()
+        assert os.path.exists(path)
+
+        fake.down = False
+        second = Pipeline(api_url, path, FAST)
+        await second.start()
+        await second.settle()
+        assert second.outbox.recovered == 3
+        assert second.outbox.stats()["pending"] == 0
+        assert all(fake.requests[f"pick {i}"] == 2 for i in range(3))
+        await second.stop()
+
+    _with_server(test)
+
+
+def test_outbox_can_be_restarted_in_process(tmp_path):
+    async def test(fake, api_url):
+        pipeline = Pipeline(api_url, str(tmp_path / "outbox.db"), FAST)
+        await pipeline.start()
+        await pipeline.stop()
+        # A supervisor restart runs stop_services and start_services on the same objects
+        await pipeline.start()
+        await pipeline.submit("after restart")
+        await pipeline.settle()
+        assert fake.requests == {"after restart": 1}
+        assert pipeline.outbox.stats()["pending"] == 0
+        await pipeline.stop()
+
+    _with_server(test)
+
+
+def test_coalesced_notifications_survive_a_restart(tmp_path):
+    async def run():
+        path = str(tmp_path / "outbox.db")
+        # Workers never start, so the queue stays full and later items merge
+        dispatcher = NotificationDispatcher(lambda item: None, maxsize=1,
+                                            overflow_policy=OverflowPolicy.COALESCE,
+                                            on_discard=lambda item: outbox.discard(item),
+                                            on_merge=lambda item: outbox.update(item))
+        outbox = NotificationOutbox(dispatcher.submit, path=path)
+        await outbox.start()
+        for message in ("one", "two", "three"):
+            item = DispatchItem(message, key="#picks")
+            await outbox.add(item)
+            await dispatcher.submit(item)
+        await outbox.stop()
+
+        recovered = []
+
+        async def submit(item: DispatchItem):
+            recovered.append(item)
+
+        restarted = NotificationOutbox(submit, path=path)
+        await restarted.start()
+        await restarted.stop()
+        assert [item.message for item in recovered] == ["one\n\ntwo\n\nthree"]
+
+    asyncio.run(run())
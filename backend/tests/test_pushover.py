@@ -0,0 +1,77 @@
+"""The fields Pushover receives for text and image notifications."""
+import asyncio
+
+from aiohttp import web
+
+from app.models.enums import NotificationPriority
+from app.services.pushover import PushoverNotifier
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(64)
+
+
+def _posts(priority, image_urls=None, **options):
+    """Send one notification to a stub Pushover and return the fields of each post."""
+    async def run():
+        posts = []
+
+        async def messages(request):
+            form = await request.post()
+            fields = {}
+            for key, value in form.items():
+                if isinstance(value, str):
+                    fields[key] = value
+                else:
+                    fields[key] = value.filename
+                    value.file.close()  # Uploads are spooled to a temporary file
+            posts.append(fields)
+            return web.json_response({"status": 1})
+
+        async def image(request):
+            return web.Response(body=PNG, content_type="image/png")
+
+        app = web.Application()
+        app.router.add_post("/1/messages.json", messages)
+        app.router.add_get("/slip.png", image)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        notifier = PushoverNotifier("user", "token", api_url=f"{base}/1/messages.json")
+        try:
+            await notifier.send("pick", title="Discord", priority=priority, sound="cosmic",
+                                image_urls=[f"{base}/slip.png"] if image_urls else None,
+                                **options)
+        finally:
+            await notifier.close()
+            await runner.cleanup()
+        return posts
+
+    return asyncio.run(run())
+
+
+FIELDS = {"token": "token", "user": "user", "message": "pick", "title": "Discord",
+          "priority": "1", "sound": "cosmic"}
+
+
+def test_text_post_fields():
+    assert _posts(NotificationPriority.HIGH) == [FIELDS]
+
+
+def test_image_post_fields():
+    assert _posts(NotificationPriority.HIGH, image_urls=True) == [
+        {**FIELDS, "attachment": "image.png"}]
+
+
+def test_plain_int_priority():
+    assert _posts(1) == [FIELDS]
+
+
+def test_emergency_sends_retry_and_expire():
+    assert _posts(NotificationPriority.EMERGENCY, retry=30, expire=600) == [
+        {**FIELDS, "priority": "2", "retry": "30", "expire": "600"}]
+
+
+def test_emergency_without_retry_and_expire_uses_defaults():
+    assert _posts(2, image_urls=True) == [
+        {**FIELDS, "priority": "2", "retry": "60", "expire": "3600", "attachment": "image.png"}]
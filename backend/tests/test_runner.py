@@ -0,0 +1,53 @@
+"""The standalone runner loads without the web backend's dependencies."""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Makes the web-only packages unimportable, as if they weren't installed
+BLOCK = """
+import sys
+
+class Block:
+    def find_spec(self, name, path=None, target=None):
+        if name.split(".")[0] in {"fastapi", "pydantic", "pydantic_settings", "uvicorn", "PIL"}:
+            raise ImportError(f"No module named {name!r}")
+
+sys.meta_path.insert(0, Block())
+"""
+
+
+def _run(code: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, DISCORD_TOKEN="token", CHANNEL_IDS="1", TARGET_USER_IDS="2",
+               PUSHOVER_USER_KEY="user", PUSHOVER_API_TOKEN="token")
+    return subprocess.run([sys.executable, "-c", BLOCK + code], cwd=ROOT, env=env,
+                          capture_output=True, text=True)
+
+
+def test_runner_starts_without_web_dependencies():
+    # The runner targets discord.py-self, so the client itself isn't built here;
+    # its delivery services are, the way MessageMonitor builds them
+    result = _run("""
+import asyncio
+import discord_monitor as runner
+
+async def main():
+    notifier = runner.PushoverNotifier(user_key="user", api_token="token",
+                                       max_concurrent_images=runner.IMAGE_CONCURRENCY)
+    dispatcher = runner.NotificationDispatcher(
+        lambda item: notifier.send(message=item.message), maxsize=runner.DISPATCH_QUEUE_SIZE,
+        workers=runner.DISPATCH_WORKERS, overflow_policy=runner.DISPATCH_OVERFLOW_POLICY)
+    await notifier.start()
+    dispatcher.start()
+    await dispatcher.stop()
+    await notifier.close()
+
+asyncio.run(main())
+""")
+    assert result.returncode == 0, result.stdout + result.stderr
+
+
+def test_blocked_packages_are_unimportable():
+    result = _run("import fastapi")
+    assert result.returncode != 0
@@ -0,0 +1,151 @@
+import asyncio
+
+from app.services.dispatch import DispatchItem
+from app.services.scheduler import DeliveryScheduler
+
+
+class Recorder:
+    def __init__(self):
+        self.submitted = []
+        self.held = []
+        self.released = []
+
+    async def submit(self, item: DispatchItem):
+        self.submitted.append(item)
+
+    async def hold(self, item: DispatchItem):
+        self.held.append(item)
+
+    def release(self, item: DispatchItem):
+        self.released.append(item)
+
+
+def _scheduler(recorder: Recorder, window: float) -> DeliveryScheduler:
+    return DeliveryScheduler(recorder.submit, window=window,
+                             hold=recorder.hold, release=recorder.release)
+
+
+def test_first_notification_is_sent_immediately():
+    async def run():
+        recorder = Recorder()
+        scheduler = _scheduler(recorder, window=10.0)
+        await scheduler.submit(DispatchItem("pick", title="#picks"))
+        assert [item.message for item in recorder.submitted] == ["pick"]
+        assert recorder.held == []
+        await scheduler.stop()
+
+    asyncio.run(run())
+
+
+def test_burst_after_first_is_digested_and_held_in_outbox():
+    async def run():
+        recorder = Recorder()
+        scheduler = _scheduler(recorder, window=0.05)
+        first = DispatchItem("one", title="#picks")
+        second = DispatchItem("two", title="#picks")
+        third = DispatchItem("three", title="#picks")
+        for item in (first, second, third):
+            await scheduler.submit(item)
+        # Held items are recorded as they arrive, before the window closes
+        assert recorder.submitted == [first]
+        assert recorder.held == [second, third]
+
+        await asyncio.sleep(0.1)
+        assert len(recorder.submitted) == 2
+        digest = recorder.submitted[1]
+        assert digest.message == "two\n\nthree"
+        assert digest.merged == 1
+        # The digest replaces the held items in the outbox
+        assert recorder.released == [second, third]
+        await scheduler.stop()
+
+    asyncio.run(run())
+
+
+def test_window_closes_when_quiet():
+    async def run():
+        recorder = Recorder()
+        scheduler = _scheduler(recorder, window=0.02)
+        await scheduler.submit(DispatchItem("one", title="#picks"))
+        await asyncio.sleep(0.05)
+        assert scheduler.stats()["open_digests"] == 0
+        await scheduler.submit(DispatchItem("two", title="#picks"))
+        assert [item.message for item in recorder.submitted] == ["one", "two"]
+        await scheduler.stop()
+
+    asyncio.run(run())
+
+
+def test_single_held_item_is_sent_as_is():
+    async def run():
+        recorder = Recorder()
+        scheduler = _scheduler(recorder, window=10.0)
+        await scheduler.submit(DispatchItem("one", title="#picks"))
+        second = DispatchItem("two", title="#picks")
+        await scheduler.submit(second)
+        await scheduler.stop()
+        assert recorder.submitted[-1] is second
+        assert recorder.released == []
+
+    asyncio.run(run())
+
+
+def test_keys_have_separate_windows():
+    async def run():
+        recorder = Recorder()
+        scheduler = _scheduler(recorder, window=10.0)
+        await scheduler.submit(DispatchItem("one", title="#a"))
+        await scheduler.submit(DispatchItem("two", title="#b"))
+        assert [item.message for item in recorder.submitted] == ["one", "two"]
+        await scheduler.stop()
+
+    asyncio.run(run())
+
+
+def test_failed_digest_is_retried_and_window_keeps_working():
+    async def run():
+        recorder = Recorder()
+        failures = [RuntimeError("outbox unavailable")]
+
+        async def submit(item: DispatchItem):
+            if item.merged and failures:
+                raise failures.pop()
+            await recorder.submit(item)
+
+        scheduler = DeliveryScheduler(submit, window=0.05, hold=recorder.hold,
+                                      release=recorder.release)
+        for message in ("one", "two", "three"):
+            await scheduler.submit(DispatchItem(message, title="#picks"))
+        await asyncio.sleep(0.08)  # The first digest fails
+        await scheduler.submit(DispatchItem("four", title="#picks"))
+        await asyncio.sleep(0.15)
+        assert [item.message for item in recorder.submitted] == ["one", "two\n\nthree\n\nfour"]
+        assert scheduler.stats()["open_digests"] == 0
+        # The window closed normally, so the next item opens a new one
+        await asyncio.sleep(0.1)
+        await scheduler.submit(DispatchItem("five", title="#picks"))
+        assert recorder.submitted[-1].message == "five"
+        await scheduler.stop()
+
+    asyncio.run(run())
+
+
+def test_window_is_removed_when_its_task_fails():
+    async def run():
+        recorder = Recorder()
+        scheduler = _scheduler(recorder, window=0.02)
+        await scheduler.submit(DispatchItem("one", title="#picks"))
+        await scheduler.submit(DispatchItem("two", title="#picks"))
+
+        def broken():
+            raise RuntimeError("rate limit unavailable")
+
+        scheduler._retry_after = broken
+        await asyncio.sleep(0.05)
+        assert "#picks" not in scheduler._windows
+        del scheduler._retry_after
+        await scheduler.submit(DispatchItem("three", title="#picks"))
+        assert recorder.submitted[-1].message == "three"
+        await scheduler.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,113 @@
+"""Workers forward their metrics and remember what they matched."""
+import asyncio
+import queue
+
+import discord
+
+from app.discord.sharding import WorkerMonitor, _worker_main
+from app.discord.tracking import MessageTracker
+from app.services import metrics
+
+from .conftest import IMAGE, make_edit, make_message, make_settings
+
+
+def _drain(outbox: queue.Queue):
+    items = []
+    while not outbox.empty():
+        items.append(outbox.get())
+    return items
+
+
+def _worker(outbox: queue.Queue) -> WorkerMonitor:
+    worker = WorkerMonitor(make_settings(history_size=2), 0, outbox)
+    worker.routing = worker.routing.replace(channel_ids=[1])
+    return worker
+
+
+def test_changes_between_snapshots_merge_into_another_registry():
+    source, target = metrics.Registry(), metrics.Registry()
+    counters = [metrics.Counter("events_total", "test", registry) for registry in (source, target)]
+    histograms = [metrics.Histogram("seconds", "test", (0.1, 1.0), registry)
+                  for registry in (source, target)]
+    before = source.snapshot()
+    counters[0].inc(3)
+    histograms[0].observe(0.5)
+    histograms[0].observe(5.0)
+
+    changes = metrics.changes(source.snapshot(), before)
+    target.merge(changes)
+    target.merge(metrics.changes(source.snapshot(), source.snapshot()))  # Nothing new
+    assert counters[1].value == 3
+    assert histograms[1].state() == ((0, 1, 1), 5.5)
+
+
+def test_worker_reports_metrics_once_per_change(loop):
+    outbox = queue.Queue()
+    worker = _worker(outbox)
+    metrics.MESSAGES_EDITED.inc(2)
+    worker.publish_metrics()
+    worker.publish_metrics()
+    reports = _drain(outbox)
+    assert reports == [("metrics", 0, {metrics.MESSAGES_EDITED.name: 2})]
+
+
+def test_worker_recognizes_edits_of_messages_it_matched(loop):
+    outbox = queue.Queue()
+    worker = _worker(outbox)
+    loop.run_until_complete(worker._process_message(make_message(100, "pick", [IMAGE])))
+    worker.tracker = MessageTracker(worker.settings.edit_tracking_size)  # Forgotten, as after eviction
+    _drain(outbox)
+
+    loop.run_until_complete(worker.on_raw_message_edit(make_edit(100, "pick, edited", [IMAGE])))
+    kinds = [kind for kind, _, _ in _drain(outbox)]
+    assert kinds == ["update"]
+
+
+def test_worker_keeps_as_many_matched_ids_as_history(loop):
+    worker = _worker(queue.Queue())
+    worker.remember_matched([1, 2, 3])
+    assert not worker._was_matched(1)
+    assert worker._was_matched(2) and worker._was_matched(3)
+
+
+def _run_worker_main(monkeypatch, run_gateway, commands=()):
+    async def fake_gateway(self):
+        await run_gateway(self)
+
+    monkeypatch.setattr(WorkerMonitor, "run_gateway", fake_gateway)
+    outbox, inbox = queue.Queue(), queue.Queue()
+    for command in commands:
+        inbox.put(command)
+    settings = make_settings().model_dump(mode="json", exclude={"workers"})
+    code = asyncio.run(asyncio.wait_for(
+        _worker_main(0, settings, {"discord_token": "worker"}, outbox, inbox), 5.0))
+    return code, _drain(outbox)
+
+
+def test_worker_exits_when_its_client_closes_itself(monkeypatch):
+    async def closes_itself(monitor):
+        return  # e.g. none of the channels were found
+
+    code, reports = _run_worker_main(monkeypatch, closes_itself)
+    assert code == 1
+    health = [data for kind, _, data in reports if kind == "health"]
+    assert health[-1]["readiness"]["state"] == "stopped"
+
+
+def test_worker_exits_on_invalid_token(monkeypatch):
+    async def login_fails(monitor):
+        raise discord.LoginFailure("Improper token has been passed.")
+
+    code, reports = _run_worker_main(monkeypatch, login_fails)
+    assert code == 1
+    health = [data for kind, _, data in reports if kind == "health"]
+    assert health[-1]["readiness"]["state"] == "failed"
+    assert "Invalid Discord token" in health[-1]["readiness"]["last_error"]
+
+
+def test_worker_stops_cleanly_when_told_to(monkeypatch):
+    async def stays_connected(monitor):
+        await asyncio.Event().wait()
+
+    code, _ = _run_worker_main(monkeypatch, stays_connected, [("stop", None)])
+    assert code == 0
@@ -0,0 +1,89 @@
+import asyncio
+
+import orjson
+
+from app import main
+from app.discord.client import DiscordMonitor
+from app.discord.history import HistoryRecord
+from app.services.store import MessageStore
+
+from .conftest import asgi_get, make_settings
+
+
+def _record(seq: int, content: str = "pick", timestamp: str = "2024-01-01 00:00:00") -> HistoryRecord:
+    return HistoryRecord(seq, timestamp, 1, "Guild - #picks", 7, "Capper (@capper)",
+                         content, [], [])
+
+
+def test_pending_writes_are_flushed_on_stop(tmp_path):
+    path = str(tmp_path / "messages.db")
+
+    async def run():
+        # Neither the batch size nor the interval is reached before stop
+        store = MessageStore(path, batch_size=1000, flush_interval=60)
+        await store.start()
+        for seq in range(1, 4):
+            store.append(_record(seq))
+        assert store.stats()["pending"] == 3
+        await store.stop()
+        assert store.written == 3
+
+        reopened = MessageStore(path)
+        await reopened.start()
+        try:
+            assert await reopened.last_id() == 3
+            assert [r.seq for r in await reopened.query()] == [1, 2, 3]
+        finally:
+            await reopened.stop()
+
+    asyncio.run(run())
+
+
+def test_paging_across_equal_timestamps(tmp_path):
+    async def run():
+        store = MessageStore(str(tmp_path / "messages.db"))
+        await store.start()
+        try:
+            # Every record shares one timestamp, so only the id orders them
+            for seq in range(1, 11):
+                store.append(_record(seq, content=f"pick {seq}"))
+            await store.flush()
+
+            seen, before = [], None
+            while True:
+                page = await store.query(before=before, limit=3)
+                if not page:
+                    break
+                seen = [r.seq for r in page] + seen
+                before = page[0].seq
+            assert seen == list(range(1, 11))
+
+            forward = await store.query(since=4, limit=3)
+            assert [r.seq for r in forward] == [5, 6, 7]
+        finally:
+            await store.stop()
+
+    asyncio.run(run())
+
+
+def test_malformed_search_is_a_bad_request(tmp_path):
+    async def run():
+        monitor = DiscordMonitor(make_settings())
+        monitor.store = MessageStore(str(tmp_path / "messages.db"))
+        await monitor.store.start()
+        main.discord_client = monitor
+        try:
+            monitor.store.append(_record(1, content="over 24.5 tonight"))
+            await monitor.store.flush()
+            status, _, body = await asgi_get(main.app, "/api/messages", "q=%22unterminated")
+            if monitor.store.fts_enabled:
+                assert status == 400
+                assert "Invalid search query" in orjson.loads(body)["detail"]
+            status, _, body = await asgi_get(main.app, "/api/messages", "q=tonight")
+            assert status == 200
+            assert [m["id"] for m in orjson.loads(body)] == [1]
+        finally:
+            main.discord_client = None
+            await monitor.store.stop()
+
+    asyncio.run(run())
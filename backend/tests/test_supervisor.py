@@ -0,0 +1,37 @@
+"""Restarts after a failed gateway connection."""
+import asyncio
+
+from app.discord.client import DiscordMonitor
+from app.discord.supervisor import MonitorSupervisor
+
+from .conftest import make_settings
+
+
+def test_restart_logs_in_with_a_fresh_http_client(monkeypatch):
+    clients = []
+
+    async def run_gateway(self):
+        clients.append(self.http)
+        if len(clients) == 1:
+            raise ConnectionError("gateway unreachable")
+        # The second attempt connects and then closes by itself
+
+    monkeypatch.setattr(DiscordMonitor, "run_gateway", run_gateway)
+
+    async def run():
+        monitor = DiscordMonitor(make_settings())
+        history = monitor.history
+        supervisor = MonitorSupervisor(monitor)
+        supervisor.start()
+        await asyncio.wait_for(supervisor.wait(), 5.0)
+        try:
+            assert supervisor.restarts == 1
+            assert supervisor.state == "stopped"
+            assert "gateway unreachable" in supervisor.last_error
+            assert clients[1] is not clients[0]
+            assert not monitor.is_closed()
+            assert monitor.history is history  # Only the Discord client state is rebuilt
+        finally:
+            await supervisor.stop()
+
+    asyncio.run(run())
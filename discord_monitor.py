@@ -2,10 +2,24 @@ import os
 import sys
 import asyncio
 import discord
-import requests
 from datetime import datetime
 from dotenv import load_dotenv
 
+# The delivery core is shared with the web backend in ./backend. Only these
+# modules are imported, never the FastAPI app; they need nothing beyond this
+# directory's requirements.txt (no FastAPI, pydantic or Pillow), which
+# backend/tests/test_runner.py checks.
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+sys.path.insert(0, BACKEND_DIR)
+try:
+    from app.models.enums import OverflowPolicy
+    from app.services.dispatch import DispatchItem, NotificationDispatcher
+    from app.services.pushover import PushoverNotifier
+except ImportError as e:
+    print(f"Error: Could not import the shared delivery services from {BACKEND_DIR}: {e}")
+    print("discord_monitor.py must be run from a full checkout, with requirements.txt installed")
+    sys.exit(1)
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -17,6 +31,12 @@ TARGET_USER_IDS = [int(id.strip()) for id in os.getenv('TARGET_USER_IDS', '').sp
 PUSHOVER_USER_KEY = os.getenv('PUSHOVER_USER_KEY')
 PUSHOVER_API_TOKEN = os.getenv('PUSHOVER_API_TOKEN')
 
+# Delivery tuning, with the same names and defaults as the web backend
+DISPATCH_QUEUE_SIZE = int(os.getenv('DISPATCH_QUEUE_SIZE', '100'))
+DISPATCH_WORKERS = int(os.getenv('DISPATCH_WORKERS', '4'))
+DISPATCH_OVERFLOW_POLICY = OverflowPolicy(os.getenv('DISPATCH_OVERFLOW_POLICY', 'block').lower())
+IMAGE_CONCURRENCY = int(os.getenv('IMAGE_CONCURRENCY', '4'))
+
 # Validate that all required configuration is present
 # Exit early if any required variables are missing to prevent runtime errors
 if not all([TOKEN, CHANNEL_IDS, TARGET_USER_IDS, PUSHOVER_USER_KEY, PUSHOVER_API_TOKEN]):
@@ -24,67 +44,13 @@ if not all([TOKEN, CHANNEL_IDS, TARGET_USER_IDS, PUSHOVER_USER_KEY, PUSHOVER_API
     print("Required variables: DISCORD_TOKEN, CHANNEL_IDS, TARGET_USER_IDS, PUSHOVER_USER_KEY, PUSHOVER_API_TOKEN")
     sys.exit(1)
 
-def send_pushover_notification(message, title=None, priority=0, sound="pushover", image_urls=None):
-    """Send a notification via Pushover with optional image attachments.
-    
-    Args:
-        message (str): The main notification message
-        title (str, optional): Title for the notification. Defaults to None.
-        priority (int, optional): Message priority (-2 to 2). Defaults to 0.
-        sound (str, optional): Notification sound to play. Defaults to "pushover".
-        image_urls (list, optional): List of image URLs to attach. Defaults to None.
-    
-    The function handles both text-only notifications and notifications with images:
-    - For text-only notifications, sends a single Pushover API request
-    - For notifications with images, sends multiple requests (one per image)
-    - Each image is downloaded and attached to its own notification
-    - Errors are caught and logged but don't stop execution
-    """
-    try:
-        data = {
-            "token": PUSHOVER_API_TOKEN,
-            "user": PUSHOVER_USER_KEY,
-            "message": message,
-            "priority": priority,
-            "sound": sound
-        }
-        if title:
-            data["title"] = title
-            
-        # Handle image attachments if present
-        if image_urls:
-            for image_url in image_urls:
-                try:
-                    # Download each image
-                    image_response = requests.get(image_url)
-                    if image_response.status_code == 200:
-                        # Create a copy of the data for this image
-                        image_data = data.copy()
-                        files = {'attachment': ('image.jpg', image_response.content)}
-                        
-                        # Send notification with image
-                        r = requests.post("https://api.pushover.net/1/messages.json", 
-                                        data=image_data, 
-                                        files=files)
-                        if r.status_code != 200:
-                            print(f"Error sending image notification: {r.text}")
-                    else:
-                        print(f"Failed to download image: {image_url}")
-                except Exception as e:
-                    print(f"Error processing image {image_url}: {e}")
-        else:
-            # Send text-only notification
-            r = requests.post("https://api.pushover.net/1/messages.json", data=data)
-            if r.status_code != 200:
-                print(f"Error sending notification: {r.text}")
-    except Exception as e:
-        print(f"Error sending notification: {e}")
-
 class MessageMonitor(discord.Client):
     """Discord client for monitoring specific channels and users.
     
     This client watches configured channels for messages from specific users
     and forwards relevant messages (containing links or media) to Pushover.
+    Notifications are queued and delivered in the background, so a slow image
+    download or Pushover request never holds up the gateway connection.
     """
     
     def __init__(self):
@@ -94,10 +60,62 @@ class MessageMonitor(discord.Client):
         - Parent discord.Client
         - Dictionary to store target channels
         - Connection status tracking
+        - Pooled Pushover sender and its bounded delivery queue
         """
         super().__init__()
         self.target_channels = {}  # Maps channel IDs to channel objects
         self.connected = False     # Tracks connection status
+        self.notifier = PushoverNotifier(
+            user_key=PUSHOVER_USER_KEY,
+            api_token=PUSHOVER_API_TOKEN,
+            max_concurrent_images=IMAGE_CONCURRENCY
+        )
+        self.dispatcher = NotificationDispatcher(
+            self._deliver_notification,
+            maxsize=DISPATCH_QUEUE_SIZE,
+            workers=DISPATCH_WORKERS,
+            overflow_policy=DISPATCH_OVERFLOW_POLICY
+        )
+
+    async def start_services(self):
+        """Open the HTTP session and start the delivery workers."""
+        await self.notifier.start()
+        self.dispatcher.start()
+
+    async def stop_services(self):
+        """Deliver what is still queued, then release the HTTP session."""
+        await self.dispatcher.stop()
+        await self.notifier.close()
+
+    async def send_notification(self, message, title=None, priority=0, sound="pushover", image_urls=None):
+        """Queue a notification for delivery via Pushover.
+
+        Args:
+            message (str): The main notification message
+            title (str, optional): Title for the notification. Defaults to None.
+            priority (int, optional): Message priority (-2 to 2). Defaults to 0.
+            sound (str, optional): Notification sound to play. Defaults to "pushover".
+            image_urls (list, optional): List of image URLs to attach. Defaults to None.
+
+        Returns as soon as the notification is queued. Each image is sent as
+        its own notification by the delivery workers; errors are logged there.
+        """
+        await self.dispatcher.submit(DispatchItem(
+            message=message,
+            title=title,
+            priority=priority,
+            sound=sound,
+            image_urls=image_urls
+        ))
+
+    async def _deliver_notification(self, item):
+        await self.notifier.send(
+            message=item.message,
+            title=item.title,
+            priority=item.priority,
+            sound=item.sound,
+            image_urls=item.image_urls
+        )
 
     async def on_ready(self):
         """Handler for when the client successfully connects to Discord.
@@ -130,7 +148,7 @@ class MessageMonitor(discord.Client):
 
         # Send startup notification
         channels_str = ", ".join(f"{channel.guild.name} - #{channel.name}" for channel in self.target_channels.values())
-        send_pushover_notification(
+        await self.send_notification(
             f"Discord monitor started successfully!\nMonitoring channels: {channels_str}",
             title="Discord Monitor",
             priority=0
@@ -142,7 +160,7 @@ class MessageMonitor(discord.Client):
         This method processes each message by:
         1. Checking if it's from a monitored channel and user
         2. Looking for prizepicks links or media content
-        3. Formatting and sending notifications for relevant messages
+        3. Formatting and queueing notifications for relevant messages
         4. Handling any attachments or embeds in the message
         
         Args:
@@ -191,8 +209,8 @@ class MessageMonitor(discord.Client):
                             if embed.image:
                                 image_urls.append(embed.image.url)
                     
-                    # Send the notification
-                    send_pushover_notification(
+                    # Queue the notification
+                    await self.send_notification(
                         push_msg,
                         title=f"Discord: {channel_identifier}",
                         priority=1,  # High priority for immediate delivery
@@ -215,7 +233,7 @@ class MessageMonitor(discord.Client):
         """
         error_msg = f"Error in {event}: {sys.exc_info()[1]}"
         print(error_msg)
-        send_pushover_notification(
+        await self.send_notification(
             error_msg,
             title="Discord Monitor Error",
             priority=1,
@@ -231,14 +249,14 @@ class MessageMonitor(discord.Client):
         self.connected = False
         disconnect_msg = "Disconnected from Discord. Attempting to reconnect..."
         print(disconnect_msg)
-        send_pushover_notification(
+        await self.send_notification(
             disconnect_msg,
             title="Discord Monitor Status",
             priority=0
         )
 
-def main():
-    """Main entry point for the Discord monitor.
+async def run():
+    """Run the monitor until it stops, then drain the delivery queue.
     
     This function:
     1. Creates and initializes the MessageMonitor client
@@ -246,14 +264,17 @@ def main():
     3. Ensures clean shutdown in case of errors
     """
     client = MessageMonitor()
+    # Started before logging in so a login failure can still be reported
+    await client.start_services()
     
     try:
         print("Starting Discord message monitor...")
-        client.run(TOKEN)
+        async with client:
+            await client.start(TOKEN)
     except discord.LoginFailure:
         error_msg = "Error: Invalid Discord token. Please check your .env file."
         print(error_msg)
-        send_pushover_notification(
+        await client.send_notification(
             error_msg,
             title="Discord Monitor Error",
             priority=1
@@ -261,14 +282,20 @@ def main():
     except Exception as e:
         error_msg = f"Error: {e}"
         print(error_msg)
-        send_pushover_notification(
+        await client.send_notification(
             error_msg,
             title="Discord Monitor Error",
             priority=1
         )
     finally:
-        if client.connected:
-            asyncio.run(client.close())
+        await client.stop_services()
+
+def main():
+    """Main entry point for the Discord monitor."""
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main() 
@@ -16,9 +16,188 @@ import {
   MenuItem,
   FormControl,
   InputLabel,
+  Table,
+  TableBody,
+  TableCell,
+  TableHead,
+  TableRow,
+  IconButton,
 } from '@mui/material';
-import { getConfig, updateFilters, updateNotifications } from '../services/api';
-import { FilterConfig, NotificationConfig, NotificationPriority } from '../types';
+import { Delete, Edit } from '@mui/icons-material';
+import {
+  getConfig,
+  updateFilters,
+  updateNotifications,
+  createRule,
+  updateRule,
+  deleteRule,
+  patchWatchList,
+  importWatchList,
+} from '../services/api';
+import {
+  FilterConfig,
+  NotificationConfig,
+  NotificationPriority,
+  RoutingRule,
+  WatchList,
+} from '../types';
+
+const PRIORITY_LABELS: Record<NotificationPriority, string> = {
+  [NotificationPriority.LOWEST]: 'Lowest',
+  [NotificationPriority.LOW]: 'Low',
+  [NotificationPriority.NORMAL]: 'Normal',
+  [NotificationPriority.HIGH]: 'High',
+  [NotificationPriority.EMERGENCY]: 'Emergency',
+};
+
+const EMPTY_RULE: RoutingRule = {
+  name: '',
+  channel_id: null,
+  author_id: null,
+  filters: null,
+  notifications: null,
+  enabled: true,
+};
+
+// Empty means "any"; anything but digits is ignored. Kept as a string, like splitIds
+const parseId = (value: string, current: string | null): string | null => {
+  const trimmed = value.trim();
+  if (!trimmed) {
+    return null;
+  }
+  return /^\d+$/.test(trimmed) ? trimmed : current;
+};
+
+const splitList = (value: string): string[] =>
+  value.split(',').map((item) => item.trim()).filter(Boolean);
+
+// Kept as strings; Discord snowflakes exceed JavaScript's safe integers
+const splitIds = (value: string): string[] =>
+  value.split(/[\s,;]+/).filter((item) => /^\d+$/.test(item));
+
+interface EmergencyFieldsProps {
+  notifications: NotificationConfig;
+  onChange: (notifications: NotificationConfig) => void;
+}
+
+// Pushover repeats an emergency notification every `retry` seconds (at least
+// 30) until it is acknowledged or `expire` seconds (at most 10800) have passed
+const EmergencyFields: React.FC<EmergencyFieldsProps> = ({ notifications, onChange }) => {
+  if (notifications.priority !== NotificationPriority.EMERGENCY) {
+    return null;
+  }
+  return (
+    <Box sx={{ display: 'flex', gap: 2, mt: 2 }}>
+      <TextField
+        fullWidth
+        type="number"
+        label="Repeat every (seconds)"
+        value={notifications.retry}
+        onChange={(e) => onChange({ ...notifications, retry: Number(e.target.value) })}
+        inputProps={{ min: 30 }}
+      />
+      <TextField
+        fullWidth
+        type="number"
+        label="Stop after (seconds)"
+        value={notifications.expire}
+        onChange={(e) => onChange({ ...notifications, expire: Number(e.target.value) })}
+        inputProps={{ min: 1, max: 10800 }}
+      />
+    </Box>
+  );
+};
+
+interface WatchListEditorProps {
+  list: WatchList;
+  title: string;
+  total: number;
+}
+
+// Adds, removes and imports IDs as deltas, so large lists are never resent whole
+const WatchListEditor: React.FC<WatchListEditorProps> = ({ list, title, total }) => {
+  const queryClient = useQueryClient();
+  const [ids, setIds] = useState('');
+  const [replace, setReplace] = useState(false);
+  const [result, setResult] = useState<string | null>(null);
+
+  const patchMutation = useMutation(
+    (patch: { add: string[]; remove: string[] }) => patchWatchList(list, patch),
+    {
+      onSuccess: (data) => {
+        setIds('');
+        setResult(`Added ${data.added.length}, removed ${data.removed.length}; ${data.total} total`);
+        queryClient.invalidateQueries('config');
+      },
+    }
+  );
+
+  const importMutation = useMutation(
+    (file: File) => importWatchList(list, file, replace ? 'replace' : 'add'),
+    {
+      onSuccess: (data) => {
+        setResult(`Read ${data.read} IDs: added ${data.added}, removed ${data.removed}; ${data.total} total`);
+        queryClient.invalidateQueries('config');
+      },
+    }
+  );
+
+  const handleFile = (event: React.ChangeEvent<HTMLInputElement>) => {
+    const file = event.target.files?.[0];
+    if (file) {
+      importMutation.mutate(file);
+    }
+    event.target.value = '';
+  };
+
+  return (
+    <Box sx={{ mt: 2 }}>
+      <Typography variant="subtitle1">
+        {title} ({total})
+      </Typography>
+      <TextField
+        fullWidth
+        label="IDs"
+        placeholder="Separated by commas or spaces"
+        value={ids}
+        onChange={(e) => setIds(e.target.value)}
+        sx={{ mt: 1 }}
+      />
+      <Box sx={{ mt: 1, display: 'flex', flexWrap: 'wrap', gap: 1, alignItems: 'center' }}>
+        <Button
+          variant="contained"
+          onClick={() => patchMutation.mutate({ add: splitIds(ids), remove: [] })}
+        >
+          Add
+        </Button>
+        <Button
+          variant="outlined"
+          onClick={() => patchMutation.mutate({ add: [], remove: splitIds(ids) })}
+        >
+          Remove
+        </Button>
+        <Button variant="outlined" component="label">
+          Import File
+          <input hidden type="file" accept=".csv,.txt,.json" onChange={handleFile} />
+        </Button>
+        <FormControlLabel
+          control={<Switch checked={replace} onChange={(e) => setReplace(e.target.checked)} />}
+          label="Import replaces the list"
+        />
+      </Box>
+      {(patchMutation.isError || importMutation.isError) && (
+        <Alert severity="error" sx={{ mt: 1 }}>
+          Could not update the {list} list. Please try again.
+        </Alert>
+      )}
+      {result && (
+        <Alert severity="success" sx={{ mt: 1 }} onClose={() => setResult(null)}>
+          {result}
+        </Alert>
+      )}
+    </Box>
+  );
+};
 
 const ConfigurationPage: React.FC = () => {
   const queryClient = useQueryClient();
@@ -35,6 +214,8 @@ const ConfigurationPage: React.FC = () => {
     priority: NotificationPriority.NORMAL,
     sound: 'pushover',
     custom_message_template: null,
+    retry: 60,
+    expire: 3600,
   });
 
   // Update state when data is loaded
@@ -57,6 +238,29 @@ const ConfigurationPage: React.FC = () => {
     },
   });
 
+  // Rule being added (no id) or edited, or null when the editor is closed
+  const [rule, setRule] = useState<RoutingRule | null>(null);
+
+  const saveRuleMutation = useMutation(
+    (edited: RoutingRule) => (edited.id ? updateRule(edited) : createRule(edited)),
+    {
+      onSuccess: () => {
+        setRule(null);
+        queryClient.invalidateQueries('config');
+      },
+    }
+  );
+
+  const deleteRuleMutation = useMutation(deleteRule, {
+    onSuccess: () => {
+      queryClient.invalidateQueries('config');
+    },
+  });
+
+  const toggleRule = (existing: RoutingRule) => {
+    saveRuleMutation.mutate({ ...existing, enabled: !existing.enabled });
+  };
+
   const handleKeywordAdd = (event: React.KeyboardEvent<HTMLInputElement>) => {
     if (event.key === 'Enter' && event.currentTarget.value) {
       setFilters({
@@ -206,6 +410,8 @@ const ConfigurationPage: React.FC = () => {
             </Select>
           </FormControl>
 
+          <EmergencyFields notifications={notifications} onChange={setNotifications} />
+
           <TextField
             fullWidth
             label="Sound"
@@ -225,6 +431,8 @@ const ConfigurationPage: React.FC = () => {
               ...notifications,
               custom_message_template: e.target.value || null,
             })}
+            placeholder="{author}: {content}{attachments}{embeds}"
+            helperText="Fields: {author}, {channel}, {content}, {links}, {attachments}, {embeds}. Messages are cut at 1024 characters."
             multiline
             rows={3}
             sx={{ mt: 2 }}
@@ -240,6 +448,237 @@ const ConfigurationPage: React.FC = () => {
           </Button>
         </Paper>
       </Grid>
+
+      {/* Watch List */}
+      <Grid item xs={12}>
+        <Paper sx={{ p: 2 }}>
+          <Typography variant="h6" gutterBottom>
+            Watch List
+          </Typography>
+          <Typography variant="body2" color="text.secondary">
+            Import a CSV (IDs in the first column), a text file or a JSON array. Changes are
+            applied without reloading the rest of the list and are saved across restarts.
+          </Typography>
+          <Grid container spacing={3}>
+            <Grid item xs={12} md={6}>
+              <WatchListEditor
+                list="channels"
+                title="Channels"
+                total={config?.channel_ids.length ?? 0}
+              />
+            </Grid>
+            <Grid item xs={12} md={6}>
+              <WatchListEditor
+                list="users"
+                title="Users"
+                total={config?.target_user_ids.length ?? 0}
+              />
+            </Grid>
+          </Grid>
+        </Paper>
+      </Grid>
+
+      {/* Routing Rules */}
+      <Grid item xs={12}>
+        <Paper sx={{ p: 2 }}>
+          <Typography variant="h6" gutterBottom>
+            Routing Rules
+          </Typography>
+          <Typography variant="body2" color="text.secondary">
+            Override the filters or notification settings for a channel, an author, or both.
+            Leave a field empty to match any. The most specific enabled rule applies:
+            channel and author, then author, then channel.
+          </Typography>
+
+          <Table size="small" sx={{ mt: 1 }}>
+            <TableHead>
+              <TableRow>
+                <TableCell>Name</TableCell>
+                <TableCell>Channel</TableCell>
+                <TableCell>Author</TableCell>
+                <TableCell>Keywords</TableCell>
+                <TableCell>Priority</TableCell>
+                <TableCell>Sound</TableCell>
+                <TableCell>Enabled</TableCell>
+                <TableCell />
+              </TableRow>
+            </TableHead>
+            <TableBody>
+              {(config?.rules ?? []).map((existing: RoutingRule) => (
+                <TableRow key={existing.id}>
+                  <TableCell>{existing.name || '—'}</TableCell>
+                  <TableCell>{existing.channel_id ?? 'Any'}</TableCell>
+                  <TableCell>{existing.author_id ?? 'Any'}</TableCell>
+                  <TableCell>
+                    {existing.filters ? existing.filters.keywords.join(', ') || 'None' : 'Global'}
+                  </TableCell>
+                  <TableCell>
+                    {existing.notifications
+                      ? PRIORITY_LABELS[existing.notifications.priority]
+                      : 'Global'}
+                  </TableCell>
+                  <TableCell>{existing.notifications?.sound ?? 'Global'}</TableCell>
+                  <TableCell>
+                    <Switch checked={existing.enabled} onChange={() => toggleRule(existing)} />
+                  </TableCell>
+                  <TableCell align="right">
+                    <IconButton size="small" onClick={() => setRule(existing)}>
+                      <Edit fontSize="small" />
+                    </IconButton>
+                    <IconButton
+                      size="small"
+                      onClick={() => existing.id && deleteRuleMutation.mutate(existing.id)}
+                    >
+                      <Delete fontSize="small" />
+                    </IconButton>
+                  </TableCell>
+                </TableRow>
+              ))}
+            </TableBody>
+          </Table>
+
+          {rule ? (
+            <Box sx={{ mt: 2 }}>
+              <Grid container spacing={2}>
+                <Grid item xs={12} md={4}>
+                  <TextField
+                    fullWidth
+                    label="Name"
+                    value={rule.name}
+                    onChange={(e) => setRule({ ...rule, name: e.target.value })}
+                  />
+                </Grid>
+                <Grid item xs={6} md={4}>
+                  <TextField
+                    fullWidth
+                    label="Channel ID"
+                    placeholder="Any"
+                    value={rule.channel_id ?? ''}
+                    onChange={(e) => setRule({
+                      ...rule,
+                      channel_id: parseId(e.target.value, rule.channel_id),
+                    })}
+                  />
+                </Grid>
+                <Grid item xs={6} md={4}>
+                  <TextField
+                    fullWidth
+                    label="Author ID"
+                    placeholder="Any"
+                    value={rule.author_id ?? ''}
+                    onChange={(e) => setRule({
+                      ...rule,
+                      author_id: parseId(e.target.value, rule.author_id),
+                    })}
+                  />
+                </Grid>
+
+                <Grid item xs={12} md={6}>
+                  <FormControlLabel
+                    control={
+                      <Switch
+                        checked={rule.filters !== null}
+                        onChange={(e) => setRule({
+                          ...rule,
+                          filters: e.target.checked ? { ...filters } : null,
+                        })}
+                      />
+                    }
+                    label="Own filters"
+                  />
+                  {rule.filters && (
+                    <TextField
+                      key={rule.id ?? 'new'}
+                      fullWidth
+                      label="Keywords"
+                      placeholder="Comma-separated"
+                      defaultValue={rule.filters.keywords.join(', ')}
+                      onBlur={(e) => rule.filters && setRule({
+                        ...rule,
+                        filters: { ...rule.filters, keywords: splitList(e.target.value) },
+                      })}
+                      sx={{ mt: 1 }}
+                    />
+                  )}
+                </Grid>
+
+                <Grid item xs={12} md={6}>
+                  <FormControlLabel
+                    control={
+                      <Switch
+                        checked={rule.notifications !== null}
+                        onChange={(e) => setRule({
+                          ...rule,
+                          notifications: e.target.checked ? { ...notifications } : null,
+                        })}
+                      />
+                    }
+                    label="Own notification settings"
+                  />
+                  {rule.notifications && (
+                    <Box sx={{ display: 'flex', gap: 2, mt: 1 }}>
+                      <FormControl fullWidth>
+                        <InputLabel>Priority</InputLabel>
+                        <Select
+                          value={rule.notifications.priority}
+                          label="Priority"
+                          onChange={(e) => rule.notifications && setRule({
+                            ...rule,
+                            notifications: {
+                              ...rule.notifications,
+                              priority: e.target.value as NotificationPriority,
+                            },
+                          })}
+                        >
+                          {Object.entries(PRIORITY_LABELS).map(([value, label]) => (
+                            <MenuItem key={value} value={value}>{label}</MenuItem>
+                          ))}
+                        </Select>
+                      </FormControl>
+                      <TextField
+                        fullWidth
+                        label="Sound"
+                        value={rule.notifications.sound}
+                        onChange={(e) => rule.notifications && setRule({
+                          ...rule,
+                          notifications: { ...rule.notifications, sound: e.target.value },
+                        })}
+                      />
+                    </Box>
+                  )}
+                  {rule.notifications && (
+                    <EmergencyFields
+                      notifications={rule.notifications}
+                      onChange={(notifications) => setRule({ ...rule, notifications })}
+                    />
+                  )}
+                </Grid>
+              </Grid>
+
+              {saveRuleMutation.isError && (
+                <Alert severity="error" sx={{ mt: 2 }}>
+                  Could not save the rule. Please try again.
+                </Alert>
+              )}
+
+              <Box sx={{ mt: 2, display: 'flex', gap: 1 }}>
+                <Button
+                  variant="contained"
+                  color="primary"
+                  onClick={() => saveRuleMutation.mutate(rule)}
+                >
+                  {rule.id ? 'Save Rule' : 'Add Rule'}
+                </Button>
+                <Button onClick={() => setRule(null)}>Cancel</Button>
+              </Box>
+            </Box>
+          ) : (
+            <Button variant="outlined" onClick={() => setRule({ ...EMPTY_RULE })} sx={{ mt: 2 }}>
+              New Rule
+            </Button>
+          )}
+        </Paper>
+      </Grid>
     </Grid>
   );
 };
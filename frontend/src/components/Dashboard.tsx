@@ -1,5 +1,4 @@
 import React from 'react';
-import { useQuery } from 'react-query';
 import {
   Grid,
   Paper,
@@ -13,22 +12,12 @@ import {
   Alert,
 } from '@mui/material';
 import { CheckCircle, Error } from '@mui/icons-material';
-import { getStatus, getMessages } from '../services/api';
+import { useLiveFeed } from '../services/stream';
 
 const Dashboard: React.FC = () => {
-  const { data: status, isLoading: statusLoading, error: statusError } = useQuery(
-    'status',
-    getStatus,
-    { refetchInterval: 5000 }
-  );
-
-  const { data: messages, isLoading: messagesLoading, error: messagesError } = useQuery(
-    'messages',
-    getMessages,
-    { refetchInterval: 5000 }
-  );
+  const { status, messages, error } = useLiveFeed();
 
-  if (statusLoading || messagesLoading) {
+  if (!status && !error) {
     return (
       <Box display="flex" justifyContent="center" alignItems="center" minHeight="50vh">
         <CircularProgress />
@@ -36,7 +25,7 @@ const Dashboard: React.FC = () => {
     );
   }
 
-  if (statusError || messagesError) {
+  if (!status) {
     return (
       <Alert severity="error">
         Error loading dashboard data. Please check your connection and try again.
@@ -95,8 +84,8 @@ const Dashboard: React.FC = () => {
             Recent Activity
           </Typography>
           <List>
-            {messages?.slice(0, 5).map((message, index) => (
-              <ListItem key={index}>
+            {messages.slice(-5).reverse().map((message) => (
+              <ListItem key={message.id}>
                 <ListItemText
                   primary={message.content}
                   secondary={`${message.author} - ${message.timestamp}`}
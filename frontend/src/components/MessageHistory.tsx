@@ -14,11 +14,11 @@ import {
 } from '@mui/material';
 import { AttachFile, Image } from '@mui/icons-material';
 import { getMessages } from '../services/api';
+import { useMessageStream } from '../services/stream';
 
 const MessageHistory: React.FC = () => {
-  const { data: messages, isLoading, error } = useQuery('messages', getMessages, {
-    refetchInterval: 5000,
-  });
+  const { data: messages, isLoading, error } = useQuery('messages', () => getMessages());
+  useMessageStream('messages');
 
   if (isLoading) {
     return (
@@ -67,6 +67,28 @@ const MessageHistory: React.FC = () => {
                         variant="outlined"
                       />
                     )}
+                    {message.merged_into !== null && message.merged_into !== undefined && (
+                      <Chip
+                        label={`Duplicate of #${message.merged_into}`}
+                        size="small"
+                        color="default"
+                      />
+                    )}
+                    {message.edited_at && (
+                      <Chip
+                        label={`Edited ${message.edited_at}`}
+                        size="small"
+                        variant="outlined"
+                      />
+                    )}
+                    {message.deleted && (
+                      <Chip
+                        label="Deleted"
+                        size="small"
+                        color="error"
+                        variant="outlined"
+                      />
+                    )}
                   </Box>
                 }
                 secondary={
@@ -1,7 +1,17 @@
 import axios from 'axios';
-import { FilterConfig, NotificationConfig } from '../types';
+import {
+  ConfigPatch,
+  ConfigPatchResult,
+  FilterConfig,
+  ImportResult,
+  Message,
+  MessageQuery,
+  NotificationConfig,
+  RoutingRule,
+  WatchList,
+} from '../types';
 
-const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:7777/api';
+export const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:7777/api';
 
 const api = axios.create({
   baseURL: API_BASE_URL,
@@ -15,8 +25,8 @@ export const getStatus = async () => {
   return response.data;
 };
 
-export const getMessages = async () => {
-  const response = await api.get('/messages');
+export const getMessages = async (params: MessageQuery = {}): Promise<Message[]> => {
+  const response = await api.get('/messages', { params });
   return response.data;
 };
 
@@ -43,4 +53,49 @@ export const updateChannels = async (channelIds: number[]) => {
 export const updateUsers = async (userIds: number[]) => {
   const response = await api.put('/config/users', userIds);
   return response.data;
-}; 
\ No newline at end of file
+};
+
+export const patchWatchList = async (
+  list: WatchList,
+  patch: ConfigPatch
+): Promise<ConfigPatchResult> => {
+  const response = await api.patch(`/config/${list}`, patch);
+  return response.data;
+};
+
+export const importWatchList = async (
+  list: WatchList,
+  file: File,
+  mode: 'add' | 'replace' = 'add'
+): Promise<ImportResult> => {
+  const contentType = file.name.toLowerCase().endsWith('.json')
+    ? 'application/json'
+    : file.name.toLowerCase().endsWith('.csv')
+      ? 'text/csv'
+      : 'text/plain';
+  const response = await api.post(`/config/${list}/import`, file, {
+    params: { mode },
+    headers: { 'Content-Type': contentType },
+  });
+  return response.data;
+};
+
+export const getRules = async (): Promise<RoutingRule[]> => {
+  const response = await api.get('/config/rules');
+  return response.data;
+};
+
+export const createRule = async (rule: RoutingRule): Promise<RoutingRule> => {
+  const response = await api.post('/config/rules', rule);
+  return response.data;
+};
+
+export const updateRule = async (rule: RoutingRule): Promise<RoutingRule> => {
+  const response = await api.put(`/config/rules/${rule.id}`, rule);
+  return response.data;
+};
+
+export const deleteRule = async (ruleId: string) => {
+  const response = await api.delete(`/config/rules/${ruleId}`);
+  return response.data;
+};
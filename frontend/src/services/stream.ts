@@ -0,0 +1,87 @@
+import { useEffect, useState } from 'react';
+import { QueryKey, useQueryClient } from 'react-query';
+import { API_BASE_URL } from './api';
+import { Message, Status } from '../types';
+
+// Subscribes to the backend's Server-Sent Events feed. The browser reconnects
+// on its own and sends Last-Event-ID, so the server replays anything missed.
+export const useLiveFeed = (limit = 50) => {
+  const [status, setStatus] = useState<Status | null>(null);
+  const [messages, setMessages] = useState<Message[]>([]);
+  const [error, setError] = useState(false);
+
+  useEffect(() => {
+    const source = new EventSource(`${API_BASE_URL}/stream?limit=${limit}`);
+
+    source.addEventListener('status', (event) => {
+      setStatus(JSON.parse((event as MessageEvent).data));
+      setError(false);
+    });
+
+    source.addEventListener('message', (event) => {
+      const message: Message = JSON.parse((event as MessageEvent).data);
+      setMessages((previous) => {
+        const last = previous[previous.length - 1];
+        if (last && message.id <= last.id) {
+          return previous;
+        }
+        return [...previous, message].slice(-limit);
+      });
+    });
+
+    // Edits and deletes of a message already shown replace it in place
+    source.addEventListener('message_update', (event) => {
+      const message: Message = JSON.parse((event as MessageEvent).data);
+      setMessages((previous) =>
+        previous.map((existing) => (existing.id === message.id ? message : existing))
+      );
+    });
+
+    source.onerror = () => setError(true);
+
+    return () => source.close();
+  }, [limit]);
+
+  return { status, messages, error };
+};
+
+// Keeps a react-query list of messages, oldest first, current from the same
+// feed instead of polling for it. New messages are appended and edits and
+// deletes replaced in place. An event that arrives before the list has loaded
+// refetches it, so nothing sent during the first request is missed.
+export const useMessageStream = (queryKey: QueryKey, limit = 100) => {
+  const queryClient = useQueryClient();
+
+  useEffect(() => {
+    const source = new EventSource(`${API_BASE_URL}/stream?limit=${limit}`);
+
+    const update = (change: (messages: Message[]) => Message[]) => {
+      if (queryClient.getQueryData<Message[]>(queryKey) === undefined) {
+        queryClient.invalidateQueries(queryKey, undefined, { cancelRefetch: true });
+        return;
+      }
+      queryClient.setQueryData<Message[] | undefined>(queryKey, (previous) =>
+        previous && change(previous)
+      );
+    };
+
+    source.addEventListener('message', (event) => {
+      const message: Message = JSON.parse((event as MessageEvent).data);
+      update((previous) => {
+        if (previous.some((existing) => existing.id === message.id)) {
+          return previous;
+        }
+        return [...previous, message].slice(-limit);
+      });
+    });
+
+    source.addEventListener('message_update', (event) => {
+      const message: Message = JSON.parse((event as MessageEvent).data);
+      update((previous) =>
+        previous.map((existing) => (existing.id === message.id ? message : existing))
+      );
+    });
+
+    return () => source.close();
+  }, [queryClient, queryKey, limit]);
+};
@@ -1,9 +1,10 @@
+// String values, matching the backend's (str, Enum)
 export enum NotificationPriority {
-  LOWEST = -2,
-  LOW = -1,
-  NORMAL = 0,
-  HIGH = 1,
-  EMERGENCY = 2,
+  LOWEST = '-2',
+  LOW = '-1',
+  NORMAL = '0',
+  HIGH = '1',
+  EMERGENCY = '2',
 }
 
 export interface FilterConfig {
@@ -17,15 +18,45 @@ export interface NotificationConfig {
   priority: NotificationPriority;
   sound: string;
   custom_message_template: string | null;
+  // Seconds; sent only with EMERGENCY, which Pushover repeats until acknowledged
+  retry: number;
+  expire: number;
+}
+
+export interface RoutingRule {
+  id?: string;
+  name: string;
+  // Strings: Discord snowflakes exceed JavaScript's safe integers
+  channel_id: string | null;
+  author_id: string | null;
+  filters: FilterConfig | null;
+  notifications: NotificationConfig | null;
+  enabled: boolean;
 }
 
 export interface Message {
+  id: number;
   timestamp: string;
+  channel_id: number;
   channel: string;
+  author_id: number;
   author: string;
   content: string;
   attachments: string[];
   embeds: Embed[];
+  merged_into: number | null;
+  message_id: number | null;
+  edited_at: string | null;
+  deleted: boolean;
+}
+
+export interface MessageQuery {
+  since?: number;
+  channel?: number;
+  author?: number;
+  before?: number;
+  q?: string;
+  limit?: number;
 }
 
 export interface Embed {
@@ -38,14 +69,180 @@ export interface Channel {
   name: string;
 }
 
+export interface DispatchStats {
+  queue_depth: number;
+  queue_size: number;
+  overflow_policy: 'block' | 'drop_oldest' | 'coalesce';
+  workers: number;
+  busy_workers: number;
+  utilisation: number;
+  enqueued: number;
+  delivered: number;
+  failed: number;
+  dropped: number;
+  coalesced: number;
+  urgent: number; // EMERGENCY items sent through their own lane
+  avg_wait_ms: number | null;
+  avg_delivery_ms: number | null;
+  last_wait_ms: number | null;
+  last_delivery_ms: number | null;
+}
+
+export interface ImageCacheStats {
+  hits: number;
+  disk_hits: number;
+  misses: number;
+  hit_rate: number;
+  evictions: number;
+  expired: number;
+  entries: number;
+  bytes: number;
+  max_bytes: number;
+  spilled_entries: number;
+  spilled_bytes: number;
+}
+
+export interface ImageProcessingStats {
+  enabled: boolean;
+  processed: number;
+  skipped: number;
+  failed: number;
+  bytes_in: number;
+  bytes_out: number;
+  bytes_saved: number;
+  avg_ms: Record<'queue' | 'decode' | 'resize' | 'encode', number | null>;
+}
+
+export interface RateLimitStats {
+  limit: number | null;
+  remaining: number | null;
+  reset: number | null;
+  throttled: number;
+  retry_after: number;
+}
+
+export interface SchedulerStats {
+  window: number;
+  current_window: number;
+  open_digests: number;
+  received: number;
+  immediate: number;
+  leading: number;
+  digests: number;
+  merged: number;
+  rate_limit: RateLimitStats | null;
+}
+
+export interface OutboxStats {
+  pending: number;
+  retry_scheduled: number;
+  recovered: number;
+  retried: number;
+  given_up: number;
+}
+
+export interface DedupStats {
+  entries: number;
+  checked: number;
+  suppressed: number;
+  suppression_rate: number;
+}
+
+export interface RoutingInfo {
+  version: number;
+  channels: number;
+  users: number;
+  filters_enabled: boolean;
+  rules: number;
+}
+
+export interface StoreStats {
+  pending: number;
+  written: number;
+  failed: number;
+  fts_enabled: boolean;
+}
+
+export interface WorkerStatus {
+  id: number;
+  pid: number | null;
+  alive: boolean;
+  connected: boolean;
+  state: string | null;
+  channels: number;
+  restarts: number;
+  last_seen: number | null;
+  last_error: string | null;
+}
+
+export interface Readiness {
+  state: string;
+  ready: boolean;
+  uptime: number | null;
+  restarts: number;
+  last_error: string | null;
+  workers?: WorkerStatus[];
+}
+
 export interface Status {
   connected: boolean;
+  readiness: Readiness | null;
   channels: Channel[];
+  routing: RoutingInfo;
+  dispatch: DispatchStats;
+  scheduler: SchedulerStats;
+  outbox: OutboxStats;
+  dedup: DedupStats | null;
+  image_cache: ImageCacheStats | null;
+  image_processing: ImageProcessingStats | null;
+  config_store: ConfigStoreStats | null;
+  backfill: BackfillStats;
+  store: StoreStats | null;
+}
+
+export interface BackfillStats {
+  enabled: boolean;
+  channels: number;
+  runs: number;
+  fetched: number;
+  truncated: number;
+  failed: number;
+  last_seconds: number | null;
+}
+
+export interface ConfigStoreStats {
+  path: string;
+  pending: boolean;
+  saves: number;
+  coalesced: number;
 }
 
+// IDs are strings: Discord snowflakes exceed JavaScript's safe integers
 export interface Config {
-  channel_ids: number[];
-  target_user_ids: number[];
+  channel_ids: string[];
+  target_user_ids: string[];
   filters: FilterConfig;
   notifications: NotificationConfig;
-} 
\ No newline at end of file
+  rules: RoutingRule[];
+} 
+
+export type WatchList = 'channels' | 'users';
+
+// IDs are sent as strings: Discord snowflakes exceed JavaScript's safe integers
+export interface ConfigPatch {
+  add: string[];
+  remove: string[];
+}
+
+export interface ConfigPatchResult {
+  added: number[];
+  removed: number[];
+  total: number;
+}
+
+export interface ImportResult {
+  read: number;
+  added: number;
+  removed: number;
+  total: number;
+}